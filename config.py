@@ -6,11 +6,53 @@ ADDR_SIZE = 12          # Tamanho do endereço (bits) - para 4096 palavras
 MEMORY_SIZE = 4096      # Quantidade de palavras na RAM
 CACHE_SIZE = 16         # Quantidade de linhas na Cache (exemplo)
 BLOCK_SIZE = 4          # Palavras por bloco (para a Cache)
+PAGE_SIZE = 256         # Palavras por página da RAM (cópia na escrita entre CPUs do fork())
+
+# --- Configurações da Cache ---
+CACHE_WAYS = 1              # Vias por conjunto (1 = mapeamento direto)
+CACHE_POLICY = "LRU"        # Substituição: "LRU", "FIFO" ou "RANDOM"
+CACHE_WRITE_BACK = False    # False = Write-Through
+CACHE_WRITE_ALLOCATE = False # Write Miss carrega o bloco na cache?
+# L2 opcional (None = sem L2). Exemplo:
+# L2_CACHE = dict(lines=64, ways=4, block_size=8, policy="LRU", write_back=True, write_allocate=True, latency=4)
+L2_CACHE = None
+
+# --- Busca Antecipada (hardware/prefetch.py) ---
+PREFETCH_DEPTH = 4          # Palavras de instrução na fila da IFU
+
+# --- Multi-core (hardware/multicore.py) ---
+COHERENCE_PROTOCOL = "MESI" # Protocolo das L1 coerentes: "MSI" ou "MESI"
+CORE_STACK_WORDS = 256      # Pilha de cada núcleo: o núcleo i começa com SP = -i * CORE_STACK_WORDS
+CORE_LOCAL_BASE = 0x700     # Memória local de cada núcleo (mesmo endereço, conteúdo separado)
+CORE_LOCAL_WORDS = 64
+MULTICORE_QUANTUM = 100     # Microinstruções de cada núcleo por vez no rodízio (modo coerente)
+MULTICORE_EPOCH = 10_000    # Microinstruções entre sincronizações da memória (modo em processos)
+
+# --- E/S Mapeada em Memória ---
+# Portas (a partir de IO_BASE): entrada = dado, status; saída = dado, contador/flush.
+# Só existem se algum dispositivo for ligado (CPU.map_device); o meio da memória fica
+# longe do programa (embaixo) e da pilha (em cima)
+IO_BASE = 0x800
+IO_BUFFER_SIZE = 64 * 1024  # Bytes lidos/gravados de uma vez pelos dispositivos de E/S
+
+# --- Modelo de Tempo (em ciclos de clock) ---
+CACHE_HIT_LATENCY = 1   # Acerto na L1 (1 = cabe dentro da própria microinstrução)
+L2_LATENCY = 4          # Acerto na L2 (usado se L2_CACHE não trouxer 'latency')
+RAM_LATENCY = 10        # RAM entregar/aceitar a primeira palavra
+RAM_WORD_LATENCY = 1    # Cada palavra a mais num burst (bloco)
 
 # --- Máscaras de Bits (Essencial para simular 16 bits em Python) ---
 MASK_16BIT = 0xFFFF     # 1111 1111 1111 1111
 MASK_12BIT = 0x0FFF     # 0000 1111 1111 1111
 
+# --- Assembler ---
+OBJECT_CACHE_DIR = ".mic1_cache" # Onde ficam os programas já montados (None = só na memória)
+
+# --- Serviço Local (tools/service.py) ---
+SERVICE_SOCKET = ".mic1_service.sock" # Socket Unix padrão do serviço de jobs
+SERVICE_WORKERS = None      # Processos do pool (None = nº de núcleos)
+SERVICE_CACHE_ENTRIES = 1024 # Resultados guardados (os menos usados saem primeiro)
+
 # --- Configurações de Interface (GUI) ---
 WINDOW_WIDTH = 1200
 WINDOW_HEIGHT = 800
@@ -18,4 +60,7 @@ COLOR_BG = "#f0f0f0"
 COLOR_COMPONENT = "white"
 COLOR_HIGHLIGHT = "#ff5555" # Cor quando ativa (vermelho claro)
 COLOR_BUS_ACTIVE = "red"
-SPEED_DELAY = 0.5       # Segundos entre subciclos
\ No newline at end of file
+SPEED_DELAY = 0.5       # Segundos entre subciclos (modo animado)
+GUI_FPS = 30            # Quadros por segundo máximos da janela (redesenho só do que mudou)
+TURBO_CHUNK_CYCLES = 20_000 # Microinstruções por pedaço no modo turbo (entre checagens de comando)
+MEMORY_VIEW_ROWS = 16   # Linhas (de 8 palavras) visíveis no painel da memória
\ No newline at end of file
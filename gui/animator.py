@@ -0,0 +1,231 @@
+# gui/animator.py
+"""
+Simulação fora da thread da interface.
+
+O SimulationWorker roda o CPU numa thread própria e vai acumulando as MUDANÇAS de estado
+(registradores, barramentos, linhas de cache, escritas na memória) num StateChanges.
+A janela pega esse pacote (take_changes) no ritmo dela (GUI_FPS) e redesenha só o que mudou.
+Mudanças repetidas entre dois quadros se fundem: se o AC mudou 10 mil vezes, só o último valor vai.
+
+Modos:
+  - MODE_ANIMATED: um subciclo por vez, com SPEED_DELAY segundos entre eles (barramentos animados);
+  - MODE_TURBO:    CPU.run_until em pedaços, sem animação; a tela é atualizada a cada quadro.
+O Tk nunca é tocado aqui: só a thread principal mexe na janela.
+"""
+import threading
+import time
+from config import GUI_FPS, SPEED_DELAY, TURBO_CHUNK_CYCLES, MEMORY_SIZE
+from hardware.cpu import STOP_BUDGET, STOP_BREAKPOINT, STOP_HALT
+
+MODE_ANIMATED = "animado"
+MODE_TURBO = "turbo"
+
+MEM_CHUNK = 64 # Palavras comparadas de uma vez ao procurar escritas na memória
+
+class StateChanges:
+    """Pacote de mudanças desde o último quadro (só o valor mais recente de cada coisa)"""
+    __slots__ = ('regs', 'bus', 'cache_lines', 'memory', 'status')
+
+    def __init__(self):
+        self.regs = {}           # índice -> valor
+        self.bus = None          # (subciclo, ctrl, latch_a, latch_b, resultado) ou None
+        self.cache_lines = {}    # (nível, índice da linha) -> (valid, dirty, tag, dados)
+        self.memory = {}         # endereço -> valor
+        self.status = {}         # 'mpc', 'cycles', 'instructions', 'running', 'reason', ...
+
+    def __bool__(self):
+        return bool(self.regs or self.bus or self.cache_lines or self.memory or self.status)
+
+    def merge(self, other):
+        self.regs.update(other.regs)
+        if other.bus is not None:
+            self.bus = other.bus
+        self.cache_lines.update(other.cache_lines)
+        self.memory.update(other.memory)
+        self.status.update(other.status)
+
+class SimulationWorker:
+    def __init__(self, cpu, mode=MODE_TURBO, delay=SPEED_DELAY, chunk_cycles=TURBO_CHUNK_CYCLES):
+        self.cpu = cpu
+        self.mode = mode
+        self.delay = delay
+        self.chunk_cycles = chunk_cycles
+        self.frame_interval = 1.0 / GUI_FPS
+
+        self._lock = threading.Lock()
+        self._pending = StateChanges()
+        self._wake = threading.Event()   # Acorda a thread (comando novo)
+        self._running = False             # Rodando continuamente?
+        self._steps = 0                   # Subciclos pedidos pelo botão "passo"
+        self._quit = False
+        self._thread = threading.Thread(target=self._loop, name="mic1-sim", daemon=True)
+
+        # O que a tela está mostrando (para calcular as diferenças)
+        self._shown_regs = [None] * 16
+        self._shown_lines = {}
+        self._shown_memory = bytes(cpu.ram._view.cast('B'))
+        self.publish_all()
+
+    # --- Comandos (chamados pela thread da interface) ---
+
+    def start(self):
+        self._thread.start()
+
+    def run(self):
+        self._running = True
+        self._wake.set()
+
+    def pause(self):
+        self._running = False
+        self._wake.set()
+
+    def step(self, subcycles=1):
+        """Avança 'subcycles' subciclos (4 = uma microinstrução inteira)"""
+        with self._lock:
+            self._steps += subcycles
+        self._wake.set()
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self._wake.set()
+
+    def stop(self):
+        self._quit = True
+        self._running = False
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @property
+    def running(self):
+        return self._running
+
+    def take_changes(self):
+        """Entrega as mudanças acumuladas e começa um pacote novo (chamado a cada quadro)"""
+        with self._lock:
+            changes, self._pending = self._pending, StateChanges()
+        return changes
+
+    # --- Publicação (thread da simulação) ---
+
+    def _publish(self, changes):
+        with self._lock:
+            self._pending.merge(changes)
+
+    def publish_all(self):
+        """Manda o estado inteiro (ex: depois de carregar um programa)"""
+        self._shown_regs = [None] * 16
+        self._shown_lines = {}
+        self._shown_memory = b''
+        self._publish(self._diff(memory=True))
+
+    def _diff(self, memory=True, bus=None):
+        """Compara o CPU com o que a tela mostra e monta o pacote só com as diferenças"""
+        cpu = self.cpu
+        changes = StateChanges()
+        for index, value in enumerate(cpu.regs.values):
+            if self._shown_regs[index] != value:
+                self._shown_regs[index] = changes.regs[index] = value
+
+        for level_number, level in enumerate(cpu.cache.levels()):
+            for line_number, line in enumerate(level.lines):
+                key = (level_number, line_number)
+                state = (line.valid, line.dirty, line.tag, tuple(line.data))
+                if self._shown_lines.get(key) != state:
+                    self._shown_lines[key] = changes.cache_lines[key] = state
+
+        if memory:
+            current = bytes(cpu.ram._view.cast('B'))
+            shown = self._shown_memory
+            if current != shown:
+                data = cpu.ram._data
+                step = MEM_CHUNK * 2
+                for start in range(0, len(current), step):
+                    if current[start:start + step] != shown[start:start + step]:
+                        for addr in range(start // 2, min(start // 2 + MEM_CHUNK, MEMORY_SIZE)):
+                            if not shown or shown[2 * addr:2 * addr + 2] != current[2 * addr:2 * addr + 2]:
+                                changes.memory[addr] = data[addr]
+                self._shown_memory = current
+
+        changes.bus = bus
+        changes.status = {'mpc': cpu.MPC, 'sub_cycle': cpu.sub_cycle, 'cycles': cpu.cycles,
+                          'instructions': cpu.instructions, 'running': self._running,
+                          'mode': self.mode, 'stall_cycles': cpu.stall_cycles()}
+        return changes
+
+    # --- Laço da thread ---
+
+    def _loop(self):
+        while not self._quit:
+            with self._lock:
+                steps = self._steps
+                self._steps = 0
+            if steps:
+                self._animated_steps(steps, delay=0.0)
+            elif self._running:
+                if self.mode == MODE_TURBO:
+                    self._turbo_frame()
+                else:
+                    self._animated_steps(1, delay=self.delay)
+            else:
+                self._wake.wait()
+                self._wake.clear()
+
+    def _animated_steps(self, count, delay):
+        cpu = self.cpu
+        for _ in range(count):
+            if cpu.halting and cpu.MPC == 0 and cpu.sub_cycle == 1:
+                # Fronteira depois do "JUMP fim": para com halt, como o run_until do turbo
+                cpu.halting = False
+                changes = self._diff(memory=False)
+                changes.status['reason'], changes.status['detail'] = STOP_HALT, cpu.regs.values[1]
+                self._halt_animation(changes)
+                return
+            sub_cycle = cpu.sub_cycle
+            cpu.step()
+            bus = (sub_cycle, cpu.ctrl, cpu.latch_a, cpu.latch_b, cpu.alu_result)
+            # A memória só muda no subciclo 4 (rd/wr): não compara a RAM à toa
+            changes = self._diff(memory=sub_cycle == 4, bus=bus)
+            breakpoints = cpu.breakpoints
+            stop = None
+            if cpu.fault is not None: # Opcode desconhecido / MPC vazio: para como o turbo
+                stop = cpu.fault
+            elif breakpoints is not None and breakpoints.hit is not None:
+                # O step() só anota a parada: aqui ela pausa a animação
+                stop = (STOP_BREAKPOINT, breakpoints.hit)
+                breakpoints.hit = None
+            if stop is not None:
+                changes.status['reason'], changes.status['detail'] = stop
+                self._halt_animation(changes)
+                return
+            self._publish(changes)
+            if delay:
+                self._wake.wait(delay) # Acorda antes se chegar comando (pausa, modo...)
+                self._wake.clear()
+                if not self._running or self.mode != MODE_ANIMATED:
+                    return
+
+    def _halt_animation(self, changes):
+        """Pausa a simulação (descarta os passos pedidos) e publica o motivo da parada"""
+        self._running = False
+        changes.status['running'] = False
+        with self._lock:
+            self._steps = 0
+        self._publish(changes)
+
+    def _turbo_frame(self):
+        """Roda pedaços do run_until até dar o tempo de um quadro; publica uma vez"""
+        cpu = self.cpu
+        deadline = time.perf_counter() + self.frame_interval
+        while True:
+            result = cpu.run_until(self.chunk_cycles)
+            if result.reason != STOP_BUDGET:
+                self._running = False
+                changes = self._diff()
+                changes.status['reason'] = result.reason
+                changes.status['detail'] = result.detail
+                self._publish(changes)
+                return
+            if time.perf_counter() >= deadline or not self._running or self.mode != MODE_TURBO:
+                break
+        self._publish(self._diff())
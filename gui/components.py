@@ -0,0 +1,167 @@
+# gui/components.py
+"""
+Componentes desenhados num tk.Canvas. Cada um guarda o que está mostrando e só chama
+itemconfig quando o valor muda (redesenhar o que não mudou é o que deixa a GUI lenta).
+"""
+from config import COLOR_BUS_ACTIVE, COLOR_COMPONENT, COLOR_HIGHLIGHT, MEMORY_VIEW_ROWS, MEMORY_SIZE
+from hardware.registers import REG_NAMES
+
+FONT = ("Courier", 10)
+FONT_BOLD = ("Courier", 10, "bold")
+COLOR_IDLE = "black"
+COLOR_BUS_IDLE = "#999999"
+WORDS_PER_ROW = 8
+
+class RegisterBox:
+    """Um registrador: nome + valor em hexadecimal"""
+    def __init__(self, canvas, x, y, name, width=130, height=24):
+        self.canvas = canvas
+        self.rect = canvas.create_rectangle(x, y, x + width, y + height, fill=COLOR_COMPONENT)
+        canvas.create_text(x + 6, y + height / 2, text=name, anchor="w", font=FONT_BOLD)
+        self.text = canvas.create_text(x + width - 6, y + height / 2, text="----", anchor="e", font=FONT)
+        self.anchor = (x + width, y + height / 2) # Onde os barramentos encostam
+        self._value = None
+        self._active = False
+
+    def set_value(self, value):
+        if value != self._value:
+            self._value = value
+            self.canvas.itemconfig(self.text, text=f"{value:04X}")
+
+    def set_active(self, active):
+        if active != self._active:
+            self._active = active
+            self.canvas.itemconfig(self.rect, fill=COLOR_HIGHLIGHT if active else COLOR_COMPONENT)
+
+class RegisterFileView:
+    def __init__(self, canvas, x, y):
+        self.boxes = [RegisterBox(canvas, x, y + i * 28, REG_NAMES[i]) for i in range(16)]
+
+    def update(self, regs):
+        for index, value in regs.items():
+            self.boxes[index].set_value(value)
+
+    def highlight(self, indexes):
+        for index, box in enumerate(self.boxes):
+            box.set_active(index in indexes)
+
+class Bus:
+    """Barramento (A, B ou C): linha que acende quando está em uso, com o valor ao lado"""
+    def __init__(self, canvas, x, y0, y1, name):
+        self.canvas = canvas
+        self.line = canvas.create_line(x, y0, x, y1, width=3, fill=COLOR_BUS_IDLE)
+        canvas.create_text(x, y0 - 10, text=name, font=FONT_BOLD)
+        self.label = canvas.create_text(x + 6, y1 + 10, text="", anchor="w", font=FONT)
+        self._state = None
+
+    def set(self, active, value=None):
+        state = (active, value)
+        if state != self._state:
+            self._state = state
+            self.canvas.itemconfig(self.line, fill=COLOR_BUS_ACTIVE if active else COLOR_BUS_IDLE)
+            self.canvas.itemconfig(self.label, text=f"{value:04X}" if active and value is not None else "")
+
+class AluView:
+    OPS = ("A+B", "A AND B", "A", "NOT A")
+    SHIFTS = ("", " >>1", " <<8")
+
+    def __init__(self, canvas, x, y):
+        self.canvas = canvas
+        self.rect = canvas.create_polygon(x, y, x + 120, y, x + 100, y + 50, x + 20, y + 50,
+                                          fill=COLOR_COMPONENT, outline=COLOR_IDLE)
+        self.text = canvas.create_text(x + 60, y + 18, text="ULA", font=FONT_BOLD)
+        self.result = canvas.create_text(x + 60, y + 36, text="", font=FONT)
+        self._state = None
+
+    def set(self, op, sh, result, active):
+        state = (op, sh, result, active)
+        if state == self._state:
+            return
+        self._state = state
+        self.canvas.itemconfig(self.rect, fill=COLOR_HIGHLIGHT if active else COLOR_COMPONENT)
+        self.canvas.itemconfig(self.text, text=f"ULA: {self.OPS[op]}{self.SHIFTS[sh] if sh < 3 else ''}")
+        self.canvas.itemconfig(self.result, text=f"= {result:04X}")
+
+class CacheView:
+    """Tabela das linhas da cache (um texto por linha; só as linhas que mudaram são reescritas)"""
+    def __init__(self, canvas, x, y, levels):
+        self.canvas = canvas
+        self.items = {}
+        row = 0
+        for level_number, level in enumerate(levels):
+            canvas.create_text(x, y + row * 16, text=f"{level.name} ({level.ways} via(s))",
+                               anchor="w", font=FONT_BOLD)
+            row += 1
+            for line_number in range(len(level.lines)):
+                self.items[(level_number, line_number)] = canvas.create_text(
+                    x, y + row * 16, text="", anchor="w", font=FONT)
+                row += 1
+        self.height = row * 16
+
+    def update(self, lines):
+        for key, (valid, dirty, tag, data) in lines.items():
+            item = self.items.get(key)
+            if item is None:
+                continue
+            words = " ".join(f"{w:04X}" for w in data)
+            text = f"{key[1]:>3} V={int(valid)} D={int(dirty)} TAG={tag:03X} {words}"
+            self.canvas.itemconfig(item, text=text, fill=COLOR_IDLE if valid else COLOR_BUS_IDLE)
+
+class MemoryView:
+    """Janela da RAM (MEMORY_VIEW_ROWS x 8 palavras a partir de 'start'); escritas recentes piscam"""
+    def __init__(self, canvas, x, y, start=0):
+        self.canvas = canvas
+        self.start = start
+        self.headers = []
+        self.cells = []
+        for row in range(MEMORY_VIEW_ROWS):
+            self.headers.append(canvas.create_text(x, y + row * 16, text="", anchor="w", font=FONT_BOLD))
+            for col in range(WORDS_PER_ROW):
+                self.cells.append(canvas.create_text(x + 44 + col * 40, y + row * 16, text="----",
+                                                     anchor="w", font=FONT))
+        self._values = {}
+        self._hot = set() # Células destacadas no último quadro
+        self.set_start(start)
+
+    def set_start(self, start, ram_data=None):
+        self.start = max(0, min(start, MEMORY_SIZE - MEMORY_VIEW_ROWS * WORDS_PER_ROW))
+        for row, header in enumerate(self.headers):
+            self.canvas.itemconfig(header, text=f"{self.start + row * WORDS_PER_ROW:03X}:")
+        if ram_data is not None:
+            self._values = {}
+            self.update({addr: ram_data[addr] for addr in self._visible()}, highlight=False)
+
+    def _visible(self):
+        return range(self.start, self.start + MEMORY_VIEW_ROWS * WORDS_PER_ROW)
+
+    def update(self, memory, highlight=True):
+        for cell in self._hot:
+            self.canvas.itemconfig(cell, fill=COLOR_IDLE)
+        self._hot = set()
+        end = self.start + MEMORY_VIEW_ROWS * WORDS_PER_ROW
+        for addr, value in memory.items():
+            if self.start <= addr < end and self._values.get(addr) != value:
+                self._values[addr] = value
+                cell = self.cells[addr - self.start]
+                self.canvas.itemconfig(cell, text=f"{value:04X}",
+                                       fill=COLOR_BUS_ACTIVE if highlight else COLOR_IDLE)
+                if highlight:
+                    self._hot.add(cell)
+
+class StatusBar:
+    def __init__(self, canvas, x, y):
+        self.canvas = canvas
+        self.text = canvas.create_text(x, y, text="", anchor="w", font=FONT)
+        self._state = {}
+
+    def update(self, status, fps=None):
+        self._state.update(status)
+        s = self._state
+        text = (f"MPC={s.get('mpc', 0):<3} subciclo={s.get('sub_cycle', 1)}  "
+                f"ciclos={s.get('cycles', 0):,}  instruções={s.get('instructions', 0):,}  "
+                f"stalls={s.get('stall_cycles', 0):,}  modo={s.get('mode', '')}")
+        if s.get('reason'):
+            text += f"  parada: {s['reason']}"
+        if fps is not None:
+            text += f"  ({fps:.0f} quadros/s)"
+        self.canvas.itemconfig(self.text, text=text)
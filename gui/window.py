@@ -0,0 +1,187 @@
+# gui/window.py
+"""
+Janela principal do simulador.
+
+    python -m gui.window [programa.asm]
+
+A simulação roda no SimulationWorker (outra thread). A janela só redesenha, no máximo
+GUI_FPS vezes por segundo, os componentes cujas mudanças chegaram desde o último quadro.
+"""
+import sys
+import time
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
+from config import COLOR_BG, GUI_FPS, SPEED_DELAY, WINDOW_HEIGHT, WINDOW_WIDTH
+from gui.animator import MODE_ANIMATED, MODE_TURBO, SimulationWorker
+from gui.components import AluView, Bus, CacheView, MemoryView, RegisterFileView, StatusBar
+from hardware.cpu import CPU
+from software.assembler import Assembler
+
+class MainWindow:
+    def __init__(self, root, cpu=None):
+        self.root = root
+        self.cpu = cpu or CPU()
+        root.title("Simulador MIC-1")
+        root.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
+        root.configure(bg=COLOR_BG)
+
+        self._build_toolbar()
+        self.canvas = tk.Canvas(root, bg=COLOR_BG, highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self._build_components()
+
+        self.worker = SimulationWorker(self.cpu, mode=MODE_TURBO)
+        self.worker.start()
+        self._frame_interval = max(1, int(1000 / GUI_FPS))
+        self._frames = 0
+        self._fps_clock = time.perf_counter()
+        self._fps = None
+        root.protocol("WM_DELETE_WINDOW", self.close)
+        root.after(self._frame_interval, self._frame)
+
+    # --- Montagem da tela ---
+
+    def _build_toolbar(self):
+        bar = tk.Frame(self.root, bg=COLOR_BG)
+        bar.pack(side="top", fill="x")
+        tk.Button(bar, text="Abrir .asm", command=self.open_program).pack(side="left", padx=2)
+        tk.Button(bar, text="Rodar", command=self.run).pack(side="left", padx=2)
+        tk.Button(bar, text="Pausar", command=self.pause).pack(side="left", padx=2)
+        tk.Button(bar, text="Subciclo", command=lambda: self.worker.step(1)).pack(side="left", padx=2)
+        tk.Button(bar, text="Microinstrução", command=lambda: self.worker.step(4)).pack(side="left", padx=2)
+
+        self.turbo = tk.BooleanVar(value=True)
+        tk.Checkbutton(bar, text="Turbo (sem animação)", variable=self.turbo, bg=COLOR_BG,
+                       command=self._mode_changed).pack(side="left", padx=8)
+
+        tk.Label(bar, text="Atraso (s):", bg=COLOR_BG).pack(side="left")
+        self.delay = tk.Scale(bar, from_=0.0, to=2.0, resolution=0.05, orient="horizontal",
+                              length=120, command=self._delay_changed, bg=COLOR_BG)
+        self.delay.set(SPEED_DELAY)
+        self.delay.pack(side="left")
+
+        tk.Label(bar, text="Memória a partir de:", bg=COLOR_BG).pack(side="left", padx=(8, 0))
+        self.mem_start = tk.Entry(bar, width=6)
+        self.mem_start.insert(0, "000")
+        self.mem_start.bind("<Return>", self._memory_start_changed)
+        self.mem_start.pack(side="left")
+
+    def _build_components(self):
+        c = self.canvas
+        self.registers = RegisterFileView(c, 20, 30)
+        self.bus_a = Bus(c, 190, 30, 470, "A")
+        self.bus_b = Bus(c, 215, 30, 470, "B")
+        self.bus_c = Bus(c, 240, 30, 470, "C")
+        self.alu = AluView(c, 270, 200)
+        c.create_text(440, 15, text="Memória (RAM)", anchor="w", font=("Courier", 10, "bold"))
+        self.memory = MemoryView(c, 440, 35)
+        c.create_text(440, 315, text="Cache", anchor="w", font=("Courier", 10, "bold"))
+        self.cache = CacheView(c, 440, 335, self.cpu.cache.levels())
+        self.status = StatusBar(c, 20, 500)
+
+    # --- Comandos ---
+
+    def open_program(self, path=None):
+        path = path or filedialog.askopenfilename(filetypes=[("Assembly MAC-1", "*.asm")])
+        if not path:
+            return
+        try:
+            code = Assembler().assemble(path)
+        except (OSError, ValueError) as exc:
+            messagebox.showerror("Erro ao montar", str(exc))
+            return
+        # Máquina nova (o worker antigo para antes de trocar)
+        self.worker.stop()
+        self.cpu = CPU()
+        self.cpu.ram.load_image(code)
+        self.canvas.delete("all")
+        self._build_components()
+        self.worker = SimulationWorker(self.cpu, mode=MODE_TURBO if self.turbo.get() else MODE_ANIMATED,
+                                       delay=self.delay.get())
+        self.worker.start()
+        self.root.title(f"Simulador MIC-1 - {path}")
+
+    def run(self):
+        self.worker.run()
+
+    def pause(self):
+        self.worker.pause()
+
+    def close(self):
+        self.worker.stop()
+        self.root.destroy()
+
+    def _mode_changed(self):
+        self.worker.set_mode(MODE_TURBO if self.turbo.get() else MODE_ANIMATED)
+
+    def _delay_changed(self, value):
+        self.worker.delay = float(value)
+
+    def _memory_start_changed(self, event=None):
+        try:
+            start = int(self.mem_start.get(), 16)
+        except ValueError:
+            return
+        self.memory.set_start(start, self.cpu.ram._data)
+
+    # --- Renderização (thread da interface, limitada a GUI_FPS) ---
+
+    def _frame(self):
+        changes = self.worker.take_changes()
+        if changes:
+            self._render(changes)
+        self._frames += 1
+        now = time.perf_counter()
+        if now - self._fps_clock >= 1.0:
+            self._fps = self._frames / (now - self._fps_clock)
+            self._frames, self._fps_clock = 0, now
+            self.status.update({}, self._fps)
+        self.root.after(self._frame_interval, self._frame)
+
+    def _render(self, changes):
+        if changes.regs:
+            self.registers.update(changes.regs)
+        if changes.memory:
+            self.memory.update(changes.memory)
+        if changes.cache_lines:
+            self.cache.update(changes.cache_lines)
+        if changes.status:
+            self.status.update(changes.status, self._fps)
+        self._render_buses(changes.bus)
+
+    def _render_buses(self, bus):
+        if bus is None:
+            # Turbo (ou parado): nada aceso
+            self.bus_a.set(False)
+            self.bus_b.set(False)
+            self.bus_c.set(False)
+            self.registers.highlight(())
+            return
+        sub_cycle, ctrl, latch_a, latch_b, result = bus
+        # 'sub_cycle' é o subciclo que ACABOU de rodar
+        reading = sub_cycle in (2, 3)
+        writing = sub_cycle == 4
+        self.bus_a.set(reading, latch_a)
+        self.bus_b.set(reading, latch_b)
+        self.bus_c.set(writing and bool(ctrl.enc), result)
+        self.alu.set(ctrl.alu, ctrl.sh, result, sub_cycle == 3)
+        active = set()
+        if reading:
+            active.update((6 if ctrl.amux else ctrl.a, ctrl.b))
+        if writing:
+            if ctrl.enc: active.add(ctrl.c)
+            if ctrl.mar: active.add(5)
+            if ctrl.mbr or ctrl.rd: active.add(6)
+        self.registers.highlight(active)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    root = tk.Tk()
+    window = MainWindow(root)
+    if argv:
+        window.open_program(argv[0])
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# hardware/breakpoints.py
+from collections import namedtuple
+from config import MEMORY_SIZE
+from software.isa import OPCODES
+
+# Tipos de parada (BreakpointHit.kind)
+HIT_PC = "pc"         # Início da instrução no endereço (MPC = 0)
+HIT_MPC = "mpc"       # Antes de executar a microinstrução do endereço
+HIT_OPCODE = "opcode" # Logo depois da decodificação (MPC = início da rotina)
+HIT_READ = "read"     # No fim da instrução que leu o endereço (rd)
+HIT_WRITE = "write"   # No fim da instrução que escreveu o endereço (wr)
+
+BreakpointHit = namedtuple('BreakpointHit', 'kind value cycle')
+
+class Breakpoints:
+    """
+    Breakpoints e watchpoints (opcional). Ligue com cpu.breakpoints = Breakpoints(...).
+    run_until para com STOP_BREAKPOINT e detail = BreakpointHit; o step() só anota a
+    parada em 'hit' (quem chama o step decide o que fazer).
+    Watchpoints param no fim da instrução (MPC = 0): rd/wr duram duas microinstruções
+    (ex: STOD), mas o acesso conta uma vez só; o 'cycle' é o do primeiro acesso.
+    Tudo vira conjuntos prontos (endereços, MPCs, opcodes): o laço só faz 'x in conjunto'
+    nas fronteiras de instrução, na decodificação e nos acessos rd/wr. Sem nada ligado,
+    o CPU usa o laço rápido de sempre (custo zero).
+    Continuar de uma parada pula o breakpoint em que a CPU está parada.
+    """
+    def __init__(self, symbol_table=None):
+        self.symbol_table = dict(symbol_table or {})
+        self.pcs = set()
+        self.mpcs = set()
+        self.opcodes = set()
+        self.reads = set()
+        self.writes = set()
+        self.hit = None     # Última parada (BreakpointHit)
+        self.pending = None # Watchpoint do step() esperando a instrução terminar
+
+    def __bool__(self):
+        return bool(self.pcs or self.mpcs or self.opcodes or self.reads or self.writes)
+
+    # --- Breakpoints ---
+
+    def add_pc(self, pc):
+        self.pcs.add(pc & 0x0FFF)
+
+    def add_label(self, label):
+        """Breakpoint no endereço de um rótulo (Assembler.symbol_table)"""
+        if label not in self.symbol_table:
+            raise ValueError(f"Rótulo desconhecido: {label}")
+        self.pcs.add(self.symbol_table[label])
+
+    def add_mpc(self, mpc):
+        self.mpcs.add(mpc)
+
+    def add_opcode(self, opcode):
+        """Opcode numérico (0x2000, 0xF400) ou mnemônico ('ADDD', 'PUSH')"""
+        if isinstance(opcode, str):
+            if opcode.upper() not in OPCODES:
+                raise ValueError(f"Instrução desconhecida: {opcode}")
+            opcode = OPCODES[opcode.upper()]
+        self.opcodes.add(opcode)
+
+    # --- Watchpoints ---
+
+    def watch(self, start, end=None, read=True, write=True):
+        """Vigia o endereço 'start' (ou a faixa [start, end]) nas leituras e/ou escritas"""
+        addresses = _address_range(start, end)
+        if read:
+            self.reads.update(addresses)
+        if write:
+            self.writes.update(addresses)
+
+    def unwatch(self, start, end=None):
+        addresses = _address_range(start, end)
+        self.reads.difference_update(addresses)
+        self.writes.difference_update(addresses)
+
+    def clear(self):
+        for points in (self.pcs, self.mpcs, self.opcodes, self.reads, self.writes):
+            points.clear()
+        self.hit = self.pending = None
+
+    def compiled(self):
+        """Conjuntos congelados usados pelo laço (pcs, mpcs, opcodes, reads, writes)"""
+        return (frozenset(self.pcs), frozenset(self.mpcs), frozenset(self.opcodes),
+                frozenset(self.reads), frozenset(self.writes))
+
+    def label_of(self, pc):
+        """Rótulo no endereço (ou None), para mostrar a parada"""
+        for name, address in self.symbol_table.items():
+            if address == pc:
+                return name
+        return None
+
+def _address_range(start, end):
+    end = start if end is None else end
+    if not 0 <= start <= end < MEMORY_SIZE:
+        raise ValueError(f"Faixa de endereços inválida: {start}-{end}")
+    return range(start, end + 1)
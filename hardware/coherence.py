@@ -0,0 +1,198 @@
+# hardware/coherence.py
+"""
+Caches L1 coerentes por espionagem (snooping) num barramento compartilhado: MSI ou MESI.
+
+Cada núcleo tem sua CoherentCache (sempre write-back + write-allocate: o estado M é o
+bloco sujo) e todas ficam penduradas no mesmo Bus, em cima da MESMA MainMemory.
+Estado de cada linha (derivado dos bits da linha, a GUI continua vendo valid/dirty):
+    I = não válida    M = válida e suja    E = válida, limpa e exclusiva    S = válida e limpa
+Transações do barramento (só nas faltas e nas escritas em linha S; acertos ficam locais):
+    BusRd   falta de leitura: quem tem o bloco em M devolve ele para a RAM; E/M viram S
+    BusRdX  falta de escrita: idem, e todas as outras cópias são invalidadas
+    BusUpgr escrita numa linha S: invalida as outras cópias (sem trazer dados)
+No MSI não existe E: todo bloco limpo é S e a primeira escrita nele sempre custa um BusUpgr.
+"""
+from config import (CACHE_SIZE, BLOCK_SIZE, CACHE_WAYS, CACHE_POLICY, CACHE_HIT_LATENCY,
+                    COHERENCE_PROTOCOL, MASK_16BIT)
+from hardware.memory import Cache, CacheLine, POLICY_LRU
+
+PROTOCOL_MSI = "MSI"
+PROTOCOL_MESI = "MESI"
+
+STATE_M, STATE_E, STATE_S, STATE_I = "M", "E", "S", "I"
+
+class CoherentLine(CacheLine):
+    __slots__ = ('exclusive',)
+
+    def __init__(self, block_size=BLOCK_SIZE):
+        super().__init__(block_size)
+        self.exclusive = False # Limpa e sem cópia em outra cache (E; só no MESI)
+
+    @property
+    def state(self):
+        if not self.valid:
+            return STATE_I
+        if self.dirty:
+            return STATE_M
+        return STATE_E if self.exclusive else STATE_S
+
+class Bus:
+    """Barramento compartilhado: repassa cada transação para as outras caches e conta o tráfego"""
+    def __init__(self, protocol=COHERENCE_PROTOCOL):
+        if protocol not in (PROTOCOL_MSI, PROTOCOL_MESI):
+            raise ValueError(f"Protocolo de coerência desconhecido: {protocol}")
+        self.protocol = protocol
+        self.mesi = protocol == PROTOCOL_MESI
+        self.caches = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.reads = 0           # BusRd
+        self.read_exclusives = 0 # BusRdX
+        self.upgrades = 0        # BusUpgr
+        self.invalidations = 0   # Cópias invalidadas nas outras caches
+        self.interventions = 0   # Blocos M devolvidos à RAM a pedido de outro núcleo
+
+    def attach(self, cache):
+        if self.caches and cache.block_size != self.caches[0].block_size:
+            raise ValueError("Todas as caches do barramento precisam do mesmo tamanho de bloco")
+        self.caches.append(cache)
+
+    def fetch(self, requester, addr, exclusive):
+        """BusRd/BusRdX do bloco com 'addr'. Retorna True se outra cache tinha uma cópia"""
+        if exclusive:
+            self.read_exclusives += 1
+        else:
+            self.reads += 1
+        return self._snoop(requester, addr, exclusive)
+
+    def upgrade(self, requester, addr):
+        """BusUpgr: 'requester' vai escrever na sua cópia S; as outras somem"""
+        self.upgrades += 1
+        self._snoop(requester, addr, True)
+
+    def _snoop(self, requester, addr, invalidate):
+        shared = False
+        for cache in self.caches:
+            if cache is not requester and cache.snoop(addr, invalidate):
+                shared = True
+        return shared
+
+    @property
+    def transactions(self):
+        return self.reads + self.read_exclusives + self.upgrades
+
+    def stats(self):
+        """Contadores de tráfego de coerência (dicionário, pronto para JSON)"""
+        return {
+            'protocol': self.protocol, 'transactions': self.transactions,
+            'bus_rd': self.reads, 'bus_rdx': self.read_exclusives, 'bus_upgr': self.upgrades,
+            'invalidations': self.invalidations, 'interventions': self.interventions,
+        }
+
+class CoherentCache(Cache):
+    """
+    L1 privada de um núcleo, mantida coerente pelo 'bus' (ver o topo do módulo).
+    'main_memory' é a RAM compartilhada por todos os núcleos (sem L2).
+    stall_cycles() conta só o que ESTE núcleo esperou: a RAM é de todos, então o tempo
+    dela é medido em volta das faltas deste núcleo (inclusive o write-back que a falta
+    causou na cache de outro núcleo).
+    """
+    def __init__(self, main_memory, bus, lines=CACHE_SIZE, ways=CACHE_WAYS, block_size=BLOCK_SIZE,
+                 policy=CACHE_POLICY, name="L1", latency=CACHE_HIT_LATENCY):
+        super().__init__(main_memory, lines=lines, ways=ways, block_size=block_size, policy=policy,
+                         write_back=True, write_allocate=True, name=name, latency=latency)
+        self.sets = [[CoherentLine(block_size) for _ in range(ways)] for _ in range(self.num_sets)]
+        self.lines = [line for ways_list in self.sets for line in ways_list]
+        self.bus = bus
+        bus.attach(self)
+
+    def reset_stats(self):
+        super().reset_stats()
+        self.upgrades = 0      # Escritas em linha S (BusUpgr pedidos por esta cache)
+        self.invalidated = 0   # Linhas desta cache invalidadas por outro núcleo
+        self.interventions = 0 # Blocos M desta cache devolvidos a pedido de outro núcleo
+        self.memory_cycles = 0 # Ciclos de RAM esperados pelas faltas deste núcleo
+
+    def stats(self):
+        out = super().stats()
+        out.update(upgrades=self.upgrades, invalidated=self.invalidated,
+                   interventions=self.interventions, states=self.state_counts())
+        return out
+
+    def state_counts(self):
+        counts = dict.fromkeys((STATE_M, STATE_E, STATE_S, STATE_I), 0)
+        for line in self.lines:
+            counts[line.state] += 1
+        return counts
+
+    def stall_cycles(self):
+        return (self.hits + self.misses) * (self.latency - 1) + self.memory_cycles
+
+    def read(self, addr):
+        tag = addr >> self._tag_shift
+        index = (addr >> self._offset_bits) & self._index_mask
+
+        for line in self.sets[index]:
+            if line.valid and line.tag == tag:
+                self.read_hits += 1
+                self.last_access_status = "HIT"
+                if self.policy == POLICY_LRU:
+                    self._clock += 1
+                    line.stamp = self._clock
+                return line.data[addr & self._offset_mask]
+
+        self.read_misses += 1
+        self.last_access_status = "MISS"
+        return self._miss(addr, tag, index, False).data[addr & self._offset_mask]
+
+    def write(self, addr, value):
+        tag, index, offset = self._split_address(addr)
+        line = self._lookup(tag, index)
+        if line is not None:
+            self.write_hits += 1
+            self.last_access_status = "HIT"
+            self._touch(line)
+            if not line.dirty and not line.exclusive: # S -> M: as outras cópias precisam sumir
+                self.upgrades += 1
+                self.bus.upgrade(self, addr)
+                line.exclusive = self.bus.mesi # Depois de um flush volta a ser E, não S
+        else:
+            self.write_misses += 1
+            self.last_access_status = "MISS"
+            line = self._miss(addr, tag, index, True)
+        line.data[offset] = value & MASK_16BIT
+        line.dirty = True
+
+    def _miss(self, addr, tag, index, exclusive):
+        """BusRd/BusRdX e depois a carga do bloco (a RAM já está atualizada pelos snoops)"""
+        ram = self.ram
+        before = ram.busy_cycles
+        shared = self.bus.fetch(self, addr, exclusive)
+        line = self._fill(tag, index)
+        line.exclusive = self.bus.mesi and (exclusive or not shared)
+        self.memory_cycles += ram.busy_cycles - before
+        return line
+
+    def snoop(self, addr, invalidate):
+        """Transação de outro núcleo no bloco com 'addr'. Retorna True se esta cache tinha o bloco"""
+        line = self._lookup(*self._split_address(addr)[:2])
+        if line is None:
+            return False
+        if line.dirty: # M: a RAM recebe o bloco antes de quem pediu ler
+            index = (addr >> self._offset_bits) & self._index_mask
+            block_addr = ((line.tag << self._index_bits) | index) << self._offset_bits
+            self.ram.write_block(block_addr, line.data)
+            line.dirty = False
+            self.writebacks += 1
+            self.interventions += 1
+            self.bus.interventions += 1
+        line.exclusive = False
+        if invalidate:
+            line.valid = False
+            self.invalidated += 1
+            self.bus.invalidations += 1
+        return True
+
+    def clone(self, main_memory):
+        raise ValueError("Cache coerente não pode ser clonada (o barramento é de todos os núcleos)")
@@ -1,111 +1,262 @@
 # hardware/cpu.py
-from hardware.registers import Register, ReadOnlyRegister
-from hardware.memory import MainMemory, DirectMappingCache
+from array import array
+from collections import namedtuple
+from hardware.registers import RegisterFile, READ_ONLY
+from hardware.memory import MainMemory, MemoryMappedIO, build_cache
 from hardware.alu import ALU
-from software.microcode import CONTROL_STORE, decode_microinstruction, OPCODE_MAP
+from hardware.breakpoints import BreakpointHit, HIT_PC, HIT_MPC, HIT_OPCODE, HIT_READ, HIT_WRITE
+from hardware.trace import TRACE_OFF, TRACE_MICRO, TRACE_MEMORY, EV_INSTR, EV_UINST, EV_MEM_READ, EV_MEM_WRITE
+from software.microcode import (CONTROL_STORE, DECODED_STORE, OPCODE_MAP, decode_microinstruction,
+                                decode_control_store, MicroInstruction)
+from software.isa import OPCODES
+
+# Microinstrução "vazia" (MIR = 0), usada quando o MPC aponta para um endereço sem microcódigo
+EMPTY_UINST = MicroInstruction(**decode_microinstruction(0))
+
+# --- Motivos de Parada do run_until() ---
+STOP_BUDGET = "budget"          # Acabaram os ciclos permitidos
+STOP_HALT = "halt"              # Instrução "JUMP para ela mesma" (fim: JUMP fim)
+STOP_PC = "pc"                  # Chegou no PC pedido (início de instrução)
+STOP_MEM_WRITE = "mem_write"    # Escreveu num endereço vigiado
+STOP_BAD_OPCODE = "bad_opcode"  # Opcode sem rotina no OPCODE_MAP
+STOP_BAD_MPC = "bad_mpc"        # MPC aponta para endereço vazio do control store
+STOP_BREAKPOINT = "breakpoint"  # Breakpoint/watchpoint do cpu.breakpoints (detail = BreakpointHit)
+
+NO_POINTS = (frozenset(),) * 5 # Breakpoints "compilados" vazios (pcs, mpcs, opcodes, reads, writes)
+
+class RunResult(namedtuple('RunResult', 'reason cycles instructions detail stall_cycles')):
+    """
+    reason: um dos STOP_*; cycles/instructions: quanto rodou NESTA chamada;
+    detail: opcode, MPC ou endereço que causou a parada (None se não se aplica);
+    stall_cycles: ciclos parados esperando a memória (modelo de tempo da cache).
+    """
+    __slots__ = ()
+
+    @property
+    def total_cycles(self):
+        """Ciclos de clock: microinstruções + stalls de memória"""
+        return self.cycles + self.stall_cycles
+
+    @property
+    def cpi(self):
+        """Ciclos por instrução (0 se nenhuma instrução terminou)"""
+        return self.total_cycles / self.instructions if self.instructions else 0.0
+
+OP_JUMP = OPCODES['JUMP']
 
 class CPU:
-    def __init__(self):
+    def __init__(self, control_store=None, opcode_map=None):
+        # Microprograma: o padrão é o do software/microcode.py; dá para trocar por
+        # outro (ex: o otimizado pelo software/microcode_opt.py) com o seu OPCODE_MAP
+        if control_store is None:
+            self.control_store, self.decoded_store = CONTROL_STORE, DECODED_STORE
+        else:
+            self.control_store = control_store
+            self.decoded_store = decode_control_store(control_store)
+        self.opcode_map = OPCODE_MAP if opcode_map is None else opcode_map
+
         self.ram = MainMemory()
-        self.cache = DirectMappingCache(self.ram)
+        self.cache = build_cache(self.ram)
         self.alu = ALU()
-        
-        # Registradores (Com proteção de constantes)
-        self.regs = {
-            0: Register("None"), 
-            1: Register("PC"),
-            2: Register("IR"),
-            3: Register("SP"),
-            4: Register("AC"),
-            5: Register("MAR"),
-            6: Register("MBR"),
-            7: Register("TIR"),
-            # Constantes protegidas contra escrita acidental
-            8: ReadOnlyRegister("0", 0),
-            9: ReadOnlyRegister("+1", 1),
-            10: ReadOnlyRegister("-1", -1),
-            11: ReadOnlyRegister("AMASK", 0x0FFF),
-            12: ReadOnlyRegister("SMASK", 0x00FF),
-            # Uso geral
-            13: Register("A"),
-            14: Register("B"),
-            15: Register("C") 
-        }
-        
+        # E/S mapeada em memória (ver map_device). None = sem portas, sem custo nenhum
+        self.io = None
+
+        # Registradores: array de 16 posições (constantes 8-12 protegidas contra escrita)
+        # regs[i] / regs.by_name('PC') dão uma visão com read()/write() para a GUI
+        self.regs = RegisterFile()
+
         self.MPC = 0
         self.MIR = 0
         self.latch_a = 0
         self.latch_b = 0
         self.alu_result = 0
-        self.sub_cycle = 1 
+        self.sub_cycle = 1
+        self.cycles = 0 # Microinstruções completas executadas
+        self.instructions = 0 # Instruções (macro) concluídas
+        # "JUMP para ela mesma" já decodificado: vira STOP_HALT na próxima fronteira,
+        # mesmo que o run_until tenha acabado o orçamento no meio da instrução. É estado
+        # da máquina (entra no snapshot): com stop_on_halt=False só é consumido na fronteira
+        self.halting = False
+        # (STOP_BAD_MPC/STOP_BAD_OPCODE, detalhe) visto pelo último step(). Com MPC vazio o
+        # step() não anda (como o run_until); com opcode desconhecido volta ao MPC 0
+        self.fault = None
+
+        # Microinstrução atual já decodificada (preenchida no subciclo 1)
+        self.ctrl = EMPTY_UINST
+
+        # Trace opcional (hardware.trace.Tracer). None = sem custo nenhum
+        self.tracer = None
+        # Profiler opcional (hardware.profiler.Profiler). None = sem custo nenhum
+        self.profiler = None
+        # Breakpoints/watchpoints opcionais (hardware.breakpoints.Breakpoints). None ou vazio = sem custo
+        self.breakpoints = None
+        # Trace só dos acessos rd/wr (hardware.trace.MemoryTraceWriter). None = sem custo nenhum
+        self.memory_trace = None
+        # Busca antecipada (hardware.prefetch.InstructionFetchUnit, pede o microprograma sem
+        # busca). None = a busca é feita pelo microprograma, como sempre
+        self.prefetch = None
+        # Microprograma compilado (hardware.microcompiler.CompiledMicrocode). None = o run_until
+        # interpreta a tabela microinstrução por microinstrução
+        self.compiled = None
+
+        # Tabela usada pelo run(): escritas (enc) em registradores somente-leitura
+        # são removidas aqui, uma vez, em vez de checadas a cada ciclo
+        self._table = [self._fold_constants(u) for u in self.decoded_store]
+
+    def fork(self):
+        """
+        Outro CPU no MESMO estado (registradores, MPC, cache, contadores), com a RAM
+        compartilhada por páginas com cópia na escrita (MainMemory.fork): rodar mil
+        variações de uma imagem não monta nem copia o programa mil vezes.
+        O microprograma é compartilhado (só leitura). Trace, profiler e dispositivos
+        de E/S não são herdados (um fluxo de entrada não pode ser lido por dois).
+        Uso ideal: entre instruções (depois de um run_until).
+        """
+        child = CPU.__new__(CPU)
+        child.control_store = self.control_store
+        child.decoded_store = self.decoded_store
+        child.opcode_map = self.opcode_map
+        child._table = self._table
+        child.ram = self.ram.fork()
+        child.cache = self.cache.clone(child.ram)
+        child.alu = ALU()
+        child.alu.n_flag, child.alu.z_flag = self.alu.n_flag, self.alu.z_flag
+        child.io = None
+        child.regs = RegisterFile()
+        child.regs.values[:] = self.regs.values
+        child.MPC, child.MIR, child.ctrl = self.MPC, self.MIR, self.ctrl
+        child.latch_a, child.latch_b, child.alu_result = self.latch_a, self.latch_b, self.alu_result
+        child.sub_cycle = self.sub_cycle
+        child.cycles, child.instructions = self.cycles, self.instructions
+        child.halting = self.halting
+        child.tracer = None
+        child.profiler = None
+        child.breakpoints = None
+        child.memory_trace = None
+        child.prefetch = None
+        child.compiled = self.compiled # Mesmo microprograma: o laço compilado serve
+        return child
+
+    def map_device(self, device, base):
+        """
+        Liga um dispositivo de E/S (InputStream, OutputSink...) nos endereços
+        [base, base + device.size). Leituras/escritas nesses endereços não passam pela cache.
+        """
+        if self.io is None:
+            self.io = MemoryMappedIO(self.cache)
+        return self.io.map(device, base)
+
+    def _memory_port(self):
+        """Quem atende rd/wr: a cache, ou o decodificador de E/S na frente dela"""
+        return self.cache if self.io is None else self.io
+
+    def _fold_constants(self, u):
+        if u is not None and u.enc and u.c in READ_ONLY:
+            return u._replace(enc=0)
+        if u is not None and u.enc and u.c == 5:
+            # Escrever no MAR pelo barramento C é o mesmo que o bit 'mar' (já mascara 12 bits)
+            return u._replace(enc=0, mar=1)
+        return u
 
     def step(self):
-        print(f"--- Executando Subciclo {self.sub_cycle} (MPC: {self.MPC}) ---")
-        if self.sub_cycle == 1: self._subcycle_1_fetch()
+        self.fault = None
+        if self.sub_cycle == 1:
+            self._subcycle_1_fetch()
+            if self.fault is not None: return # MPC vazio: fica parado nele
         elif self.sub_cycle == 2: self._subcycle_2_decode_read()
         elif self.sub_cycle == 3: self._subcycle_3_alu()
-        elif self.sub_cycle == 4: self._subcycle_4_write_next()
+        elif self.sub_cycle == 4:
+            self._subcycle_4_write_next()
+            self.cycles += 1
         self.sub_cycle = (self.sub_cycle % 4) + 1
 
     def _subcycle_1_fetch(self):
-        if self.MPC in CONTROL_STORE:
-            self.MIR = CONTROL_STORE[self.MPC]
+        if self.MPC == 0 and self.prefetch is not None:
+            # A IFU entrega a instrução no MBR e incrementa o PC (a decodificação usa o MBR)
+            values = self.regs.values
+            values[6] = self.prefetch.take(values[1], values[2], self.cycles, self.prefetch.port_total)
+            values[1] = (values[1] + 1) & 0xFFFF
+        if self.MPC in self.control_store:
+            self.MIR = self.control_store[self.MPC]
+            self.ctrl = self.decoded_store[self.MPC]
         else:
-            print(f"ERRO CRÍTICO: MPC {self.MPC} vazio/inválido!")
-            self.MIR = 0 
+            self.fault = (STOP_BAD_MPC, self.MPC)
 
     def _subcycle_2_decode_read(self):
-        ctrl = decode_microinstruction(self.MIR)
-        self.latch_a = self.regs.get(ctrl['a'], Register("Zero")).read()
-        self.latch_b = self.regs.get(ctrl['b'], Register("Zero")).read()
+        ctrl = self.ctrl
+        values = self.regs.values
+        self.latch_a = values[ctrl.a]
+        self.latch_b = values[ctrl.b]
 
     def _subcycle_3_alu(self):
-        ctrl = decode_microinstruction(self.MIR)
-        if ctrl['amux'] == 1:
-            self.latch_a = self.regs[6].read() # MBR entra no lado A
-        
-        self.alu_result = self.alu.compute(self.latch_a, self.latch_b, ctrl['alu'], ctrl['sh'])
+        ctrl = self.ctrl
+        if ctrl.amux == 1:
+            self.latch_a = self.regs.values[6] # MBR entra no lado A
+
+        self.alu_result = self.alu.compute(self.latch_a, self.latch_b, ctrl.alu, ctrl.sh)
 
     def _subcycle_4_write_next(self):
-        ctrl = decode_microinstruction(self.MIR)
-        
+        ctrl = self.ctrl
+
         # 1. WRITE BACK (Registradores e Memória)
         # Grava nos registradores
-        if ctrl['mar']: self.regs[5].write(self.alu_result)
-        if ctrl['mbr']: self.regs[6].write(self.alu_result)
-        if ctrl['enc']:
-            dest = self.regs.get(ctrl['c'])
-            if dest: dest.write(self.alu_result)
+        regs = self.regs
+        values = regs.values
+        if ctrl.mar: values[5] = self.alu_result & 0x0FFF
+        if ctrl.mbr: values[6] = self.alu_result
+        if ctrl.enc: regs.write(ctrl.c, self.alu_result) # Ignora as constantes
 
         # Acesso à Memória (Realizado após atualizar MAR/MBR)
-        if ctrl['rd']:
-            # Lê da Cache usando o endereço que está no MAR
-            data = self.cache.read(self.regs[5].read())
-            self.regs[6].write(data) # Joga no MBR
-            
-        if ctrl['wr']:
-            # Escreve na Cache o dado do MBR no endereço do MAR
-            self.cache.write(self.regs[5].read(), self.regs[6].read())
+        tracer = self.tracer
+        bp = self.breakpoints
+        memory_trace = self.memory_trace
+        ifu = self.prefetch
+        if ifu is not None and (ctrl.rd or ctrl.wr):
+            ifu.port_total += 1
+        if ctrl.rd:
+            # Lê da Cache (ou da porta de E/S) usando o endereço que está no MAR
+            data = self._memory_port().read(values[5])
+            values[6] = data # Joga no MBR
+            if memory_trace is not None:
+                memory_trace.record(self.cycles, values[5], 0)
+            if tracer and tracer.level >= TRACE_MEMORY:
+                tracer.emit(EV_MEM_READ, self.cycles, values[5], data,
+                            self.cache.last_access_status == "HIT")
+            if bp is not None and values[5] in bp.reads and bp.pending is None:
+                bp.pending = BreakpointHit(HIT_READ, values[5], self.cycles)
+
+        if ctrl.wr:
+            # Escreve na Cache (ou na porta de E/S) o dado do MBR no endereço do MAR
+            self._memory_port().write(values[5], values[6])
+            if ifu is not None:
+                ifu.written(values[5])
+            if memory_trace is not None:
+                memory_trace.record(self.cycles, values[5], 1)
+            if tracer and tracer.level >= TRACE_MEMORY:
+                tracer.emit(EV_MEM_WRITE, self.cycles, values[5], values[6],
+                            self.cache.last_access_status == "HIT")
+            if bp is not None and values[5] in bp.writes and bp.pending is None:
+                bp.pending = BreakpointHit(HIT_WRITE, values[5], self.cycles)
 
         # 2. NEXT ADDRESS (Lógica de Branching JAM)
-        cond = ctrl['cond']
-        next_addr = ctrl['addr']
-        
+        cond = ctrl.cond
+        next_addr = ctrl.addr
+
         # O bit alto (256) é ativado se a condição for verdadeira
         high_bit = 0
-        
+
         if cond == 0: # Sem pulo condicional
             high_bit = 0
-            
+
         elif cond == 1: # JAM N (Pula se Negativo)
             if self.alu.n_flag: high_bit = 0x100
-            
+
         elif cond == 2: # JAM Z (Pula se Zero)
             if self.alu.z_flag: high_bit = 0x100
-            
+
         elif cond == 3: # JAM JUMP (Decodificação de Instrução)
-            ir = self.regs[2].read()
-            
+            ir = values[2]
+
             # Lógica para instruções normais e estendidas (0xF...)
             if (ir & 0xF000) == 0xF000:
                 # Instruções estendidas usam os 8 bits superiores (ex: F400)
@@ -113,15 +264,471 @@ class CPU:
             else:
                 # Instruções normais usam os 4 bits superiores
                 opcode = ir & 0xF000
-            
-            if opcode in OPCODE_MAP:
-                self.MPC = OPCODE_MAP[opcode]
-                print(f"[DECODE] IR={ir:04X} -> Opcode {opcode:04X} -> Salto para MPC {self.MPC}")
-                return # Sai pois já definimos o MPC via mapa
+
+            if opcode in self.opcode_map:
+                next_mpc = self.opcode_map[opcode]
+                if tracer and tracer.level > TRACE_OFF:
+                    tracer.emit(EV_INSTR, self.cycles, (values[1] - 1) & 0xFFFF, ir, next_mpc)
+                if self.profiler:
+                    self.profiler.record_decode(values[1] - 1, opcode)
+                if bp is not None and opcode in bp.opcodes:
+                    bp.hit = BreakpointHit(HIT_OPCODE, opcode, self.cycles)
+                if opcode == OP_JUMP and (ir & 0x0FFF) == values[1] - 1:
+                    self.halting = True
+            else:
+                self.fault = (STOP_BAD_OPCODE, opcode)
+                next_mpc = 0
+
+        if cond != 3:
+            # Combina o endereço base com o bit alto (JAM)
+            next_mpc = next_addr | high_bit
+            if next_mpc == 0: self.instructions += 1 # Rotina terminou
+
+        if tracer and tracer.level >= TRACE_MICRO:
+            tracer.emit(EV_UINST, self.cycles, self.MPC, self.alu_result, next_mpc)
+        if self.profiler:
+            self.profiler.record_uinst(self.MPC, cond, next_mpc)
+            if next_mpc == 0:
+                self.profiler.record_boundary(self.cycles + 1)
+        if bp is not None:
+            if next_mpc == 0 and bp.pending is not None:
+                # Watchpoint: a parada vale no fim da instrução que fez o acesso
+                bp.hit, bp.pending = bp.pending, None
+            elif next_mpc == 0 and values[1] in bp.pcs:
+                bp.hit = BreakpointHit(HIT_PC, values[1], self.cycles + 1)
+            elif next_mpc in bp.mpcs:
+                bp.hit = BreakpointHit(HIT_MPC, next_mpc, self.cycles + 1)
+        self.MPC = next_mpc
+
+    # --- Execução Rápida (Microinstrução Inteira por Iteração) ---
+
+    def run(self, max_cycles):
+        """
+        Executa max_cycles microinstruções completas (os 4 subciclos de uma vez).
+        Mesmo resultado que chamar step() 4x por ciclo, mas sem o custo de despachar
+        cada subciclo. Só para antes se encontrar um opcode/MPC inválido.
+        Retorna um RunResult.
+        """
+        return self.run_until(max_cycles, stop_on_halt=False)
+
+    def run_until(self, max_cycles, pc=None, write_addr=None, stop_on_halt=True):
+        """
+        Executa até alguma condição de parada (ver STOP_*):
+          - max_cycles: orçamento de microinstruções;
+          - pc: para no início da instrução (MPC = 0) com PC == pc;
+          - write_addr: endereço (ou coleção de endereços) cuja escrita para a CPU,
+            logo após a microinstrução que fez o 'wr';
+          - stop_on_halt: para quando a CPU termina um "JUMP para ela mesma".
+        Opcode desconhecido e MPC vazio sempre param (em vez de voltar ao MPC 0).
+        Com cpu.breakpoints ligado, para também com STOP_BREAKPOINT (ver Breakpoints).
+        Retorna um RunResult com o motivo, ciclos e instruções desta chamada.
+        """
+        if write_addr is None:
+            watch = None
+        elif isinstance(write_addr, int):
+            watch = {write_addr}
+        else:
+            watch = set(write_addr)
+
+        start_cycles = self.cycles
+        start_instr = self.instructions
+        start_stalls = self.stall_cycles()
+        reason, detail = STOP_BUDGET, None
+
+        # Se paramos no meio de uma microinstrução (via step), termina ela primeiro
+        self.fault = None
+        while self.sub_cycle != 1 and self.cycles - start_cycles < max_cycles:
+            self.step()
+        if self.fault is not None: # Opcode desconhecido no fim dessa microinstrução
+            reason, detail = self.fault
+
+        limit = max_cycles - (self.cycles - start_cycles)
+        if limit > 0 and reason == STOP_BUDGET:
+            # Dois laços: o rápido não tem NENHUM teste de trace/profiler/breakpoint dentro dele
+            tracer = self.tracer
+            points = self.breakpoints.compiled() if self.breakpoints else None
+            if ((tracer is not None and tracer.level > TRACE_OFF) or self.profiler is not None
+                    or points is not None or self.memory_trace is not None or self.prefetch is not None):
+                reason, detail = self._loop_instrumented(limit, pc, watch, stop_on_halt, points)
+            elif self.compiled is not None and watch is None:
+                reason, detail = self._loop_compiled(limit, pc, stop_on_halt)
+            else:
+                reason, detail = self._loop(limit, pc, watch, stop_on_halt)
+            if reason == STOP_BREAKPOINT:
+                self.breakpoints.hit = detail
+
+        return RunResult(reason, self.cycles - start_cycles, self.instructions - start_instr, detail,
+                         self.stall_cycles() - start_stalls)
+
+    def stall_cycles(self):
+        """Ciclos parados esperando a memória (com a IFU, só a parte da busca que a CPU esperou)"""
+        stalls = self.cache.stall_cycles()
+        if self.prefetch is not None:
+            stalls += self.prefetch.stall_delta
+        return stalls
+
+    def timing_stats(self):
+        """Contadores acumulados do modelo de tempo (desde a criação da CPU)"""
+        stalls = self.stall_cycles()
+        total = self.cycles + stalls
+        return {
+            'micro_cycles': self.cycles,
+            'stall_cycles': stalls,
+            'total_cycles': total,
+            'instructions': self.instructions,
+            'cpi': total / self.instructions if self.instructions else 0.0,
+        }
+
+    def _loop(self, limit, stop_pc, watch, stop_on_halt):
+        # Estado "puxado" para variáveis locais (acesso muito mais barato no laço)
+        r = self.regs.values.tolist() # Lista é mais rápida que o array no laço
+        table = self._table
+        opcode_map = self.opcode_map
+        memory = self._memory_port()
+        cache_read = memory.read
+        cache_write = memory.write
+        mpc = self.MPC
+        u = self.ctrl
+        la = self.latch_a
+        lb = self.latch_b
+        res = self.alu_result
+        cur = mpc
+        halting = self.halting
+        retired = 0
+        n = 0
+        reason, detail = STOP_BUDGET, None
+
+        while n < limit:
+            if mpc == 0:
+                # Fronteira de instrução: checa as paradas "de instrução"
+                if halting:
+                    # O "JUMP fim" terminou: vale uma vez só, mesmo sem stop_on_halt
+                    halting = False
+                    if stop_on_halt:
+                        reason, detail = STOP_HALT, r[1]
+                        break
+                if r[1] == stop_pc:
+                    reason, detail = STOP_PC, stop_pc
+                    break
+
+            # Subciclo 1: Busca
+            u = table[mpc]
+            if u is None:
+                reason, detail = STOP_BAD_MPC, mpc
+                break
+            cur = mpc
+            addr, a, b, c, enc, wr, rd, mar, mbr, sh, alu, cond, amux = u
+
+            # Subciclo 2: Leitura dos latches
+            la = r[a]
+            lb = r[b]
+
+            # Subciclo 3: ULA + Deslocador
+            if amux:
+                la = r[6]
+            if alu == 0:
+                res = (la + lb) & 0xFFFF
+            elif alu == 1:
+                res = la & lb
+            elif alu == 2:
+                res = la
+            else:
+                res = ~la & 0xFFFF
+            if sh == 1:
+                res = (res >> 1) | (res & 0x8000)
+            elif sh == 2:
+                res = (res << 8) & 0xFFFF
+
+            # Subciclo 4: Write back + Memória + Próximo endereço
+            if mar: r[5] = res & 0x0FFF
+            if mbr: r[6] = res
+            if enc: r[c] = res
+            if rd: r[6] = cache_read(r[5])
+            n += 1
+            if wr:
+                cache_write(r[5], r[6])
+                if watch and r[5] in watch:
+                    reason, detail = STOP_MEM_WRITE, r[5]
+                    mpc = self._next_mpc(u, res, r)
+                    if mpc == 0 and cond != 3: retired += 1
+                    break
+
+            if cond == 0:
+                mpc = addr
+                if not addr: retired += 1
+            elif cond == 1:
+                mpc = (addr | 0x100) if res & 0x8000 else addr
+                if not mpc: retired += 1 # Desvio direto para a busca (ex: microcódigo otimizado)
+            elif cond == 2:
+                mpc = addr if res else (addr | 0x100)
+                if not mpc: retired += 1
+            else:
+                ir = r[2]
+                opcode = ir & 0xFF00 if (ir & 0xF000) == 0xF000 else ir & 0xF000
+                mpc = opcode_map.get(opcode)
+                if mpc is None:
+                    reason, detail = STOP_BAD_OPCODE, opcode
+                    mpc = 0
+                    break
+                if opcode == OP_JUMP and (ir & 0x0FFF) == r[1] - 1:
+                    halting = True
+
+        self.halting = halting
+        self._store_state(r, mpc, cur, u, la, lb, res, n, retired)
+        return reason, detail
+
+    def _loop_compiled(self, limit, stop_pc, stop_on_halt):
+        """
+        Laço gerado pelo hardware.microcompiler (instruções inteiras). O _loop termina a
+        instrução que estiver no meio e faz o fim do orçamento; com validate=True, uma
+        cópia (fork) roda o _loop e as duas são comparadas.
+        """
+        compiled = self.compiled
+        if compiled.table is not self._table and compiled.table != self._table:
+            raise ValueError("cpu.compiled foi feito para outro microprograma")
+        shadow = None
+        if compiled.validate:
+            if self.io is not None:
+                raise ValueError("A validação do microcódigo compilado não funciona com E/S mapeada")
+            shadow = self.fork()
+
+        start = self.cycles
+        reason, detail = STOP_BUDGET, None
+        while self.MPC != 0 and self.cycles - start < limit:
+            reason, detail = self._loop(1, stop_pc, None, stop_on_halt)
+            if reason != STOP_BUDGET:
+                break
+        else:
+            remaining = limit - (self.cycles - start)
+            if remaining > 0:
+                r = self.regs.values.tolist()
+                memory = self._memory_port()
+                (reason, detail, mpc, n, retired, self.halting, cur, la, lb, res) = compiled.kernel(
+                    r, remaining, stop_pc, stop_on_halt, self.halting,
+                    memory.read, memory.write, 0, self.latch_a, self.latch_b, self.alu_result)
+                self._store_state(r, mpc, cur, self._table[cur], la, lb, res, n, retired)
+                if reason is None: # Menos ciclos que a instrução mais longa: o resto é interpretado
+                    reason, detail = self._loop(remaining - n, stop_pc, None, stop_on_halt)
+
+        if shadow is not None:
+            compiled.check(self, shadow, (reason, detail),
+                           shadow._loop(limit, stop_pc, None, stop_on_halt))
+        return reason, detail
+
+    def _loop_instrumented(self, limit, stop_pc, watch, stop_on_halt, points=None):
+        """
+        Mesmo laço do _loop, mais o trace, o profiler, os breakpoints, o trace de memória
+        e/ou a IFU (só os que estiverem ligados). 'points' = Breakpoints.compiled(). Breakpoints de PC/MPC não
+        disparam na primeira iteração: continuar de uma parada sai do lugar.
+        """
+        r = self.regs.values.tolist() # Lista é mais rápida que o array no laço
+        table = self._table
+        opcode_map = self.opcode_map
+        cache = self.cache
+        memory = self._memory_port()
+        cache_read = memory.read
+        cache_write = memory.write
+
+        tracer = self.tracer
+        tracing = tracer is not None and tracer.level > TRACE_OFF
+        emit = tracer.sink.write if tracing else None
+        trace_micro = tracing and tracer.level >= TRACE_MICRO
+        trace_mem = tracing and tracer.level >= TRACE_MEMORY
+        mem_record = self.memory_trace.record if self.memory_trace is not None else None
+        ifu = self.prefetch
+        ifu_take = ifu.take if ifu is not None else None
+        port = ifu.port_total if ifu is not None else 0 # rd/wr feitos (a IFU usa os ciclos livres)
+
+        profiler = self.profiler
+        profiling = profiler is not None
+        if profiling:
+            mpc_counts = profiler.mpc_counts
+            pc_counts = profiler.pc_counts
+            op_counts = profiler.op_counts
+            branch_taken = profiler.branch_taken
+            branch_not_taken = profiler.branch_not_taken
+            op_cycles = profiler.op_cycles
+            cur_op = profiler.current_opcode
+            op_start = profiler.current_start if cur_op is not None else self.cycles
+
+        bp_pcs, bp_mpcs, bp_ops, watch_read, watch_write = points or NO_POINTS
+        stop = None      # (motivo, detalhe) a aplicar quando a microinstrução atual terminar
+        watch_hit = None # Watchpoint: vale quando a instrução atual terminar (MPC = 0)
+
+        base = self.cycles
+        mpc = self.MPC
+        u = self.ctrl
+        la = self.latch_a
+        lb = self.latch_b
+        res = self.alu_result
+        cur = mpc
+        halting = self.halting
+        retired = 0
+        n = 0
+        reason, detail = STOP_BUDGET, None
+
+        while n < limit:
+            if mpc == 0:
+                if profiling:
+                    # Fronteira: fecha os ciclos da instrução que acabou
+                    if cur_op is not None:
+                        op_cycles[cur_op] = op_cycles.get(cur_op, 0) + base + n - op_start
+                    op_start = base + n
+                if halting:
+                    # O "JUMP fim" terminou: vale uma vez só, mesmo sem stop_on_halt
+                    halting = False
+                    if stop_on_halt:
+                        reason, detail = STOP_HALT, r[1]
+                        break
+                if r[1] == stop_pc:
+                    reason, detail = STOP_PC, stop_pc
+                    break
+                if watch_hit is not None:
+                    reason, detail = STOP_BREAKPOINT, watch_hit
+                    break
+                if bp_pcs and n and r[1] in bp_pcs:
+                    reason, detail = STOP_BREAKPOINT, BreakpointHit(HIT_PC, r[1], base + n)
+                    break
+            if bp_mpcs and n and mpc in bp_mpcs:
+                reason, detail = STOP_BREAKPOINT, BreakpointHit(HIT_MPC, mpc, base + n)
+                break
+            if mpc == 0 and ifu_take is not None:
+                r[6] = ifu_take(r[1], r[2], base + n, port)
+                r[1] = (r[1] + 1) & 0xFFFF
+
+            u = table[mpc]
+            if u is None:
+                reason, detail = STOP_BAD_MPC, mpc
+                break
+            cur = mpc
+            addr, a, b, c, enc, wr, rd, mar, mbr, sh, alu, cond, amux = u
+
+            la = r[a]
+            lb = r[b]
+
+            if amux:
+                la = r[6]
+            if alu == 0:
+                res = (la + lb) & 0xFFFF
+            elif alu == 1:
+                res = la & lb
+            elif alu == 2:
+                res = la
             else:
-                print(f"[ERRO] Opcode desconhecido: {opcode:04X}")
-                self.MPC = 0
-                return
+                res = ~la & 0xFFFF
+            if sh == 1:
+                res = (res >> 1) | (res & 0x8000)
+            elif sh == 2:
+                res = (res << 8) & 0xFFFF
+
+            if mar: r[5] = res & 0x0FFF
+            if mbr: r[6] = res
+            if enc: r[c] = res
+            if rd:
+                r[6] = cache_read(r[5])
+                port += 1
+                if mem_record is not None:
+                    mem_record(base + n, r[5], 0)
+                if trace_mem:
+                    emit(EV_MEM_READ, base + n, r[5], r[6], cache.last_access_status == "HIT")
+                if watch_read and r[5] in watch_read and watch_hit is None:
+                    watch_hit = BreakpointHit(HIT_READ, r[5], base + n)
+            if wr:
+                cache_write(r[5], r[6])
+                port += 1
+                if ifu is not None:
+                    ifu.written(r[5])
+                if mem_record is not None:
+                    mem_record(base + n, r[5], 1)
+                if trace_mem:
+                    emit(EV_MEM_WRITE, base + n, r[5], r[6], cache.last_access_status == "HIT")
+                if watch and r[5] in watch:
+                    stop = STOP_MEM_WRITE, r[5]
+                elif watch_write and r[5] in watch_write and watch_hit is None:
+                    watch_hit = BreakpointHit(HIT_WRITE, r[5], base + n)
+
+            if profiling:
+                mpc_counts[cur] += 1
+            if cond == 0:
+                mpc = addr
+                if not addr: retired += 1
+            elif cond == 1:
+                if res & 0x8000:
+                    mpc = addr | 0x100
+                    if profiling: branch_taken[cur] += 1
+                else:
+                    mpc = addr
+                    if profiling: branch_not_taken[cur] += 1
+                if not mpc: retired += 1
+            elif cond == 2:
+                if res:
+                    mpc = addr
+                    if profiling: branch_not_taken[cur] += 1
+                else:
+                    mpc = addr | 0x100
+                    if profiling: branch_taken[cur] += 1
+                if not mpc: retired += 1
+            else:
+                ir = r[2]
+                opcode = ir & 0xFF00 if (ir & 0xF000) == 0xF000 else ir & 0xF000
+                mpc = opcode_map.get(opcode)
+                if mpc is None:
+                    reason, detail = STOP_BAD_OPCODE, opcode
+                    mpc = 0
+                    if trace_micro:
+                        emit(EV_UINST, base + n, cur, res, mpc)
+                    n += 1
+                    break
+                if tracing:
+                    emit(EV_INSTR, base + n, (r[1] - 1) & 0xFFFF, ir, mpc)
+                if profiling:
+                    cur_op = opcode
+                    pc_counts[(r[1] - 1) & 0x0FFF] += 1
+                    op_counts[opcode] = op_counts.get(opcode, 0) + 1
+                if opcode == OP_JUMP and (ir & 0x0FFF) == r[1] - 1:
+                    halting = True # O "JUMP fim" final vira halt, não breakpoint de opcode
+                elif bp_ops and opcode in bp_ops:
+                    stop = STOP_BREAKPOINT, BreakpointHit(HIT_OPCODE, opcode, base + n)
+            if trace_micro:
+                emit(EV_UINST, base + n, cur, res, mpc)
+            n += 1
+            if stop is not None:
+                reason, detail = stop
+                break
+
+        if watch_hit is not None and reason == STOP_BUDGET:
+            reason, detail = STOP_BREAKPOINT, watch_hit # Acabou o orçamento no meio da instrução
+        if profiling:
+            profiler.current_opcode = cur_op
+            profiler.current_start = op_start
+        if ifu is not None:
+            ifu.port_total = port
+        self.halting = halting
+        self._store_state(r, mpc, cur, u, la, lb, res, n, retired)
+        return reason, detail
+
+    def _next_mpc(self, u, res, r):
+        """Próximo MPC fora do laço (usado quando o laço para logo após um 'wr')"""
+        if u.cond == 0:
+            return u.addr
+        if u.cond == 1:
+            return (u.addr | 0x100) if res & 0x8000 else u.addr
+        if u.cond == 2:
+            return u.addr if res else (u.addr | 0x100)
+        ir = r[2]
+        return self.opcode_map.get(ir & 0xFF00 if (ir & 0xF000) == 0xF000 else ir & 0xF000, 0)
 
-        # Combina o endereço base com o bit alto (JAM)
-        self.MPC = next_addr | high_bit
\ No newline at end of file
+    def _store_state(self, r, mpc, cur, u, la, lb, res, n, retired):
+        """Devolve o estado local dos laços para os objetos (GUI/depuração enxergam o mesmo que no step)"""
+        self.regs.values[:] = array('H', r) # Os laços nunca escrevem nas constantes
+        if n:
+            self.MIR = self.control_store.get(cur, 0)
+            self.ctrl = u
+            self.latch_a = la
+            self.latch_b = lb
+            self.alu_result = res
+            self.alu.z_flag = (res == 0)
+            self.alu.n_flag = (res & 0x8000) != 0
+        self.MPC = mpc
+        self.cycles += n
+        self.instructions += retired
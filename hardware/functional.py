@@ -0,0 +1,277 @@
+# hardware/functional.py
+"""
+Simulador FUNCIONAL da ISA MAC-1: executa uma instrução por iteração direto sobre
+AC/PC/SP e a RAM, sem microcódigo, sem subciclos e sem cache. Serve para:
+  - avançar rápido até a região de interesse e trocar para o CPU detalhado (e voltar);
+  - amostragem: trechos funcionais intercalados com janelas detalhadas (sampled_run);
+  - oráculo do microcódigo: differential_run compara os dois instrução a instrução.
+Convenções iguais às do microcódigo: registradores de 16 bits, endereços de 12 bits.
+"""
+from collections import namedtuple
+from hardware.cpu import STOP_BUDGET, STOP_HALT, STOP_PC, STOP_BAD_OPCODE
+from hardware.memory import MainMemory
+from software.isa import OPCODES
+
+OP_JUMP = OPCODES['JUMP']
+STOP_DIVERGED = "diverged" # Modo diferencial: microcódigo e ISA discordaram
+
+FunctionalResult = namedtuple('FunctionalResult', 'reason instructions detail')
+
+# Quais registradores são "arquiteturais" (os que a ISA enxerga)
+PC, IR, SP, AC = 1, 2, 3, 4
+
+class FunctionalCPU:
+    def __init__(self, ram=None):
+        self.ram = ram if ram is not None else MainMemory()
+        self.pc = 0
+        self.ac = 0
+        self.sp = 0
+        self.ir = 0
+        self.instructions = 0
+
+    # --- Troca de estado com o CPU microprogramado ---
+
+    @classmethod
+    def from_cpu(cls, cpu, share_memory=True):
+        """
+        Cria o simulador funcional a partir do CPU (que deve estar entre instruções).
+        share_memory=True usa a MESMA RAM (a cache é descarregada antes);
+        False trabalha numa cópia (o CPU não é afetado).
+        """
+        functional = cls(cpu.ram if share_memory else MainMemory())
+        functional.load_from(cpu, copy_memory=not share_memory)
+        return functional
+
+    def load_from(self, cpu, copy_memory=False):
+        _require_boundary(cpu)
+        if cpu.io is not None:
+            # O modo funcional lê a RAM direto: as portas de E/S virariam memória comum
+            raise ValueError("E/S mapeada em memória não é suportada no modo funcional")
+        cpu.cache.flush() # Blocos sujos da cache descem para a RAM
+        values = cpu.regs.values
+        self.pc, self.ir, self.sp, self.ac = values[PC], values[IR], values[SP], values[AC]
+        self.instructions = cpu.instructions
+        if copy_memory:
+            self.ram._view[:] = cpu.ram._view
+
+    def store_to(self, cpu):
+        """
+        Devolve o estado para o CPU (no início de uma instrução). Se a RAM não for a
+        mesma, ela é copiada; em qualquer caso a cache é invalidada (ficou velha).
+        """
+        _require_boundary(cpu)
+        if cpu.ram is not self.ram:
+            cpu.ram._view[:] = self.ram._view
+        cpu.cache.invalidate()
+        regs = cpu.regs
+        regs.write(PC, self.pc)
+        regs.write(IR, self.ir)
+        regs.write(SP, self.sp)
+        regs.write(AC, self.ac)
+        cpu.instructions = self.instructions
+        cpu.halting = False # O "JUMP fim" visto pelo CPU ficou para trás
+
+    # --- Execução ---
+
+    def run(self, max_instructions, pc=None, stop_on_halt=True):
+        """
+        Executa até max_instructions instruções (mesmos motivos de parada do CPU.run_until:
+        halt = "JUMP para ela mesma", pc = início da instrução no endereço pedido).
+        """
+        mem = self.ram._data
+        pc_reg, ac, sp, ir = self.pc, self.ac, self.sp, self.ir
+        n = 0
+        reason, detail = STOP_BUDGET, None
+
+        while n < max_instructions:
+            if pc_reg == pc:
+                reason, detail = STOP_PC, pc
+                break
+            addr = pc_reg & 0x0FFF
+            ir = mem[addr]
+            pc_reg = (pc_reg + 1) & 0xFFFF
+            x = ir & 0x0FFF
+            top = ir >> 12
+            n += 1
+
+            if top == 0x0:   # LODD
+                ac = mem[x]
+            elif top == 0x1: # STOD
+                mem[x] = ac
+            elif top == 0x2: # ADDD
+                ac = (ac + mem[x]) & 0xFFFF
+            elif top == 0x3: # SUBD
+                ac = (ac - mem[x]) & 0xFFFF
+            elif top == 0x4: # JPOS
+                if not ac & 0x8000: pc_reg = x
+            elif top == 0x5: # JZER
+                if ac == 0: pc_reg = x
+            elif top == 0x6: # JUMP
+                pc_reg = x
+                if stop_on_halt and x == addr:
+                    reason, detail = STOP_HALT, pc_reg
+                    break
+            elif top == 0x7: # LOCO
+                ac = x
+            elif top == 0x8: # LODL
+                ac = mem[(sp + x) & 0x0FFF]
+            elif top == 0x9: # STOL
+                mem[(sp + x) & 0x0FFF] = ac
+            elif top == 0xA: # ADDL
+                ac = (ac + mem[(sp + x) & 0x0FFF]) & 0xFFFF
+            elif top == 0xB: # SUBL
+                ac = (ac - mem[(sp + x) & 0x0FFF]) & 0xFFFF
+            elif top == 0xC: # JNEG
+                if ac & 0x8000: pc_reg = x
+            elif top == 0xD: # JNZE
+                if ac: pc_reg = x
+            elif top == 0xE: # CALL
+                sp = (sp - 1) & 0xFFFF
+                mem[sp & 0x0FFF] = pc_reg
+                pc_reg = x
+            else:
+                op = ir >> 8
+                y = ir & 0x00FF
+                if op == 0xF0:   # PSHI
+                    sp = (sp - 1) & 0xFFFF
+                    mem[sp & 0x0FFF] = mem[ac & 0x0FFF]
+                elif op == 0xF2: # POPI
+                    mem[ac & 0x0FFF] = mem[sp & 0x0FFF]
+                    sp = (sp + 1) & 0xFFFF
+                elif op == 0xF4: # PUSH
+                    sp = (sp - 1) & 0xFFFF
+                    mem[sp & 0x0FFF] = ac
+                elif op == 0xF6: # POP
+                    ac = mem[sp & 0x0FFF]
+                    sp = (sp + 1) & 0xFFFF
+                elif op == 0xF8: # RETN
+                    pc_reg = mem[sp & 0x0FFF]
+                    sp = (sp + 1) & 0xFFFF
+                elif op == 0xFA: # SWAP
+                    ac, sp = sp, ac
+                elif op == 0xFC: # INSP
+                    sp = (sp + y) & 0xFFFF
+                elif op == 0xFE: # DESP
+                    sp = (sp - y) & 0xFFFF
+                else:
+                    reason, detail = STOP_BAD_OPCODE, ir & 0xFF00
+                    n -= 1 # Igual ao CPU: o PC avança, mas a instrução não conta
+                    break
+
+        self.pc, self.ac, self.sp, self.ir = pc_reg, ac, sp, ir
+        self.instructions += n
+        return FunctionalResult(reason, n, detail)
+
+    def step(self):
+        """Executa uma instrução"""
+        return self.run(1, stop_on_halt=False)
+
+def _require_boundary(cpu):
+    if cpu.MPC != 0 or cpu.sub_cycle != 1:
+        raise ValueError("A troca de estado só pode acontecer entre instruções (MPC = 0)")
+
+def run_instruction(cpu):
+    """
+    Roda o CPU detalhado até terminar UMA instrução. Retorna (motivo, ciclos):
+    STOP_HALT se ela foi um "JUMP para ela mesma", STOP_BAD_OPCODE se não tem microcódigo.
+    """
+    start = cpu.cycles
+    pc = cpu.regs.values[PC]
+    result = cpu.run_until(1, stop_on_halt=False)
+    while cpu.MPC != 0 and result.reason == STOP_BUDGET:
+        result = cpu.run_until(1, stop_on_halt=False)
+    ir = cpu.regs.values[IR]
+    if result.reason == STOP_BUDGET and (ir & 0xF000) == OP_JUMP and (ir & 0x0FFF) == (pc & 0x0FFF):
+        return STOP_HALT, cpu.cycles - start
+    return result.reason, cpu.cycles - start
+
+# --- Amostragem (avanço rápido + janelas detalhadas) ---
+
+SampledResult = namedtuple('SampledResult',
+                           'reason instructions detailed_instructions detailed_cycles '
+                           'stall_cycles estimated_cycles')
+
+def sampled_run(cpu, max_instructions, interval=10_000, detail=1_000, warmup=100):
+    """
+    A cada 'interval' instruções: roda 'interval - detail - warmup' no modo funcional e o
+    resto no CPU detalhado ('warmup' aquece a cache sem ser medido, 'detail' é medido).
+    O CPI medido nas janelas estima os ciclos do programa inteiro.
+    O CPU termina no estado final (entre instruções).
+    """
+    if detail + warmup > interval:
+        raise ValueError("detail + warmup não cabem no intervalo")
+    functional = FunctionalCPU.from_cpu(cpu)
+    done = measured = cycles = stalls = 0
+    reason = STOP_BUDGET
+
+    while done < max_instructions and reason == STOP_BUDGET:
+        fast = min(interval - detail - warmup, max_instructions - done)
+        result = functional.run(fast)
+        done += result.instructions
+        reason = result.reason
+        functional.store_to(cpu)
+        if reason != STOP_BUDGET or done >= max_instructions:
+            break
+
+        # Janela detalhada (aquecimento + medição), instrução por instrução para não passar do limite
+        window = min(warmup + detail, max_instructions - done)
+        cycle_mark = stall_mark = None
+        for i in range(window):
+            if i == warmup:
+                cycle_mark, stall_mark = cpu.cycles, cpu.stall_cycles()
+            reason, _ = run_instruction(cpu)
+            if reason == STOP_BAD_OPCODE:
+                break
+            done += 1
+            if i >= warmup:
+                measured += 1
+            if reason != STOP_BUDGET:
+                break
+        if cycle_mark is not None:
+            cycles += cpu.cycles - cycle_mark
+            stalls += cpu.stall_cycles() - stall_mark
+        if reason == STOP_BUDGET and done < max_instructions:
+            functional.load_from(cpu)
+
+    cpi = (cycles + stalls) / measured if measured else 0.0
+    return SampledResult(reason, done, measured, cycles, stalls, round(cpi * done))
+
+# --- Modo Diferencial (oráculo do microcódigo) ---
+
+Divergence = namedtuple('Divergence', 'instruction pc ir field expected actual')
+
+def differential_run(cpu, max_instructions):
+    """
+    Roda o CPU detalhado e o funcional (numa cópia da RAM) lado a lado, uma instrução
+    por vez, comparando PC/AC/SP e a RAM inteira depois de cada instrução.
+    Retorna (FunctionalResult, Divergence ou None) — para na primeira divergência.
+    """
+    oracle = FunctionalCPU.from_cpu(cpu, share_memory=False)
+    for n in range(max_instructions):
+        pc = oracle.pc
+        ir = oracle.ram._data[pc & 0x0FFF]
+        expected = oracle.step()
+        reason, _ = run_instruction(cpu)
+
+        if reason == STOP_BAD_OPCODE and expected.reason != STOP_BAD_OPCODE:
+            return (FunctionalResult(STOP_DIVERGED, n, pc),
+                    Divergence(n, pc, ir, 'opcode', 'implementado', 'sem microcódigo'))
+        if expected.reason != STOP_BUDGET:
+            return FunctionalResult(expected.reason, n, expected.detail), None
+
+        values = cpu.regs.values
+        for field, index, value in (('PC', PC, oracle.pc), ('AC', AC, oracle.ac), ('SP', SP, oracle.sp)):
+            if values[index] != value:
+                return (FunctionalResult(STOP_DIVERGED, n, pc),
+                        Divergence(n, pc, ir, field, value, values[index]))
+
+        cpu.cache.flush() # Com write-back, a escrita ainda pode estar só na cache
+        if cpu.ram._view != oracle.ram._view:
+            mem, actual = oracle.ram._data, cpu.ram._data
+            addr = next(a for a in range(len(mem)) if mem[a] != actual[a])
+            return (FunctionalResult(STOP_DIVERGED, n, pc),
+                    Divergence(n, pc, ir, f'M[{addr:03X}]', mem[addr], actual[addr]))
+
+        if reason == STOP_HALT:
+            return FunctionalResult(STOP_HALT, n + 1, oracle.pc), None
+    return FunctionalResult(STOP_BUDGET, max_instructions, None), None
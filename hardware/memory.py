@@ -1,114 +1,765 @@
 # hardware/memory.py
-from config import MEMORY_SIZE, CACHE_SIZE, BLOCK_SIZE, MASK_16BIT
+import mmap
+import os
+import random
+import sys
+from array import array
+from config import (MEMORY_SIZE, CACHE_SIZE, BLOCK_SIZE, MASK_16BIT, CACHE_WAYS, CACHE_POLICY,
+                    CACHE_WRITE_BACK, CACHE_WRITE_ALLOCATE, L2_CACHE, CACHE_HIT_LATENCY,
+                    L2_LATENCY, RAM_LATENCY, RAM_WORD_LATENCY, IO_BUFFER_SIZE, PAGE_SIZE)
+
+PAGE_BITS = PAGE_SIZE.bit_length() - 1
+PAGE_MASK = PAGE_SIZE - 1
+if (1 << PAGE_BITS) != PAGE_SIZE or MEMORY_SIZE % PAGE_SIZE:
+    raise ValueError(f"PAGE_SIZE ({PAGE_SIZE}) precisa ser potência de 2 e dividir a memória")
+
+def _zeros(n):
+    """array('H') com n palavras zeradas (criado em C, sem laço Python)"""
+    return array('H', bytes(2 * n))
 
 class MainMemory:
+    """
+    RAM de 16 bits guardada num buffer tipado (array('H'): 2 bytes por palavra).
+    Formato de imagem (arquivo): palavras de 16 bits little-endian, a partir do endereço 0.
+
+    A RAM é dividida em páginas de PAGE_SIZE palavras com cópia na escrita (copy-on-write):
+    fork() cria outra RAM que APONTA para as mesmas páginas; quem escrever numa página
+    compartilhada primeiro copia só aquela página. Enquanto ninguém compartilha nada, as
+    páginas são fatias de um buffer contíguo só ('_data'/'_view', como sempre foi).
+    Acessar _data/_view faz esta RAM tomar posse de todas as páginas (cópia das que
+    estiverem compartilhadas): não guarde essas referências atravessando um fork().
+    """
+    # Tempo de acesso: primeira palavra + cada palavra extra do burst
+    latency = RAM_LATENCY
+    word_latency = RAM_WORD_LATENCY
+
     def __init__(self):
-        # A memória é apenas uma lista gigante de zeros inicialmente
-        self._data = [0] * MEMORY_SIZE
+        # A memória é um buffer de MEMORY_SIZE palavras zeradas
+        self._set_flat(_zeros(MEMORY_SIZE))
+        self._mmap = None
+        self.busy_cycles = 0 # Ciclos gastos atendendo a cache (get_block/write_block/write)
+        self.pages_copied = 0 # Páginas copiadas por escrita em página compartilhada (ou posse)
+
+    def _set_flat(self, buffer):
+        """Usa 'buffer' (contíguo, só desta RAM) como armazenamento de todas as páginas"""
+        self._flat = buffer
+        self._flat_view = memoryview(buffer) # Fatias sem cópia (usadas pela cache)
+        self._pages = [self._flat_view[p:p + PAGE_SIZE] for p in range(0, MEMORY_SIZE, PAGE_SIZE)]
+        self._private = [True] * len(self._pages) # Página só desta RAM (pode escrever no lugar)
+        self._shared = 0 # Quantas páginas ainda são compartilhadas
+
+    @classmethod
+    def from_image_file(cls, path, writable=False):
+        """
+        Mapeia (mmap) um arquivo de imagem diretamente como RAM, sem copiar.
+        writable=False: as escritas ficam só neste processo (cópia privada das páginas);
+        writable=True: as escritas vão para o arquivo.
+        O arquivo precisa ter exatamente MEMORY_SIZE palavras.
+        """
+        if sys.byteorder != 'little':
+            raise ValueError("Imagem mapeada só é suportada em máquinas little-endian")
+        mem = cls.__new__(cls)
+        mem.busy_cycles = 0
+        mem.pages_copied = 0
+        with open(path, 'r+b' if writable else 'rb') as f:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_COPY
+            mem._mmap = mmap.mmap(f.fileno(), 0, access=access)
+        if len(mem._mmap) != 2 * MEMORY_SIZE:
+            size = len(mem._mmap)
+            mem._mmap.close()
+            raise ValueError(f"Imagem com {size} bytes; esperado {2 * MEMORY_SIZE}")
+        mem._set_flat(memoryview(mem._mmap).cast('H'))
+        return mem
+
+    # --- Páginas (copy-on-write) ---
+
+    def fork(self):
+        """
+        Outra RAM com o mesmo conteúdo, sem copiar nada: as duas passam a compartilhar
+        todas as páginas e cada uma copia a página na primeira escrita (como o fork() do Unix).
+        """
+        child = MainMemory.__new__(MainMemory)
+        child._flat = child._flat_view = None
+        child._pages = list(self._pages)
+        child._private = [False] * len(self._pages)
+        child._shared = len(self._pages)
+        child._mmap = None
+        child.busy_cycles = self.busy_cycles
+        child.pages_copied = 0
+        self._private = [False] * len(self._pages)
+        self._shared = len(self._pages)
+        return child
+
+    def _own(self, page):
+        """Copia a página compartilhada para um buffer só desta RAM (antes de escrever nela)"""
+        self._pages[page] = memoryview(array('H', self._pages[page]))
+        self._private[page] = True
+        self._shared -= 1
+        self.pages_copied += 1
+        self._flat = self._flat_view = None # As páginas não são mais um buffer contíguo
+
+    def page_stats(self):
+        """Páginas desta RAM: total, ainda compartilhadas, já copiadas (pronto para JSON)"""
+        return {'pages': len(self._pages), 'page_size': PAGE_SIZE,
+                'shared': self._shared, 'copied': self.pages_copied}
+
+    @property
+    def _data(self):
+        """Buffer contíguo com a RAM inteira (toma posse das páginas compartilhadas)"""
+        if self._flat is None or self._shared:
+            flat = _zeros(MEMORY_SIZE)
+            view = memoryview(flat)
+            for number, page in enumerate(self._pages):
+                view[number * PAGE_SIZE:(number + 1) * PAGE_SIZE] = page
+            self.pages_copied += self._shared
+            self._set_flat(flat)
+        return self._flat
+
+    @property
+    def _view(self):
+        self._data
+        return self._flat_view
+
+    # --- Acesso (usado pela cache) ---
 
     def read(self, addr):
         """Lê uma palavra da memória. Se o endereço for inválido, retorna 0."""
-        if 0 <= addr < len(self._data):
-            return self._data[addr]
+        if 0 <= addr < MEMORY_SIZE:
+            return self._pages[addr >> PAGE_BITS][addr & PAGE_MASK]
         return 0
 
     def write(self, addr, value):
         """Escreve na memória (garantindo 16 bits)"""
-        if 0 <= addr < len(self._data):
-            self._data[addr] = value & MASK_16BIT
+        self.busy_cycles += self.latency
+        if 0 <= addr < MEMORY_SIZE:
+            page = addr >> PAGE_BITS
+            if not self._private[page]:
+                self._own(page)
+            self._pages[page][addr & PAGE_MASK] = value & MASK_16BIT
 
-    def get_block(self, start_addr):
+    def get_block(self, start_addr, size=BLOCK_SIZE):
         """
         Simula a leitura em 'burst' (bloco) para a Cache.
-        Retorna uma lista de palavras (ex: 4 palavras).
+        Retorna uma fatia (memoryview) de 'size' palavras, sem copiar.
+        Quem guarda o bloco (a cache) deve copiar o conteúdo.
         """
-        block = []
-        for i in range(BLOCK_SIZE):
-            # Pega o dado ou 0 se sair fora da memória
-            if start_addr + i < len(self._data):
-                block.append(self._data[start_addr + i])
-            else:
-                block.append(0)
-        return block
+        self.busy_cycles += self.latency + (size - 1) * self.word_latency
+        offset = start_addr & PAGE_MASK
+        if 0 <= start_addr < MEMORY_SIZE and offset + size <= PAGE_SIZE:
+            return self._pages[start_addr >> PAGE_BITS][offset:offset + size]
+        # Bloco saindo da memória (ou da página): completa com zeros
+        return memoryview(array('H', [self.read(start_addr + i) for i in range(size)]))
+
+    def write_block(self, start_addr, words):
+        """Escrita em 'burst' (write-back de um bloco sujo da cache)"""
+        self.busy_cycles += self.latency + (len(words) - 1) * self.word_latency
+        end = start_addr + len(words)
+        if 0 <= start_addr and end <= MEMORY_SIZE:
+            self._store(start_addr, memoryview(words))
+        else:
+            for i, value in enumerate(words):
+                if 0 <= start_addr + i < MEMORY_SIZE:
+                    self._store(start_addr + i, array('H', [value & MASK_16BIT]))
+
+    def _store(self, start, words):
+        """Copia 'words' (memoryview/array 'H') para [start, start + len), página por página"""
+        end = start + len(words)
+        done = 0
+        while start < end:
+            page = start >> PAGE_BITS
+            if not self._private[page]:
+                self._own(page)
+            offset = start & PAGE_MASK
+            count = min(PAGE_SIZE - offset, end - start)
+            self._pages[page][offset:offset + count] = words[done:done + count]
+            start += count
+            done += count
+
+    # --- Carga/Descarga em Bloco ---
+
+    def load_image(self, words, start=0):
+        """Copia uma sequência de palavras para a RAM a partir de 'start' (uma operação só)"""
+        if not isinstance(words, array) or words.typecode != 'H':
+            words = array('H', [w & MASK_16BIT for w in words])
+        if start < 0 or start + len(words) > MEMORY_SIZE:
+            raise ValueError(f"Imagem de {len(words)} palavras não cabe a partir do endereço {start}")
+        self._store(start, memoryview(words))
+
+    def dump_image(self, start=0, end=MEMORY_SIZE):
+        """Retorna uma cópia (array('H')) das palavras [start, end)"""
+        words = array('H')
+        while start < end:
+            offset = start & PAGE_MASK
+            count = min(PAGE_SIZE - offset, end - start)
+            words.frombytes(self._pages[start >> PAGE_BITS][offset:offset + count].cast('B'))
+            start += count
+        return words
+
+    def load_image_file(self, path, start=0):
+        """Lê um arquivo de imagem (16 bits little-endian) para a RAM"""
+        words = array('H')
+        with open(path, 'rb') as f:
+            words.frombytes(f.read())
+        if sys.byteorder != 'little':
+            words.byteswap()
+        self.load_image(words, start)
+
+    def save_image_file(self, path):
+        """Grava a RAM inteira num arquivo de imagem (16 bits little-endian)"""
+        words = self.dump_image()
+        if sys.byteorder != 'little':
+            words.byteswap()
+        with open(path, 'wb') as f:
+            words.tofile(f)
 
 # --- Estrutura da Cache ---
 
+POLICY_LRU = "LRU"       # Sai a linha usada há mais tempo
+POLICY_FIFO = "FIFO"     # Sai a linha carregada há mais tempo
+POLICY_RANDOM = "RANDOM" # Sai uma linha sorteada (semente fixa: execução reprodutível)
+
+def _log2(value, what):
+    """log2 exato (geometria da cache precisa ser potência de 2)"""
+    bits = value.bit_length() - 1
+    if value <= 0 or (1 << bits) != value:
+        raise ValueError(f"{what} precisa ser potência de 2 (recebido {value})")
+    return bits
+
 class CacheLine:
-    def __init__(self):
+    __slots__ = ('valid', 'dirty', 'tag', 'stamp', 'data')
+
+    def __init__(self, block_size=BLOCK_SIZE):
         self.valid = False  # V: Bit de validade
+        self.dirty = False  # D: Bloco modificado (só no write-back)
         self.tag = 0        # TAG: Etiqueta
-        # Dados: Guarda o bloco inteiro (ex: lista de 4 números)
-        self.data = [0] * BLOCK_SIZE 
-
-class DirectMappingCache:
-    def __init__(self, main_memory):
-        self.ram = main_memory
-        # Cria as linhas da cache (ex: 16 linhas)
-        self.lines = [CacheLine() for _ in range(CACHE_SIZE)]
-        
+        self.stamp = 0      # Relógio do último uso (LRU) ou da carga (FIFO)
+        # Dados: Guarda o bloco inteiro (ex: 4 palavras de 16 bits)
+        self.data = memoryview(_zeros(block_size))
+
+    def copy(self):
+        line = CacheLine.__new__(CacheLine)
+        line.valid, line.dirty, line.tag, line.stamp = self.valid, self.dirty, self.tag, self.stamp
+        line.data = memoryview(array('H', self.data.tobytes()))
+        return line
+
+class Cache:
+    """
+    Cache associativa por conjunto, configurável:
+      lines          - total de linhas (sets = lines // ways)
+      ways           - linhas por conjunto (1 = mapeamento direto, lines = totalmente associativa)
+      block_size     - palavras por bloco
+      policy         - POLICY_LRU, POLICY_FIFO ou POLICY_RANDOM
+      write_back     - False = write-through (escreve no nível de baixo a cada escrita)
+      write_allocate - Write Miss carrega o bloco na cache antes de escrever
+      latency        - ciclos de um acerto neste nível
+    'next_level' é a MainMemory ou outra Cache (ex: L1 -> L2 -> RAM).
+    """
+    def __init__(self, next_level, lines=CACHE_SIZE, ways=1, block_size=BLOCK_SIZE,
+                 policy=POLICY_LRU, write_back=False, write_allocate=False, name="L1",
+                 latency=CACHE_HIT_LATENCY):
+        if policy not in (POLICY_LRU, POLICY_FIFO, POLICY_RANDOM):
+            raise ValueError(f"Política de substituição desconhecida: {policy}")
+        if ways <= 0 or lines % ways:
+            raise ValueError(f"{lines} linhas não dividem em conjuntos de {ways} vias")
+        if isinstance(next_level, Cache) and next_level.block_size < block_size:
+            raise ValueError(f"Bloco do {name} ({block_size}) maior que o do {next_level.name}")
+
+        self.ram = next_level
+        self.name = name
+        self.ways = ways
+        self.block_size = block_size
+        self.num_sets = lines // ways
+        self.policy = policy
+        self.write_back = write_back
+        self.write_allocate = write_allocate
+        self.latency = latency
+
+        # Matemática do Endereço: [ TAG | INDEX | OFFSET ]
+        self._offset_bits = _log2(block_size, "BLOCK_SIZE")
+        self._index_bits = _log2(self.num_sets, "Número de conjuntos")
+        self._offset_mask = block_size - 1
+        self._index_mask = self.num_sets - 1
+        self._tag_shift = self._offset_bits + self._index_bits
+
+        # Conjuntos de linhas; 'lines' é a mesma coisa "achatada" (para a GUI)
+        self.sets = [[CacheLine(block_size) for _ in range(ways)] for _ in range(self.num_sets)]
+        self.lines = [line for ways_list in self.sets for line in ways_list]
+
+        self._clock = 0
+        self._random = random.Random(0)
+        self._is_lower = False # Vira True quando outra cache usa esta como nível de baixo
+        if isinstance(next_level, Cache):
+            next_level._is_lower = True
+
         # Estatísticas para mostrar na tela depois
         self.last_access_status = "IDLE" # "HIT" ou "MISS"
+        self.reset_stats()
 
-    def _split_address(self, addr):
+    def reset_stats(self):
+        self.read_hits = 0
+        self.read_misses = 0
+        self.write_hits = 0
+        self.write_misses = 0
+        self.evictions = 0   # Linhas válidas substituídas
+        self.writebacks = 0  # Blocos sujos devolvidos ao nível de baixo
+        self.busy_cycles = 0 # Ciclos gastos atendendo a cache de cima (se for L2)
+
+    @property
+    def hits(self):
+        return self.read_hits + self.write_hits
+
+    @property
+    def misses(self):
+        return self.read_misses + self.write_misses
+
+    def stats(self):
+        """Contadores deste nível (dicionário, pronto para JSON)"""
+        accesses = self.hits + self.misses
+        return {
+            'name': self.name,
+            'read_hits': self.read_hits, 'read_misses': self.read_misses,
+            'write_hits': self.write_hits, 'write_misses': self.write_misses,
+            'evictions': self.evictions, 'writebacks': self.writebacks,
+            'hit_rate': self.hits / accesses if accesses else 0.0,
+            'busy_cycles': self.busy_cycles,
+        }
+
+    def levels(self):
+        """Lista [L1, L2, ...] a partir deste nível"""
+        level, out = self, []
+        while isinstance(level, Cache):
+            out.append(level)
+            level = level.ram
+        return out
+
+    def stall_cycles(self):
         """
-        Matemática do Endereço:
-        Endereço (12 bits) = [ TAG (6b) | INDEX (4b) | OFFSET (2b) ]
+        Ciclos que a CPU ficou parada esperando a memória (modelo bloqueante).
+        Chamado na L1: acertos custam 'latency - 1' extra e cada nível de baixo
+        soma o tempo que gastou atendendo os misses/escritas vindos de cima.
         """
-        # 1. Offset: Pega os últimos 2 bits (para blocos de 4 palavras)
-        # 3 em binário é 11 (máscara de 2 bits)
-        offset = addr & 0x03 
-        
-        # 2. Index: Joga fora os 2 bits do offset e pega os próximos 4
-        # 15 em binário é 1111 (máscara de 4 bits para 16 linhas)
-        index = (addr >> 2) & 0x0F
-        
-        # 3. Tag: Joga fora os 6 bits (2 do offset + 4 do index) e pega o resto
-        tag = addr >> 6
-        
+        total = (self.hits + self.misses) * (self.latency - 1)
+        level = self.ram
+        while True:
+            total += level.busy_cycles
+            if not isinstance(level, Cache):
+                return total
+            level = level.ram
+
+    def _split_address(self, addr):
+        tag = addr >> self._tag_shift
+        index = (addr >> self._offset_bits) & self._index_mask
+        offset = addr & self._offset_mask
         return tag, index, offset
 
+    def _lookup(self, tag, index):
+        for line in self.sets[index]:
+            if line.valid and line.tag == tag:
+                return line
+        return None
+
+    def _fill(self, tag, index):
+        """Escolhe a vítima, devolve ela se estiver suja e carrega o bloco novo"""
+        ways_list = self.sets[index]
+        victim = None
+        for line in ways_list:
+            if not line.valid:
+                victim = line
+                break
+        if victim is None:
+            if self.policy == POLICY_RANDOM:
+                victim = self._random.choice(ways_list)
+            else:
+                victim = min(ways_list, key=lambda line: line.stamp)
+            self.evictions += 1
+            if victim.dirty:
+                self.writebacks += 1
+                victim_addr = ((victim.tag << self._index_bits) | index) << self._offset_bits
+                self.ram.write_block(victim_addr, victim.data)
+
+        block_addr = ((tag << self._index_bits) | index) << self._offset_bits
+        victim.data[:] = self.ram.get_block(block_addr, self.block_size)
+        victim.valid = True
+        victim.dirty = False
+        victim.tag = tag
+        self._clock += 1
+        victim.stamp = self._clock
+        return victim
+
+    def _touch(self, line):
+        if self.policy == POLICY_LRU:
+            self._clock += 1
+            line.stamp = self._clock
+
     def read(self, addr):
-        tag, index, offset = self._split_address(addr)
-        line = self.lines[index]
+        tag = addr >> self._tag_shift
+        index = (addr >> self._offset_bits) & self._index_mask
 
         # Verifica se é HIT
-        if line.valid and line.tag == tag:
-            self.last_access_status = "HIT"
-            print(f"[CACHE] Read Hit! Endereço {addr} (Linha {index})")
-            return line.data[offset]
-        
-        # Se não, é MISS
+        for line in self.sets[index]:
+            if line.valid and line.tag == tag:
+                self.read_hits += 1
+                self.last_access_status = "HIT"
+                if self.policy == POLICY_LRU:
+                    self._clock += 1
+                    line.stamp = self._clock
+                return line.data[addr & self._offset_mask]
+
+        # Se não, é MISS: busca o bloco inteiro no nível de baixo
+        self.read_misses += 1
         self.last_access_status = "MISS"
-        print(f"[CACHE] Read Miss! Buscando bloco na RAM...")
-        
-        # Calcula onde começa o bloco na RAM (zera os bits do offset)
-        block_start_addr = addr - offset
-        
-        # Busca o bloco inteiro na RAM
-        new_block = self.ram.get_block(block_start_addr)
-        
-        # Atualiza a linha da Cache
-        line.valid = True
-        line.tag = tag
-        line.data = new_block
-        
-        return line.data[offset]
+        line = self._fill(tag, index)
+        return line.data[addr & self._offset_mask]
 
     def write(self, addr, value):
-        """
-        Política: Write-Through (Escreve na Cache e na RAM ao mesmo tempo)
-        """
-        # 1. Escreve na RAM sempre (segurança)
-        self.ram.write(addr, value)
-        
-        # 2. Verifica se o dado está na cache para atualizar lá também
+        if self._is_lower:
+            self.busy_cycles += self.latency
         tag, index, offset = self._split_address(addr)
-        line = self.lines[index]
-        
-        # Só atualizamos a cache se for um Write Hit (já estava lá)
-        # Se for Write Miss, no Write-Through simples, não precisamos carregar.
-        if line.valid and line.tag == tag:
+        line = self._lookup(tag, index)
+
+        if line is not None:
+            self.write_hits += 1
+            self.last_access_status = "HIT"
+            self._touch(line)
+        else:
+            self.write_misses += 1
+            self.last_access_status = "MISS"
+            if self.write_allocate:
+                line = self._fill(tag, index)
+
+        if line is not None:
             line.data[offset] = value & MASK_16BIT
-            print(f"[CACHE] Write Hit! Atualizado Cache e RAM no end {addr}")
+            if self.write_back:
+                line.dirty = True
+                return
+        # Write-Through (ou Write Miss sem alocação): escreve no nível de baixo
+        self.ram.write(addr, value)
+
+    # --- Interface de "nível de baixo" (quando esta cache é a L2 de outra) ---
+
+    def get_block(self, start_addr, size=BLOCK_SIZE):
+        """Entrega um bloco (ou parte dele) para a cache de cima"""
+        self.busy_cycles += self.latency
+        tag, index, offset = self._split_address(start_addr)
+        line = self._lookup(tag, index)
+        if line is not None:
+            self.read_hits += 1
+            self._touch(line)
+        else:
+            self.read_misses += 1
+            line = self._fill(tag, index)
+        return line.data[offset:offset + size]
+
+    def write_block(self, start_addr, words):
+        """Recebe um bloco sujo devolvido pela cache de cima"""
+        self.busy_cycles += self.latency
+        tag, index, offset = self._split_address(start_addr)
+        line = self._lookup(tag, index)
+        if line is not None:
+            self.write_hits += 1
+            self._touch(line)
+        else:
+            self.write_misses += 1
+            if self.write_allocate:
+                line = self._fill(tag, index)
+        if line is not None:
+            line.data[offset:offset + len(words)] = words
+            if self.write_back:
+                line.dirty = True
+                return
+        self.ram.write_block(start_addr, words)
+
+    def clone(self, main_memory):
+        """
+        Cópia desta hierarquia (mesma geometria, linhas, relógio e contadores) apoiada em
+        'main_memory' no lugar da RAM original (usado pelo CPU.fork()).
+        """
+        twin = Cache.__new__(type(self))
+        twin.__dict__.update(self.__dict__)
+        twin.ram = self.ram.clone(main_memory) if isinstance(self.ram, Cache) else main_memory
+        twin.sets = [[line.copy() for line in ways_list] for ways_list in self.sets]
+        twin.lines = [line for ways_list in twin.sets for line in ways_list]
+        if self.policy == POLICY_RANDOM: # O sorteio continua igual nos dois
+            twin._random = random.Random()
+            twin._random.setstate(self._random.getstate())
+        return twin
+
+    def flush(self):
+        """Devolve todos os blocos sujos para baixo (ex: antes de conferir a RAM)"""
+        for index, ways_list in enumerate(self.sets):
+            for line in ways_list:
+                if line.valid and line.dirty:
+                    self.writebacks += 1
+                    addr = ((line.tag << self._index_bits) | index) << self._offset_bits
+                    self.ram.write_block(addr, line.data)
+                    line.dirty = False
+        if isinstance(self.ram, Cache):
+            self.ram.flush()
+
+    def discard(self, addr):
+        """
+        Tira de todos os níveis o bloco que contém 'addr', SEM devolver nada para baixo
+        (a RAM mudou por fora; use depois de um flush). Retorna quantas linhas saíram.
+        """
+        dropped = 0
+        for level in self.levels():
+            line = level._lookup(*level._split_address(addr)[:2])
+            if line is not None:
+                line.valid = False
+                dropped += 1
+        return dropped
+
+    def peek(self, addr):
+        """Valor atual de 'addr' (a cópia mais nova: L1, L2... ou a RAM), sem mexer em nada"""
+        for level in self.levels():
+            line = level._lookup(*level._split_address(addr)[:2])
+            if line is not None:
+                return line.data[addr & level._offset_mask]
+        return level.ram.read(addr)
+
+    def invalidate(self):
+        """Flush + esvazia todos os níveis (a RAM foi alterada por fora da cache)"""
+        self.flush()
+        for level in self.levels():
+            for line in level.lines:
+                line.valid = False
+
+class DirectMappingCache(Cache):
+    """
+    Configuração original: mapeamento direto, write-through, sem write-allocate.
+    Endereço (12 bits) = [ TAG (6b) | INDEX (4b) | OFFSET (2b) ] com 16 linhas de 4 palavras.
+    """
+    def __init__(self, main_memory, lines=CACHE_SIZE, block_size=BLOCK_SIZE):
+        super().__init__(main_memory, lines=lines, ways=1, block_size=block_size)
+
+def build_cache(main_memory):
+    """Monta a hierarquia de cache descrita no config.py (L2 opcional embaixo da L1)"""
+    next_level = main_memory
+    if L2_CACHE is not None:
+        l2_config = dict(L2_CACHE)
+        l2_config.setdefault('latency', L2_LATENCY)
+        next_level = Cache(main_memory, name="L2", **l2_config)
+    return Cache(next_level, lines=CACHE_SIZE, ways=CACHE_WAYS, block_size=BLOCK_SIZE,
+                 policy=CACHE_POLICY, write_back=CACHE_WRITE_BACK,
+                 write_allocate=CACHE_WRITE_ALLOCATE, name="L1")
+
+# --- E/S Mapeada em Memória ---
+
+class InputStream:
+    """
+    Dispositivo de entrada (2 portas), lido em blocos de IO_BUFFER_SIZE bytes:
+      +0 dado:   próximo byte (0-255), ou palavra de 16 bits little-endian se word=True;
+                 0xFFFF no fim da entrada (dá para testar com JNEG no modo byte)
+      +1 status: 1 se ainda há dado, 0 no fim (não consome nada)
+    'source': bytes, caminho de arquivo ou objeto com read() (binário).
+    """
+    size = 2
+
+    def __init__(self, source, word=False, buffer_size=IO_BUFFER_SIZE):
+        self.word = word
+        self.buffer_size = buffer_size
+        self._owned = False
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._file = None
+            self._buf = bytes(source)
         else:
-            print(f"[CACHE] Write Miss! Atualizado apenas RAM no end {addr}")
\ No newline at end of file
+            if isinstance(source, (str, os.PathLike)):
+                source = open(source, 'rb')
+                self._owned = True
+            self._file = source
+            self._buf = b''
+        self._pos = 0
+        self.items = 0   # Bytes/palavras entregues à CPU
+        self.refills = 0 # Leituras em bloco da fonte
+
+    def _available(self, need):
+        if len(self._buf) - self._pos >= need:
+            return True
+        if self._file is None:
+            return False
+        chunk = self._file.read(self.buffer_size)
+        self.refills += 1
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        if not chunk:
+            self.close() # Fim da fonte: não lê mais
+        return len(self._buf) >= need
+
+    def read(self, offset):
+        need = 2 if self.word else 1
+        if offset == 1:
+            return 1 if self._available(need) else 0
+        if not self._available(need):
+            return 0xFFFF
+        buf, pos = self._buf, self._pos
+        self._pos = pos + need
+        self.items += 1
+        return buf[pos] | (buf[pos + 1] << 8) if self.word else buf[pos]
+
+    def write(self, offset, value):
+        pass # Portas de entrada ignoram escritas
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._owned and self._file is not None:
+            self._file.close()
+        self._file = None
+
+class OutputSink:
+    """
+    Dispositivo de saída (2 portas), com buffer descarregado em blocos:
+      +0 dado:     escrever manda o byte baixo (ou a palavra inteira, little-endian, se word=True)
+      +1 controle: ler dá quantos itens já foram escritos (16 bits); escrever força o flush
+    'sink': None (guarda na memória, ver getvalue()), caminho de arquivo ou objeto com write().
+    """
+    size = 2
+
+    def __init__(self, sink=None, word=False, buffer_size=IO_BUFFER_SIZE):
+        self.word = word
+        self.buffer_size = buffer_size
+        self._owned = False
+        if isinstance(sink, (str, os.PathLike)):
+            sink = open(sink, 'wb')
+            self._owned = True
+        self._file = sink
+        self._buf = bytearray()
+        self._kept = bytearray() # Saída já descarregada (só quando sink=None)
+        self.items = 0   # Bytes/palavras recebidos da CPU
+        self.flushes = 0 # Escritas em bloco no destino
+
+    def read(self, offset):
+        return self.items & MASK_16BIT if offset == 1 else 0
+
+    def write(self, offset, value):
+        if offset == 1:
+            self.flush()
+            return
+        if self.word:
+            self._buf += (value & MASK_16BIT).to_bytes(2, 'little')
+        else:
+            self._buf.append(value & 0xFF)
+        self.items += 1
+        if len(self._buf) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buf:
+            return
+        self.flushes += 1
+        if self._file is None:
+            self._kept += self._buf
+        else:
+            self._file.write(self._buf)
+        self._buf = bytearray()
+
+    def getvalue(self):
+        """Tudo o que foi escrito (sink=None)"""
+        return bytes(self._kept + self._buf)
+
+    def close(self):
+        self.flush()
+        if self._owned and self._file is not None:
+            self._file.close()
+        self._file = None
+
+class LocalMemory:
+    """
+    Memória local (scratchpad) de 'size' palavras, lida/escrita direto, sem cache.
+    No multi-core cada núcleo tem a sua no MESMO endereço (ver hardware/multicore.py).
+    """
+    def __init__(self, size):
+        self.size = size
+        self.words = _zeros(size)
+        self.items = 0 # Acessos
+
+    def read(self, offset):
+        self.items += 1
+        return self.words[offset]
+
+    def write(self, offset, value):
+        self.items += 1
+        self.words[offset] = value & MASK_16BIT
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class MemoryMappedIO:
+    """
+    Decodificador de endereços na frente da cache: endereços de porta vão direto para o
+    dispositivo (sem passar pela cache); o resto segue para a cache normalmente.
+    Mesma interface read/write da cache, então o CPU só troca quem ele chama.
+
+    Uma instrução acessa a memória por 1-2 microinstruções seguidas com rd (ou wr)
+    ligado, no MESMO endereço (ex: LODD tem rd em duas). Para a porta isso é uma
+    transação só: repetir a operação na mesma porta, sem acesso à memória no meio
+    (toda busca de instrução lê a memória), não consome/emite de novo.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self.ports = {}   # Endereço -> (dispositivo, offset)
+        self.devices = [] # (base, dispositivo)
+        self.reads = 0    # Transações de E/S
+        self.writes = 0
+        self._last = None # (op, endereço, valor) da transação em andamento
+
+    def map(self, device, base):
+        addresses = range(base, base + device.size)
+        if base < 0 or addresses[-1] >= MEMORY_SIZE:
+            raise ValueError(f"Portas {base:03X}-{addresses[-1]:03X} fora da memória")
+        for addr in addresses:
+            if addr in self.ports:
+                raise ValueError(f"Endereço {addr:03X} já está mapeado")
+        for offset, addr in enumerate(addresses):
+            self.ports[addr] = (device, offset)
+        self.devices.append((base, device))
+        return device
+
+    def read(self, addr):
+        port = self.ports.get(addr)
+        if port is None:
+            self._last = None
+            return self.cache.read(addr)
+        self.cache.last_access_status = "IO"
+        last = self._last
+        if last is not None and last[0] == 'r' and last[1] == addr:
+            return last[2]
+        value = port[0].read(port[1]) & MASK_16BIT
+        self.reads += 1
+        self._last = ('r', addr, value)
+        return value
+
+    def write(self, addr, value):
+        port = self.ports.get(addr)
+        if port is None:
+            self._last = None
+            return self.cache.write(addr, value)
+        self.cache.last_access_status = "IO"
+        last = self._last
+        if last is not None and last[0] == 'w' and last[1] == addr and last[2] == value:
+            return
+        port[0].write(port[1], value)
+        self.writes += 1
+        self._last = ('w', addr, value)
+
+    def end_transaction(self):
+        """Fronteira de instrução sem leitura da memória (busca feita pela IFU)"""
+        self._last = None
+
+    def flush(self):
+        """Descarrega os buffers de saída (a cache não é afetada)"""
+        for _, device in self.devices:
+            device.flush()
+
+    def close(self):
+        for _, device in self.devices:
+            device.close()
+
+    def stats(self):
+        return {'io_reads': self.reads, 'io_writes': self.writes,
+                'devices': [{'base': base, 'type': type(device).__name__, 'items': device.items}
+                            for base, device in self.devices]}
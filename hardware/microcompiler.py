@@ -0,0 +1,332 @@
+# hardware/microcompiler.py
+"""
+Compilador do microprograma: gera (e compila com exec) um laço Python especializado
+para o control store da CPU, com a busca e cada rotina do OPCODE_MAP "desenroladas":
+
+    cpu.compiled = CompiledMicrocode(cpu)                  # run_until passa a usar o laço gerado
+    cpu.compiled = CompiledMicrocode(cpu, validate=True)   # confere cada run_until com o _loop
+
+    python -m hardware.microcompiler --show LODD           # mostra o código gerado
+    python -m hardware.microcompiler programs/bench --validate --chunk 777
+
+Cada microinstrução vira as poucas linhas que ela realmente faz: os campos (AMUX, ULA,
+deslocador, enc/C, rd/wr) são constantes naquele endereço, as constantes 0/+1/-1/AMASK/
+SMASK viram literais e os desvios JAM viram 'if' do Python; o JAM JUMP da decodificação
+vira uma árvore de 'if' sobre o opcode. Os registradores, o MAR/MBR, a cache (mesmas
+chamadas read/write, na mesma ordem) e os contadores ficam exatamente como no _loop.
+O laço gerado só para nas fronteiras de instrução: o run_until termina com o _loop a
+instrução que estiver no meio e usa o _loop nos últimos ciclos do orçamento (menos
+que a instrução mais longa), então o resultado é o mesmo ciclo a ciclo.
+Com write_addr, trace, profiler, breakpoints, trace de memória ou IFU, o run_until
+continua usando os laços interpretados.
+Rotinas com laço, decodificação (JAM JUMP) fora da busca ou busca com desvio não são
+compiladas (ValueError).
+"""
+import argparse
+import sys
+import time
+
+from hardware.cpu import (CPU, STOP_HALT, STOP_PC, STOP_BAD_OPCODE, STOP_BAD_MPC, OP_JUMP)
+from software.isa import OPCODES
+
+CONSTANT_REGS = {8: '0', 9: '1', 10: '0xFFFF', 11: '0x0FFF', 12: '0x00FF'}
+MAX_LINES = 20_000 # Rotinas com desvios demais (a árvore de caminhos explode) não são compiladas
+OPCODE_NAMES = {opcode: name for name, opcode in OPCODES.items()}
+
+# Laços já compilados, pelo conteúdo da tabela e do OPCODE_MAP (CPUs iguais reaproveitam)
+_kernels = {}
+
+class _Generator:
+    def __init__(self, table, opcode_map):
+        self.table = table
+        self.opcode_map = opcode_map
+        self.lines = []
+        self.max_path = 0
+        # O registrador 0 ('None', fonte dos "X := Y" sem segundo operando) vale 0 enquanto
+        # nenhuma microinstrução escrever nele: vira literal (o laço confere r[0] ao entrar)
+        self.zero_reg = not any(u is not None and u.enc and u.c == 0 for u in table)
+        self.constants = dict(CONSTANT_REGS)
+        if self.zero_reg:
+            self.constants[0] = '0'
+
+    def emit(self, indent, text):
+        self.lines.append("    " * indent + text)
+        if len(self.lines) > MAX_LINES:
+            raise ValueError("Microprograma com caminhos demais para compilar")
+
+    def _uinst(self, mpc, indent, final):
+        """Código de uma microinstrução (sem o próximo endereço); 'final' = os latches são guardados"""
+        u = self.table[mpc]
+        reg = lambda i: self.constants.get(i, f"r[{i}]")
+        a = 'r[6]' if u.amux else reg(u.a)
+        b = reg(u.b)
+        masked = u.alu == 1 and u.sh == 0 and '0x0FFF' in (a, b) # Ex: MAR := AMASK & IR
+        self.emit(indent, f"# MPC {mpc}")
+        if final: # Última microinstrução antes de sair do laço: os latches ficam no estado da CPU
+            self.emit(indent, f"la = {a}")
+            self.emit(indent, f"lb = {b}")
+            a = a if not a.startswith('r[') else 'la' # Constante continua literal na conta
+            b = b if not b.startswith('r[') else 'lb'
+        if u.alu == 0:
+            expr = a if b == '0' else b if a == '0' else f"({a} + {b}) & 0xFFFF"
+        elif u.alu == 1:
+            expr = a if b == '0xFFFF' else b if a == '0xFFFF' else f"{a} & {b}"
+        elif u.alu == 2:
+            expr = a
+        else:
+            expr = f"{a} ^ 0xFFFF"
+        if u.sh == 2:
+            expr = f"(({expr}) << 8) & 0xFFFF"
+        elif u.mar and not u.mbr and not u.enc and not final and u.cond in (0, 3) and u.alu == 0 and '+' in expr:
+            expr, masked = f"({a} + {b}) & 0x0FFF", True # Só o MAR recebe: a máscara de 12 bits basta
+
+        uses = u.mar + u.mbr + u.enc
+        if final or u.cond in (1, 2) or u.sh == 1 or uses > 1:
+            self.emit(indent, f"res = {expr}")
+            if u.sh == 1:
+                self.emit(indent, "res = (res >> 1) | (res & 0x8000)")
+            value = 'res'
+        else:
+            simple = expr.isalnum() or (expr.startswith('r[') and expr.endswith(']') and ' ' not in expr)
+            value = expr if simple else f"({expr})"
+        if u.mar: self.emit(indent, f"r[5] = {value}" if masked else f"r[5] = {value} & 0x0FFF")
+        if u.mbr: self.emit(indent, f"r[6] = {value}")
+        if u.enc: self.emit(indent, f"r[{u.c}] = {value}")
+        if u.rd: self.emit(indent, "r[6] = read(r[5])")
+        if u.wr: self.emit(indent, "write(r[5], r[6])")
+
+    def _ends(self, mpc):
+        return mpc == 0 or self.table[mpc] is None
+
+    def _leaf(self, mpc, indent, k, prev, retire=True):
+        self.max_path = max(self.max_path, k)
+        if mpc == 0:
+            self.emit(indent, f"n += {k}")
+            if retire:
+                self.emit(indent, "retired += 1")
+            self.emit(indent, f"cur = {prev}")
+        else: # MPC vazio: para como o _loop (o MPC fica apontando para ele)
+            self.emit(indent, f"return STOP_BAD_MPC, {mpc}, {mpc}, n + {k}, retired, halting, {prev}, la, lb, res")
+
+    def routine(self, mpc, indent, k, prev, visiting=()):
+        """Caminhos a partir de 'mpc' até voltar à busca; k = microinstruções já feitas na instrução"""
+        if self._ends(mpc):
+            return self._leaf(mpc, indent, k, prev)
+        if mpc in visiting:
+            raise ValueError(f"Rotina com laço no MPC {mpc}")
+        u = self.table[mpc]
+        if u.cond == 3:
+            raise ValueError(f"Decodificação (JAM JUMP) fora da busca no MPC {mpc}")
+        visiting += (mpc,)
+        if u.cond == 0:
+            self._uinst(mpc, indent, self._ends(u.addr))
+            return self.routine(u.addr, indent, k + 1, mpc, visiting)
+        taken = u.addr | 0x100
+        self._uinst(mpc, indent, self._ends(u.addr) or self._ends(taken))
+        # cond 1: desvia se N (bit 15); cond 2: desvia se Z (resultado 0)
+        self.emit(indent, "if res & 0x8000:" if u.cond == 1 else "if not res:")
+        self.routine(taken, indent + 1, k + 1, mpc, visiting)
+        self.emit(indent, "else:")
+        self.routine(u.addr, indent + 1, k + 1, mpc, visiting)
+
+    def fetch(self, indent):
+        """Busca (sem desvios) até a decodificação. Retorna (MPC da decodificação, microinstruções)"""
+        mpc, chain = 0, []
+        while True:
+            u = self.table[mpc]
+            if u is None or mpc in chain:
+                raise ValueError(f"Busca do microprograma não reconhecida (MPC {mpc})")
+            chain.append(mpc)
+            if u.cond == 3:
+                break
+            if u.cond != 0:
+                raise ValueError(f"Desvio condicional na busca (MPC {mpc})")
+            mpc = u.addr
+        for addr in chain:
+            self._uinst(addr, indent, addr == mpc) # A decodificação pode ser a última (opcode inválido)
+        return mpc, len(chain)
+
+    def dispatch(self, opcodes, indent, decode, k):
+        """Árvore de 'if' sobre o opcode (busca binária nos opcodes do OPCODE_MAP)"""
+        if len(opcodes) > 1:
+            middle = len(opcodes) // 2
+            self.emit(indent, f"if opcode < 0x{opcodes[middle]:04X}:")
+            self.dispatch(opcodes[:middle], indent + 1, decode, k)
+            self.emit(indent, "else:")
+            self.dispatch(opcodes[middle:], indent + 1, decode, k)
+            return
+        opcode = opcodes[0]
+        self.emit(indent, f"if opcode == 0x{opcode:04X}: # {OPCODE_NAMES.get(opcode, '?')}")
+        if opcode == OP_JUMP:
+            self.emit(indent + 1, "if (ir & 0x0FFF) == r[1] - 1:")
+            self.emit(indent + 2, "halting = True")
+        start = self.opcode_map[opcode]
+        if start == 0: # Rotina "vazia": volta direto para a busca, sem concluir instrução
+            self._leaf(0, indent + 1, k, decode, retire=False)
+        else:
+            self.routine(start, indent + 1, k, decode)
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f"return STOP_BAD_OPCODE, opcode, 0, n + {k}, retired, halting, {decode}, la, lb, res")
+
+    def generate(self):
+        body = self.lines
+        self.emit(2, "if halting:")
+        self.emit(3, "halting = False")
+        self.emit(3, "if stop_on_halt:")
+        self.emit(4, "return STOP_HALT, r[1], 0, n, retired, False, cur, la, lb, res")
+        self.emit(2, "if r[1] == stop_pc:")
+        self.emit(3, "return STOP_PC, stop_pc, 0, n, retired, halting, cur, la, lb, res")
+        self.emit(2, "if n > last:")
+        self.emit(3, "return None, None, 0, n, retired, halting, cur, la, lb, res")
+        decode, k = self.fetch(2)
+        self.emit(2, "ir = r[2]")
+        self.emit(2, "opcode = ir & 0xFF00 if (ir & 0xF000) == 0xF000 else ir & 0xF000")
+        if self.opcode_map:
+            self.dispatch(sorted(self.opcode_map), 2, decode, k)
+        else:
+            self.emit(2, f"return STOP_BAD_OPCODE, opcode, 0, n + {k}, retired, halting, {decode}, la, lb, res")
+        self.max_path = max(self.max_path, k)
+        header = [
+            "def kernel(r, limit, stop_pc, stop_on_halt, halting, read, write, cur, la, lb, res):",
+            "    n = 0",
+            "    retired = 0",
+            f"    last = limit - {self.max_path} # Só começa uma instrução que cabe inteira no orçamento",
+        ]
+        if self.zero_reg:
+            header += ["    if r[0]:", "        last = -1 # Registrador 0 foi escrito por fora: tudo interpretado"]
+        header += ["    while True:"]
+        return "\n".join(header + body) + "\n"
+
+def compile_kernel(table, opcode_map):
+    """(função, código-fonte, maior instrução em microinstruções) do laço gerado para a tabela"""
+    key = (tuple(table), tuple(sorted(opcode_map.items())))
+    compiled = _kernels.get(key)
+    if compiled is None:
+        generator = _Generator(table, opcode_map)
+        source = generator.generate()
+        namespace = {'STOP_HALT': STOP_HALT, 'STOP_PC': STOP_PC, 'STOP_BAD_OPCODE': STOP_BAD_OPCODE,
+                     'STOP_BAD_MPC': STOP_BAD_MPC}
+        exec(compile(source, "<microcódigo compilado>", "exec"), namespace)
+        compiled = _kernels[key] = (namespace['kernel'], source, generator.max_path)
+    return compiled
+
+class CompiledMicrocode:
+    """
+    Laço compilado para o microprograma de 'cpu' (ligue com cpu.compiled = ...).
+    validate=True: cada run_until também roda o _loop numa cópia (CPU.fork) e compara
+    registradores, MPC, latches, contadores, cache e RAM (lento; sem E/S mapeada).
+    """
+    def __init__(self, cpu, validate=False):
+        self.table = cpu._table
+        self.kernel, self.source, self.max_path = compile_kernel(cpu._table, cpu.opcode_map)
+        self.validate = validate
+        self.checks = 0 # run_until conferidos (validate=True)
+
+    def check(self, cpu, shadow, result, expected):
+        """Compara a CPU (laço compilado) com a cópia que rodou o _loop. RuntimeError se divergiu"""
+        self.checks += 1
+        mine, theirs = _state(cpu, result), _state(shadow, expected)
+        if mine != theirs:
+            diffs = [f"{name}: compilado={a!r} interpretado={b!r}"
+                     for (name, a), (_, b) in zip(mine, theirs) if a != b]
+            raise RuntimeError(f"Microcódigo compilado divergiu (ciclo {shadow.cycles}): " + "; ".join(diffs))
+
+def _state(cpu, result):
+    return [('parada', tuple(result)), ('registradores', cpu.regs.values.tolist()), ('MPC', cpu.MPC),
+            ('MIR', cpu.MIR), ('latches', (cpu.latch_a, cpu.latch_b, cpu.alu_result)),
+            ('flags', (cpu.alu.n_flag, cpu.alu.z_flag)), ('ciclos', cpu.cycles),
+            ('instruções', cpu.instructions), ('halting', cpu.halting),
+            ('cache', [level.stats() for level in cpu.cache.levels()]),
+            ('RAM', bytes(cpu.ram.dump_image()))]
+
+# --- Linha de comando ---
+
+def _microprogram(optimized):
+    if not optimized:
+        return None, None
+    from software.microcode_opt import optimize
+    result = optimize()
+    return result.control_store, result.opcode_map
+
+def validate_program(code, control_store=None, opcode_map=None, max_cycles=5_000_000, chunk=None):
+    """Roda o programa com validate=True (em pedaços de 'chunk' ciclos). Retorna (RunResult, conferências)"""
+    cpu = CPU(control_store, opcode_map)
+    cpu.ram.load_image(code)
+    cpu.compiled = CompiledMicrocode(cpu, validate=True)
+    chunk = chunk or max_cycles
+    done = 0
+    while True:
+        result = cpu.run_until(min(chunk, max_cycles - done))
+        done += result.cycles
+        if result.reason != "budget" or done >= max_cycles:
+            return result, cpu.compiled.checks
+
+def _speed(code, control_store, opcode_map, max_cycles, compiled):
+    cpu = CPU(control_store, opcode_map)
+    cpu.ram.load_image(code)
+    if compiled:
+        cpu.compiled = CompiledMicrocode(cpu)
+    start = time.perf_counter()
+    result = cpu.run_until(max_cycles)
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compila o microprograma para um laço Python especializado")
+    parser.add_argument("programs", nargs="*", help="Arquivos .asm ou diretórios para medir/validar")
+    parser.add_argument("--optimized", action="store_true", help="Usa o microprograma otimizado")
+    parser.add_argument("--show", nargs="?", const="", default=None,
+                        help="Mostra o código gerado (inteiro, ou só a rotina de um opcode: --show LODD)")
+    parser.add_argument("--validate", action="store_true", help="Confere com o laço interpretado")
+    parser.add_argument("--chunk", type=int, default=None, help="Ciclos por run_until na validação")
+    parser.add_argument("--max-cycles", type=int, default=2_000_000)
+    args = parser.parse_args(argv)
+
+    from software.assembler import Assembler
+    from tools.bench import find_kernels
+    control_store, opcode_map = _microprogram(args.optimized)
+    compiled = CompiledMicrocode(CPU(control_store, opcode_map))
+    if args.show is not None:
+        print(_show(compiled.source, args.show))
+    print(f"Laço gerado: {compiled.source.count(chr(10))} linhas, maior instrução = {compiled.max_path} microinstruções")
+
+    status = 0
+    for path in find_kernels(args.programs) if args.programs else []:
+        code = Assembler().assemble(path)
+        if args.validate:
+            try:
+                result, checks = validate_program(code, control_store, opcode_map, args.max_cycles, args.chunk)
+                print(f"{path}: ok ({result.reason}, {checks} run_until conferidos)")
+            except RuntimeError as exc:
+                print(f"{path}: {exc}")
+                status = 1
+            continue
+        base, base_time = _speed(code, control_store, opcode_map, args.max_cycles, False)
+        fast, fast_time = _speed(code, control_store, opcode_map, args.max_cycles, True)
+        same = (base.cycles, base.instructions, base.stall_cycles) == (fast.cycles, fast.instructions, fast.stall_cycles)
+        print(f"{path}: interpretado {base.instructions / base_time:>10,.0f} instr/s   compilado "
+              f"{fast.instructions / fast_time:>10,.0f} instr/s   ({base_time / fast_time:.1f}x)  "
+              f"{'ok' if same else 'DIFERENTE'}")
+        status |= not same
+    return status
+
+def _show(source, name):
+    if not name:
+        return source
+    opcode = OPCODES.get(name.upper())
+    if opcode is None:
+        raise SystemExit(f"Opcode desconhecido: {name}")
+    lines = source.splitlines()
+    marker = f"if opcode == 0x{opcode:04X}:"
+    for i, line in enumerate(lines):
+        if marker in line:
+            indent = len(line) - len(line.lstrip())
+            out = [line]
+            for other in lines[i + 1:]:
+                if len(other) - len(other.lstrip()) <= indent:
+                    break
+                out.append(other)
+            return "\n".join(out)
+    raise SystemExit(f"{name} não está no OPCODE_MAP")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+# hardware/multicore.py
+"""
+MIC-1 com vários núcleos sobre UMA memória principal (programas SPMD: todos começam no
+endereço 0 com a mesma imagem). Cada núcleo descobre quem é pelos registradores iniciais:
+    AC = número do núcleo (0, 1, ...)        SP = -núcleo * CORE_STACK_WORDS (pilhas separadas)
+O microprograma não tem endereçamento indireto, então as variáveis de cada núcleo ficam na
+memória local dele: CORE_LOCAL_WORDS palavras em CORE_LOCAL_BASE (mesmo endereço em todos
+os núcleos, conteúdo separado, fora da cache). Não existe instrução atômica no MAC-1: a
+comunicação é por flags ou passagem de vez (um escritor por palavra). Ver
+programs/multicore_soma.asm.
+
+Dois modos, ambos determinísticos (o resultado não depende da máquina hospedeira):
+  MultiCore       - um processo; núcleos em rodízio, 'quantum' microinstruções cada, com
+                    L1 privadas mantidas coerentes por MSI/MESI (hardware.coherence).
+  EpochMultiCore  - um processo do SO por núcleo (8 núcleos simulados = 8 núcleos reais).
+                    Cada núcleo roda 'epoch' microinstruções sobre a SUA cópia da memória;
+                    no ponto de sincronização as escritas de todos são juntadas em ordem de
+                    núcleo (na mesma palavra, vence o núcleo de número maior) e as linhas
+                    de cache que ficaram velhas são descartadas. Ou seja: o que um núcleo
+                    escreve fica visível para os outros na época seguinte.
+"""
+import multiprocessing
+import queue
+import time
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+
+from config import (MEMORY_SIZE, PAGE_SIZE, MASK_16BIT, COHERENCE_PROTOCOL, CORE_STACK_WORDS,
+                    CORE_LOCAL_BASE, CORE_LOCAL_WORDS, MULTICORE_QUANTUM, MULTICORE_EPOCH)
+from hardware.coherence import Bus, CoherentCache
+from hardware.cpu import CPU, RunResult, STOP_BUDGET
+from hardware.memory import MainMemory, LocalMemory
+
+def new_core(core_id, control_store=None, opcode_map=None, ram=None, cache=None):
+    """
+    CPU do núcleo 'core_id': registradores iniciais e memória local. Sem 'ram'/'cache'
+    o núcleo fica com a RAM e a hierarquia de cache próprias do CPU.
+    """
+    cpu = CPU(control_store, opcode_map)
+    if ram is not None:
+        cpu.ram = ram
+    if cache is not None:
+        cpu.cache = cache
+    cpu.regs.values[4] = core_id & MASK_16BIT                     # AC
+    cpu.regs.values[3] = (-core_id * CORE_STACK_WORDS) & MASK_16BIT # SP
+    cpu.map_device(LocalMemory(CORE_LOCAL_WORDS), CORE_LOCAL_BASE)
+    return cpu
+
+class _Totals:
+    """RunResult acumulado de um núcleo ao longo de várias chamadas do run_until"""
+    __slots__ = ('reason', 'cycles', 'instructions', 'detail', 'stall_cycles')
+
+    def __init__(self):
+        self.reason, self.detail = STOP_BUDGET, None
+        self.cycles = self.instructions = self.stall_cycles = 0
+
+    def add(self, run):
+        self.reason, self.detail = run.reason, run.detail
+        self.cycles += run.cycles
+        self.instructions += run.instructions
+        self.stall_cycles += run.stall_cycles
+
+    def result(self):
+        return RunResult(self.reason, self.cycles, self.instructions, self.detail, self.stall_cycles)
+
+# --- Modo coerente (um processo) ---
+
+class MultiCore:
+    """
+    N núcleos (self.cores) com L1 coerentes num barramento (self.bus) sobre self.ram.
+    As caches começam vazias: carregue a imagem com load_image antes de rodar.
+    A L1 de cada núcleo usa a geometria do config.py, mas é sempre write-back e
+    write-allocate, e não há L2.
+    """
+    def __init__(self, n, protocol=COHERENCE_PROTOCOL, control_store=None, opcode_map=None):
+        if n < 1:
+            raise ValueError(f"Número de núcleos inválido: {n}")
+        self.ram = MainMemory()
+        self.bus = Bus(protocol)
+        self.cores = []
+        for core_id in range(n):
+            cache = CoherentCache(self.ram, self.bus, name=f"L1.{core_id}")
+            self.cores.append(new_core(core_id, control_store, opcode_map, self.ram, cache))
+
+    def load_image(self, words, start=0):
+        self.ram.load_image(words, start)
+
+    def run(self, max_cycles, quantum=MULTICORE_QUANTUM):
+        """
+        Rodízio fixo (núcleo 0, 1, ..., N-1, 0, ...) de 'quantum' microinstruções até cada
+        núcleo parar (halt, erro, breakpoint) ou gastar max_cycles. Uma lista de RunResult
+        (um por núcleo). quantum=1 intercala microinstrução por microinstrução.
+        """
+        totals = [_Totals() for _ in self.cores]
+        active = list(range(len(self.cores)))
+        while active:
+            still = []
+            for core_id in active:
+                total = totals[core_id]
+                total.add(self.cores[core_id].run_until(min(quantum, max_cycles - total.cycles)))
+                if total.reason == STOP_BUDGET and total.cycles < max_cycles:
+                    still.append(core_id)
+            active = still
+        return [total.result() for total in totals]
+
+    def flush(self):
+        """Devolve os blocos M de todas as caches (antes de olhar a RAM)"""
+        for cpu in self.cores:
+            cpu.cache.flush()
+
+    def stats(self):
+        return {'mode': 'coherent', 'bus': self.bus.stats(),
+                'cores': [dict(core=core_id, **cpu.timing_stats(), cache=cpu.cache.stats())
+                          for core_id, cpu in enumerate(self.cores)]}
+
+# --- Modo em processos (épocas) ---
+
+def merge_images(base, images):
+    """
+    Junta as escritas de cada núcleo numa época: palavras de images[i] diferentes de
+    'base', aplicadas em ordem de núcleo. Retorna (memória nova, palavras escritas por mais
+    de um núcleo). Compara página a página antes de descer para as palavras.
+    """
+    merged = array('H', base)
+    written = set()
+    conflicts = 0
+    for image in images:
+        for start in range(0, MEMORY_SIZE, PAGE_SIZE):
+            end = start + PAGE_SIZE
+            if image[start:end] == base[start:end]:
+                continue
+            for addr in range(start, end):
+                if image[addr] != base[addr]:
+                    if addr in written:
+                        conflicts += 1
+                    written.add(addr)
+                    merged[addr] = image[addr]
+    return merged, conflicts
+
+class _EpochCore:
+    """Um núcleo do EpochMultiCore (vive no processo dele, ou no principal se processes=False)"""
+    def __init__(self, core_id, initial, control_store, opcode_map):
+        self.cpu = new_core(core_id, control_store, opcode_map)
+        self.cpu.ram.load_image(initial)
+        self.totals = _Totals()
+        self.running = True
+        self.updates = 0       # Palavras trazidas das escritas dos outros núcleos
+        self.discarded = 0     # Linhas de cache descartadas na sincronização
+
+    def run_epoch(self, epoch, max_cycles):
+        """Roda uma época (se ainda não parou) e devolve a imagem da memória deste núcleo"""
+        if self.running:
+            total = self.totals
+            total.add(self.cpu.run_until(min(epoch, max_cycles - total.cycles)))
+            self.running = total.reason == STOP_BUDGET and total.cycles < max_cycles
+        self.cpu.cache.flush()
+        return self.cpu.ram.dump_image()
+
+    def adopt(self, merged, image):
+        """Passa a enxergar a memória juntada: atualiza a RAM e descarta os blocos velhos"""
+        if merged == image:
+            return
+        changed = [addr for addr in range(MEMORY_SIZE) if merged[addr] != image[addr]]
+        self.cpu.ram.load_image(merged)
+        self.updates += len(changed)
+        for addr in changed:
+            self.discarded += self.cpu.cache.discard(addr)
+
+    def stats(self):
+        return dict(**self.cpu.timing_stats(), updates=self.updates, discarded=self.discarded,
+                    cache=[level.stats() for level in self.cpu.cache.levels()])
+
+def _epoch_worker(core_id, n, epoch, max_cycles, control_store, opcode_map, shm_name, barrier, results):
+    """
+    Processo de um núcleo. Memória compartilhada (palavras de 16 bits):
+        [0, M)               imagem inicial (e a final, gravada pelo núcleo 0)
+        [(i+1)M, (i+2)M)     imagem do núcleo i no fim da época
+        [(n+1)M, (n+1)M + n) 1 se o núcleo i ainda está rodando
+    Dois barreiras por época: todas as imagens publicadas / todas já lidas.
+    Cada processo junta as imagens sozinho (mesma conta em todos: não há coordenador).
+    """
+    shm = SharedMemory(name=shm_name)
+    words = shm.buf.cast('H')
+    try:
+        slots = [words[(i + 1) * MEMORY_SIZE:(i + 2) * MEMORY_SIZE] for i in range(n)]
+        status = words[(n + 1) * MEMORY_SIZE:(n + 1) * MEMORY_SIZE + n]
+        core = _EpochCore(core_id, array('H', words[:MEMORY_SIZE]), control_store, opcode_map)
+        base = array('H', words[:MEMORY_SIZE])
+        epochs = conflicts = 0
+        while True:
+            image = core.run_epoch(epoch, max_cycles)
+            slots[core_id][:] = image
+            status[core_id] = int(core.running)
+            barrier.wait()
+            merged, clashes = merge_images(base, slots)
+            done = not any(status)
+            barrier.wait()
+            core.adopt(merged, image)
+            base = merged
+            epochs += 1
+            conflicts += clashes
+            if done:
+                break
+        if core_id == 0:
+            words[:MEMORY_SIZE] = base
+        results.put((core_id, core.totals.result(), core.stats(), epochs, conflicts, None))
+    except BaseException as exc:
+        barrier.abort()
+        results.put((core_id, None, None, 0, 0, f"{type(exc).__name__}: {exc}"))
+    finally:
+        slots = status = None
+        words.release()
+        shm.close()
+
+class EpochMultiCore:
+    """
+    N núcleos sincronizados a cada 'epoch' microinstruções (ver o topo do módulo), cada um
+    num processo (processes=False roda tudo neste processo, com o MESMO resultado).
+    self.ram tem a imagem inicial antes do run() e a memória final depois.
+    Cada núcleo tem a hierarquia de cache do config.py, privada e não coerente dentro da
+    época; a sincronização descarta as linhas com palavras escritas pelos outros.
+    """
+    def __init__(self, n, epoch=MULTICORE_EPOCH, processes=True, control_store=None, opcode_map=None):
+        if n < 1:
+            raise ValueError(f"Número de núcleos inválido: {n}")
+        self.n = n
+        self.epoch = epoch
+        self.processes = processes
+        self.control_store = control_store
+        self.opcode_map = opcode_map
+        self.ram = MainMemory()
+        self.epochs = 0
+        self.conflicts = 0 # Palavras escritas por mais de um núcleo na mesma época
+        self.core_stats = []
+        self.elapsed = 0.0
+
+    def load_image(self, words, start=0):
+        self.ram.load_image(words, start)
+
+    def run(self, max_cycles):
+        """Roda até todos os núcleos pararem (ou gastarem max_cycles). Lista de RunResult"""
+        start = time.perf_counter()
+        self.epochs = self.conflicts = 0
+        if self.processes:
+            results = self._run_processes(max_cycles)
+        else:
+            results = self._run_serial(max_cycles)
+        self.elapsed = time.perf_counter() - start
+        return results
+
+    def _run_serial(self, max_cycles):
+        base = self.ram.dump_image()
+        cores = [_EpochCore(core_id, base, self.control_store, self.opcode_map)
+                 for core_id in range(self.n)]
+        while True:
+            images = [core.run_epoch(self.epoch, max_cycles) for core in cores]
+            merged, clashes = merge_images(base, images)
+            done = not any(core.running for core in cores)
+            for core, image in zip(cores, images):
+                core.adopt(merged, image)
+            base = merged
+            self.epochs += 1
+            self.conflicts += clashes
+            if done:
+                break
+        self.ram.load_image(base)
+        self.core_stats = [core.stats() for core in cores]
+        return [core.totals.result() for core in cores]
+
+    def _run_processes(self, max_cycles):
+        n = self.n
+        shm = SharedMemory(create=True, size=2 * ((n + 2) * MEMORY_SIZE + n))
+        words = shm.buf.cast('H')
+        try:
+            words[:MEMORY_SIZE] = self.ram.dump_image()
+            barrier = multiprocessing.Barrier(n)
+            results = multiprocessing.Queue()
+            workers = [multiprocessing.Process(
+                target=_epoch_worker, name=f"mic1-core-{core_id}",
+                args=(core_id, n, self.epoch, max_cycles, self.control_store, self.opcode_map,
+                      shm.name, barrier, results))
+                for core_id in range(n)]
+            for worker in workers:
+                worker.start()
+            by_core = {}
+            while len(by_core) < n:
+                try:
+                    item = results.get(timeout=1.0)
+                except queue.Empty: # Confere se algum processo morreu sem responder
+                    if any(not w.is_alive() and w.exitcode for w in workers):
+                        barrier.abort()
+                        raise RuntimeError("Processo de núcleo terminou sem resultado") from None
+                    continue
+                by_core[item[0]] = item
+            for worker in workers:
+                worker.join()
+            errors = [f"núcleo {core_id}: {item[5]}" for core_id, item in sorted(by_core.items()) if item[5]]
+            if errors:
+                raise RuntimeError("; ".join(errors))
+            self.ram.load_image(array('H', words[:MEMORY_SIZE]))
+        finally:
+            words.release()
+            shm.close()
+            shm.unlink()
+        self.epochs = by_core[0][3]
+        self.conflicts = by_core[0][4]
+        self.core_stats = [by_core[core_id][2] for core_id in range(n)]
+        return [by_core[core_id][1] for core_id in range(n)]
+
+    def stats(self):
+        return {'mode': 'epoch', 'epoch': self.epoch, 'processes': self.processes,
+                'epochs': self.epochs, 'conflicts': self.conflicts,
+                'cores': [dict(core=core_id, **stats) for core_id, stats in enumerate(self.core_stats)]}
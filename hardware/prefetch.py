@@ -0,0 +1,162 @@
+# hardware/prefetch.py
+"""
+Unidade de busca antecipada (IFU, estilo MIC-2), opcional:
+
+    cpu = CPU(FETCH_FREE_CONTROL_STORE)            # software.microcode (ou make_fetch_free)
+    cpu.prefetch = InstructionFetchUnit(cpu)
+
+Sem ela, toda instrução paga a busca inteira no microprograma (CONTROL_STORE[0..2]:
+MAR := PC; rd / PC := PC + 1 / IR := MBR), em série com a execução. Com ela:
+  - a IFU lê as próximas palavras (PC, PC + 1, ...) pela cache e guarda até 'depth' numa
+    fila, nos ciclos em que a microinstrução não usa a porta da memória (rd/wr);
+  - na fronteira de instrução (MPC = 0) ela põe a palavra do PC no MBR e incrementa o PC,
+    e o microprograma sem busca só faz "IR := MBR; decodifica";
+  - fila vazia (começo, ou logo depois de um desvio): a CPU espera a leitura inteira
+    (wait_cycles): o ciclo do rd e a latência da cache. O rd só enche o MBR no subciclo 4,
+    depois que a ULA já leu o MBR, então ele não divide o ciclo com o "IR := MBR";
+  - PC diferente do esperado (desvio tomado: JUMP, JNEG, JZER, JNZE, JPOS) esvazia a fila;
+  - escrita da CPU num endereço que está na fila também esvazia (código que se modifica).
+Tempo: as leituras da IFU entram nas estatísticas da cache como qualquer acesso, mas o
+stall da CPU (CPU.stall_cycles) é só o que ela esperou; o resto da latência ficou escondido
+atrás da execução (hidden_cycles). A espera logo depois de um desvio é o custo do flush
+(flush_cycles). A IFU não anda a cada ciclo: nas fronteiras ela recebe o
+ciclo atual e o contador de rd/wr e usa os ciclos livres da porta desde a última fronteira.
+O estado da fila não entra nos snapshots nem no fork().
+"""
+from collections import deque
+from config import PREFETCH_DEPTH
+from hardware.profiler import OPCODE_NAMES
+
+class InstructionFetchUnit:
+    def __init__(self, cpu, depth=PREFETCH_DEPTH):
+        first = cpu.decoded_store[0]
+        if first is None or first.rd or first.cond != 3:
+            raise ValueError("A IFU precisa do microprograma sem busca (software.microcode.make_fetch_free)")
+        if depth < 1:
+            raise ValueError(f"Profundidade da fila inválida: {depth}")
+        self.cpu = cpu
+        self.depth = depth
+        self.queue = deque()   # (endereço, palavra) já lidos
+        self.pending = None    # Leitura em andamento: [endereço, palavra, ciclos que faltam]
+        self.next_addr = None  # Próximo endereço a ler (None = ainda não começou)
+        self.port_total = 0    # rd/wr feitos pela CPU (atualizado pelo CPU)
+        self._clock = 0        # Ciclo e rd/wr da última fronteira
+        self._port_mark = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.delivered = 0      # Instruções entregues
+        self.fetches = 0        # Leituras feitas na cache
+        self.flushes = 0        # Filas esvaziadas por desvio
+        self.flushed_words = 0  # Palavras lidas à toa (estavam na fila/em andamento no flush)
+        self.snoop_flushes = 0  # Filas esvaziadas por escrita da CPU numa palavra da fila
+        self.flushes_by_opcode = {} # Opcode da instrução que desviou -> flushes
+        self.fetch_stall = 0    # Latência (além do ciclo) de todas as leituras da IFU
+        self.wait_cycles = 0    # Ciclos que a CPU esperou com a fila vazia (rd + latência)
+        self.empty_takes = 0    # Fronteiras com a fila vazia (cada uma espera um rd inteiro)
+        self.flush_cycles = 0   # Parte do wait_cycles logo depois de um desvio
+
+    @property
+    def hidden_cycles(self):
+        """Latência de busca escondida atrás da execução"""
+        return self.fetch_stall - (self.wait_cycles - self.empty_takes)
+
+    @property
+    def stall_delta(self):
+        """Ajuste do stall da cache para o da CPU: tira a latência da IFU, põe a espera"""
+        return self.wait_cycles - self.fetch_stall
+
+    def _issue(self):
+        cache = self.cpu.cache
+        addr = self.next_addr
+        before = cache.stall_cycles()
+        word = cache.read(addr)
+        stall = cache.stall_cycles() - before
+        self.fetch_stall += stall
+        self.fetches += 1
+        self.pending = [addr, word, 1 + stall]
+        self.next_addr = (addr + 1) & 0x0FFF
+
+    def _advance(self, free):
+        """Usa 'free' ciclos livres da porta: termina a leitura em andamento e faz outras"""
+        while free > 0:
+            pending = self.pending
+            if pending is not None:
+                if pending[2] > free:
+                    pending[2] -= free
+                    return
+                free -= pending[2]
+                self.queue.append((pending[0], pending[1]))
+                self.pending = None
+            if len(self.queue) >= self.depth:
+                return
+            self._issue()
+
+    def _flush(self):
+        self.flushed_words += len(self.queue) + (self.pending is not None)
+        self.queue.clear()
+        self.pending = None
+
+    def take(self, pc, ir, now, port_total):
+        """
+        Fronteira de instrução no ciclo 'now', com 'port_total' rd/wr feitos pela CPU até aqui:
+        devolve a palavra do endereço 'pc' (o CPU a põe no MBR e incrementa o PC).
+        'ir' é a instrução que acabou (só para contar os flushes).
+        """
+        self.port_total = port_total
+        self._advance(now - self._clock - (port_total - self._port_mark))
+        self._clock = now
+        self._port_mark = self.port_total
+        if self.cpu.io is not None:
+            self.cpu.io.end_transaction()
+
+        pc &= 0x0FFF
+        if self.queue:
+            expected = self.queue[0][0]
+        elif self.pending is not None:
+            expected = self.pending[0]
+        else:
+            expected = self.next_addr
+        flushed = False
+        if expected != pc:
+            if expected is not None:
+                flushed = True
+                self.flushes += 1
+                opcode = ir & 0xFF00 if (ir & 0xF000) == 0xF000 else ir & 0xF000
+                self.flushes_by_opcode[opcode] = self.flushes_by_opcode.get(opcode, 0) + 1
+                self._flush()
+            self.next_addr = pc
+
+        if not self.queue:
+            if self.pending is None:
+                self._issue()
+            wait = self.pending[2] # O que falta da leitura, inclusive o ciclo do rd
+            self.wait_cycles += wait
+            self.empty_takes += 1
+            if flushed:
+                self.flush_cycles += wait
+            self.queue.append((self.pending[0], self.pending[1]))
+            self.pending = None
+        self.delivered += 1
+        return self.queue.popleft()[1]
+
+    def written(self, addr):
+        """A CPU escreveu em 'addr': se a palavra já foi lida pela IFU, a fila recomeça"""
+        pending = self.pending
+        if (pending is not None and pending[0] == addr) or any(a == addr for a, _ in self.queue):
+            self.snoop_flushes += 1
+            restart = self.queue[0][0] if self.queue else pending[0]
+            self._flush()
+            self.next_addr = restart
+
+    def stats(self):
+        """Contadores da IFU (dicionário, pronto para JSON)"""
+        return {
+            'depth': self.depth, 'delivered': self.delivered, 'fetches': self.fetches,
+            'flushes': self.flushes, 'flushed_words': self.flushed_words,
+            'snoop_flushes': self.snoop_flushes,
+            'flushes_by_opcode': {OPCODE_NAMES.get(op, f"{op:04X}"): count
+                                  for op, count in sorted(self.flushes_by_opcode.items())},
+            'wait_cycles': self.wait_cycles, 'flush_cycles': self.flush_cycles,
+            'hidden_cycles': self.hidden_cycles,
+        }
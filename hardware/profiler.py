@@ -0,0 +1,129 @@
+# hardware/profiler.py
+import json
+from config import MEMORY_SIZE
+from software.isa import OPCODES
+from software.microcode import CONTROL_STORE_SIZE, OPCODE_MAP
+
+# Nome de cada opcode (ex: 0x2000 -> 'ADDD')
+OPCODE_NAMES = {value: name for name, value in OPCODES.items() if not name.startswith('.')}
+
+# Qual rotina (opcode) começa em cada endereço do control store
+ROUTINE_OF_MPC = {mpc: opcode for opcode, mpc in OPCODE_MAP.items()}
+
+class Profiler:
+    """
+    Perfil de execução (opcional). Ligue com cpu.profiler = Profiler(...).
+    Os contadores são listas simples que o laço do CPU.run() incrementa direto:
+      - op_counts/op_cycles: instruções e microciclos por opcode (busca + execução)
+      - mpc_counts: execuções de cada endereço do control store
+      - pc_counts: quantas vezes cada PC foi decodificado
+      - branch_taken/branch_not_taken: saltos JAM N/Z por MPC
+    """
+    def __init__(self, symbol_table=None, opcode_map=None):
+        self.symbol_table = dict(symbol_table or {})
+        # Para microprogramas diferentes do padrão (ex: cpu.opcode_map de um otimizado)
+        self.routine_of_mpc = (ROUTINE_OF_MPC if opcode_map is None else
+                               {mpc: opcode for opcode, mpc in opcode_map.items()})
+        self.reset()
+
+    def reset(self):
+        self.op_counts = {}
+        self.op_cycles = {}
+        self.mpc_counts = [0] * CONTROL_STORE_SIZE
+        self.pc_counts = [0] * MEMORY_SIZE
+        self.branch_taken = [0] * CONTROL_STORE_SIZE
+        self.branch_not_taken = [0] * CONTROL_STORE_SIZE
+        # Instrução em andamento (o ciclo de início é contado no run())
+        self.current_opcode = None
+        self.current_start = 0
+
+    # --- Registro (caminho lento: usado pelo step()) ---
+
+    def record_uinst(self, mpc, cond, next_mpc):
+        self.mpc_counts[mpc] += 1
+        if cond == 1 or cond == 2:
+            if next_mpc & 0x100:
+                self.branch_taken[mpc] += 1
+            else:
+                self.branch_not_taken[mpc] += 1
+
+    def record_decode(self, pc, opcode):
+        self.current_opcode = opcode
+        self.pc_counts[pc & 0x0FFF] += 1
+        self.op_counts[opcode] = self.op_counts.get(opcode, 0) + 1
+
+    def record_boundary(self, cycle):
+        """Fim de uma instrução (MPC voltou a 0): fecha os ciclos do opcode atual"""
+        if self.current_opcode is not None:
+            self.op_cycles[self.current_opcode] = (self.op_cycles.get(self.current_opcode, 0)
+                                                   + cycle - self.current_start)
+        self.current_start = cycle
+
+    # --- Relatórios ---
+
+    def label_for(self, pc):
+        """PC -> 'rotulo+deslocamento' (rótulo mais próximo abaixo do PC)"""
+        best_name, best_addr = None, -1
+        for name, addr in self.symbol_table.items():
+            if best_addr < addr <= pc:
+                best_name, best_addr = name, addr
+        if best_name is None:
+            return f"{pc:03X}"
+        return best_name if best_addr == pc else f"{best_name}+{pc - best_addr}"
+
+    def to_dict(self):
+        """Perfil completo em dicionário (pronto para JSON)"""
+        opcodes = {}
+        for opcode, count in self.op_counts.items():
+            cycles = self.op_cycles.get(opcode, 0)
+            opcodes[OPCODE_NAMES.get(opcode, f"{opcode:04X}")] = {
+                'count': count, 'cycles': cycles, 'cycles_per_instr': cycles / count}
+
+        branches = {}
+        for mpc in range(CONTROL_STORE_SIZE):
+            taken, not_taken = self.branch_taken[mpc], self.branch_not_taken[mpc]
+            if taken or not_taken:
+                branches[mpc] = {'routine': self._routine_name(mpc), 'taken': taken,
+                                 'not_taken': not_taken, 'taken_rate': taken / (taken + not_taken)}
+
+        return {
+            'opcodes': opcodes,
+            'mpc': {mpc: count for mpc, count in enumerate(self.mpc_counts) if count},
+            'pc': {pc: {'label': self.label_for(pc), 'count': count}
+                   for pc, count in enumerate(self.pc_counts) if count},
+            'branches': branches,
+        }
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def _routine_name(self, mpc):
+        """Nome da rotina que contém o MPC (a de início mais próximo abaixo)"""
+        base = mpc & 0xFF # Endereços com o bit JAM (256+) pertencem à mesma rotina
+        starts = [start for start in self.routine_of_mpc if start <= base]
+        if not starts:
+            return "FETCH"
+        return OPCODE_NAMES.get(self.routine_of_mpc[max(starts)], "?")
+
+    def report(self, top=10):
+        """Relatório em texto com os pontos quentes"""
+        data = self.to_dict()
+        lines = ["--- Opcodes (por microciclos) ---"]
+        for name, info in sorted(data['opcodes'].items(), key=lambda kv: -kv[1]['cycles']):
+            lines.append(f"  {name:<6} {info['count']:>10} instr {info['cycles']:>12} ciclos "
+                         f"({info['cycles_per_instr']:.1f}/instr)")
+
+        lines.append(f"--- Top {top} endereços do control store ---")
+        for mpc, count in sorted(data['mpc'].items(), key=lambda kv: -kv[1])[:top]:
+            lines.append(f"  MPC {mpc:<4} {self._routine_name(mpc):<6} {count:>12}")
+
+        lines.append(f"--- Top {top} PCs ---")
+        for pc, info in sorted(data['pc'].items(), key=lambda kv: -kv[1]['count'])[:top]:
+            lines.append(f"  {pc:03X} {info['label']:<20} {info['count']:>12}")
+
+        lines.append("--- Saltos JAM (N/Z) ---")
+        for mpc, info in sorted(data['branches'].items()):
+            lines.append(f"  MPC {mpc:<4} {info['routine']:<6} tomados {info['taken']:>10} "
+                         f"não tomados {info['not_taken']:>10} ({info['taken_rate']:.0%})")
+        return "\n".join(lines)
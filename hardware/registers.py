@@ -1,30 +1,86 @@
 # hardware/registers.py
-from config import MASK_16BIT
+from array import array
+from config import MASK_12BIT, MASK_16BIT
 
-class Register:
-    def __init__(self, name, value=0):
-        self.name = name
-        self._value = value & MASK_16BIT
+# --- Banco de Registradores ---
 
-    def write(self, value):
-        """Grava um valor garantindo que fique em 16 bits (Overflow)"""
-        self._value = value & MASK_16BIT
+REG_NAMES = ('None', 'PC', 'IR', 'SP', 'AC', 'MAR', 'MBR', 'TIR',
+             '0', '+1', '-1', 'AMASK', 'SMASK', 'A', 'B', 'C')
+REG_MASKS = (MASK_16BIT,) * 5 + (MASK_12BIT,) + (MASK_16BIT,) * 10 # MAR tem só 12 bits
+READ_ONLY = frozenset(range(8, 13)) # Constantes 0, +1, -1, AMASK, SMASK
+CONSTANTS = {8: 0, 9: 1, 10: 0xFFFF, 11: 0x0FFF, 12: 0x00FF}
 
-    def read(self):
-        """Lê o valor cru (unsigned)"""
-        return self._value
+class RegisterFile:
+    """
+    Os 16 registradores num único array('H') (16 bits sem sinal cada).
+    O CPU lê/escreve pelo índice (read/write ou direto em .values); as constantes
+    (8-12) ignoram escritas. regs[i] / regs.by_name('AC') devolvem uma "visão"
+    com read/write/read_signed, para a GUI e depuração.
+    As visões são criadas uma vez só: nada é alocado por acesso.
+    """
+    __slots__ = ('values', 'views')
 
-    def read_signed(self):
-        """Lê o valor como inteiro com sinal (Complemento de 2)"""
-        if self._value & 0x8000: # Se o bit 15 for 1
-            return self._value - 0x10000
-        return self._value
+    def __init__(self):
+        self.values = array('H', [0] * 16)
+        for index, value in CONSTANTS.items():
+            self.values[index] = value
+        self.views = tuple(RegisterView(self, i) for i in range(16))
+
+    def read(self, index):
+        return self.values[index]
+
+    def write(self, index, value):
+        if index in READ_ONLY:
+            return # Proteção de hardware: as constantes ignoram escritas
+        self.values[index] = value & REG_MASKS[index]
+
+    def load(self, values):
+        """Copia 16 valores de uma vez (ex: restaurar snapshot). Constantes ficam intactas."""
+        for index in range(16):
+            self.write(index, values[index])
+
+    def __getitem__(self, index):
+        return self.views[index]
+
+    def __len__(self):
+        return 16
+
+    def by_name(self, name):
+        return self.views[REG_NAMES.index(name)]
+
+    def named(self):
+        """{nome: valor} de todos os registradores (para exibir)"""
+        return dict(zip(REG_NAMES, self.values))
 
     def __str__(self):
-        return f"[{self.name}: {self._value:04X}]"
+        return " ".join(str(view) for view in self.views)
+
+class RegisterView:
+    """Um registrador do RegisterFile (read/write/read_signed, como um objeto à parte)"""
+    __slots__ = ('_file', 'index', 'name')
+
+    def __init__(self, register_file, index):
+        self._file = register_file
+        self.index = index
+        self.name = REG_NAMES[index]
+
+    @property
+    def mask(self):
+        return REG_MASKS[self.index]
+
+    @property
+    def read_only(self):
+        return self.index in READ_ONLY
+
+    def read(self):
+        return self._file.values[self.index]
 
-class ReadOnlyRegister(Register):
-    """Registrador que ignora escritas (para constantes como 0, +1, AMASK)"""
     def write(self, value):
-        # Ignora silenciosamente (proteção de hardware)
-        pass
\ No newline at end of file
+        self._file.write(self.index, value)
+
+    def read_signed(self):
+        value = self._file.values[self.index]
+        return value - 0x10000 if value & 0x8000 else value
+
+    def __str__(self):
+        return f"[{self.name}: {self.read():04X}]"
@@ -0,0 +1,238 @@
+# hardware/snapshot.py
+import pickle
+import struct
+import zlib
+from bisect import bisect_right
+from config import MEMORY_SIZE
+from hardware.cpu import STOP_BUDGET, RunResult
+from hardware.memory import POLICY_RANDOM
+from software.microcode import MicroInstruction, decode_microinstruction
+
+# --- Snapshot Binário (estado completo da máquina) ---
+#
+# [MAGIC][CPU][nº níveis de cache][cada nível][RAM opcional]
+#   CPU:   16 registradores, MPC, MIR, latches, resultado da ULA, subciclo, flags, halting, contadores
+#   Cache: contadores + relógio + cada linha (V, D, TAG, carimbo, dados) [+ estado do RANDOM]
+#   RAM:   busy_cycles + (flag, imagem comprimida com zlib)
+
+MAGIC = b'MIC1SNP2'
+CPU_STRUCT = struct.Struct('<16HHQHHHBBBBQQ')
+CACHE_STRUCT = struct.Struct('<8QI')  # 7 contadores + relógio, tamanho do estado do RANDOM
+LINE_STRUCT = struct.Struct('<BBHQ')  # valid, dirty, tag, stamp
+RAM_STRUCT = struct.Struct('<QB')     # busy_cycles, tem imagem?
+
+def save_snapshot(cpu, include_ram=True):
+    """Serializa o estado da CPU (e da cache/RAM) em bytes compactos"""
+    out = bytearray(MAGIC)
+    out += CPU_STRUCT.pack(*cpu.regs.values, cpu.MPC, cpu.MIR, cpu.latch_a, cpu.latch_b, cpu.alu_result,
+                           cpu.sub_cycle, cpu.alu.n_flag, cpu.alu.z_flag, cpu.halting,
+                           cpu.cycles, cpu.instructions)
+
+    levels = cpu.cache.levels()
+    out.append(len(levels))
+    for level in levels:
+        rnd = pickle.dumps(level._random.getstate()) if level.policy == POLICY_RANDOM else b''
+        out += CACHE_STRUCT.pack(level.read_hits, level.read_misses, level.write_hits,
+                                 level.write_misses, level.evictions, level.writebacks,
+                                 level.busy_cycles, level._clock, len(rnd))
+        out += rnd
+        for line in level.lines:
+            out += LINE_STRUCT.pack(line.valid, line.dirty, line.tag, line.stamp)
+            out += line.data.tobytes()
+
+    ram = cpu.ram
+    out += RAM_STRUCT.pack(ram.busy_cycles, include_ram)
+    if include_ram:
+        out += zlib.compress(ram._view.tobytes(), 1)
+    return bytes(out)
+
+def load_snapshot(cpu, blob):
+    """Restaura na CPU um estado salvo por save_snapshot (mesma configuração de cache)"""
+    if blob[:len(MAGIC)] != MAGIC:
+        raise ValueError("Snapshot inválido")
+    pos = len(MAGIC)
+
+    fields = CPU_STRUCT.unpack_from(blob, pos)
+    pos += CPU_STRUCT.size
+    cpu.regs.load(fields[:16])
+    (cpu.MPC, cpu.MIR, cpu.latch_a, cpu.latch_b, cpu.alu_result, cpu.sub_cycle,
+     n_flag, z_flag, halting, cpu.cycles, cpu.instructions) = fields[16:]
+    cpu.alu.n_flag = bool(n_flag)
+    cpu.alu.z_flag = bool(z_flag)
+    cpu.ctrl = MicroInstruction(**decode_microinstruction(cpu.MIR))
+    cpu.halting = bool(halting) # "JUMP fim" já decodificado: para na próxima fronteira
+
+    levels = cpu.cache.levels()
+    if blob[pos] != len(levels):
+        raise ValueError("Snapshot de uma hierarquia de cache diferente")
+    pos += 1
+    for level in levels:
+        (level.read_hits, level.read_misses, level.write_hits, level.write_misses,
+         level.evictions, level.writebacks, level.busy_cycles, level._clock,
+         rnd_size) = CACHE_STRUCT.unpack_from(blob, pos)
+        pos += CACHE_STRUCT.size
+        if rnd_size:
+            level._random.setstate(pickle.loads(blob[pos:pos + rnd_size]))
+            pos += rnd_size
+        data_size = 2 * level.block_size
+        for line in level.lines:
+            valid, dirty, line.tag, line.stamp = LINE_STRUCT.unpack_from(blob, pos)
+            line.valid = bool(valid)
+            line.dirty = bool(dirty)
+            pos += LINE_STRUCT.size
+            line.data.cast('B')[:] = blob[pos:pos + data_size]
+            pos += data_size
+
+    ram = cpu.ram
+    ram.busy_cycles, has_ram = RAM_STRUCT.unpack_from(blob, pos)
+    pos += RAM_STRUCT.size
+    if has_ram:
+        ram._view.cast('B')[:] = zlib.decompress(blob[pos:])
+
+# --- Execução Reversa ---
+
+class ReverseDebugger:
+    """
+    Volta no tempo com checkpoints periódicos + log de desfazer da RAM.
+      - A cada 'interval' ciclos guarda um snapshot SEM a RAM (só CPU + cache);
+      - Toda escrita na RAM guarda (endereço, valor antigo) no log de desfazer;
+      - Voltar para o ciclo T = restaurar o checkpoint <= T, desfazer o log até ele
+        e reexecutar (rápido) até T. Custa no máximo ~interval ciclos de reexecução.
+    Use debugger.run(...) (em vez de cpu.run_until) para os checkpoints serem criados.
+    """
+    def __init__(self, cpu, interval=10_000, max_checkpoints=None):
+        self.cpu = cpu
+        self.interval = interval
+        self.max_checkpoints = max_checkpoints
+        self._log = []       # (endereço, valor antigo) ou (início, array com o bloco antigo)
+        self._log_base = 0   # Índice absoluto do _log[0] (o começo é descartado com os checkpoints)
+        self._checkpoints = [] # (ciclo, snapshot sem RAM, índice absoluto no log)
+        self._install_ram_log()
+        self._checkpoint()
+
+    def _install_ram_log(self):
+        """Troca write/write_block da RAM (só desta instância) por versões que registram o antigo"""
+        ram = self.cpu.ram
+        log = self._log
+        read, write, write_block = ram.read, ram.write, ram.write_block
+
+        def logged_write(addr, value):
+            if 0 <= addr < MEMORY_SIZE:
+                log.append((addr, read(addr)))
+            write(addr, value)
+
+        def logged_write_block(start_addr, words):
+            log.append((start_addr, ram.dump_image(start_addr, start_addr + len(words))))
+            write_block(start_addr, words)
+
+        ram.write = logged_write
+        ram.write_block = logged_write_block
+
+    def detach(self):
+        """Desliga o log (volta os métodos originais da RAM)"""
+        del self.cpu.ram.write
+        del self.cpu.ram.write_block
+
+    # --- Checkpoints ---
+
+    def _checkpoint(self):
+        cpu = self.cpu
+        cps = self._checkpoints
+        if cps and cps[-1][0] == cpu.cycles:
+            return
+        cps.append((cpu.cycles, save_snapshot(cpu, include_ram=False), self._log_base + len(self._log)))
+        if self.max_checkpoints and len(cps) > self.max_checkpoints:
+            # Esquece o checkpoint mais antigo e o pedaço do log que só ele usava
+            del cps[0]
+            drop = cps[0][2] - self._log_base
+            del self._log[:drop]
+            self._log_base += drop
+
+    @property
+    def oldest_cycle(self):
+        """Ciclo mais antigo para onde ainda dá para voltar"""
+        return self._checkpoints[0][0]
+
+    # --- Execução para frente ---
+
+    def run(self, max_cycles, **stop):
+        """
+        Igual ao cpu.run_until(max_cycles, **stop), mas em pedaços de 'interval'
+        ciclos, guardando um checkpoint em cada fronteira.
+        """
+        cpu = self.cpu
+        cycles = instructions = stalls = 0
+        reason, detail = STOP_BUDGET, None
+        while cycles < max_cycles:
+            next_cp = (cpu.cycles // self.interval + 1) * self.interval
+            chunk = min(max_cycles - cycles, next_cp - cpu.cycles)
+            result = cpu.run_until(chunk, **stop)
+            cycles += result.cycles
+            instructions += result.instructions
+            stalls += result.stall_cycles
+            reason, detail = result.reason, result.detail
+            if cpu.cycles % self.interval == 0 and cpu.sub_cycle == 1:
+                self._checkpoint()
+            if reason != STOP_BUDGET:
+                break
+        return RunResult(reason, cycles, instructions, detail, stalls)
+
+    # --- Execução para trás ---
+
+    def goto(self, cycle):
+        """Coloca a máquina exatamente no estado do início do ciclo 'cycle' (passado ou futuro)"""
+        cpu = self.cpu
+        if cycle < self.oldest_cycle:
+            raise ValueError(f"Ciclo {cycle} anterior ao checkpoint mais antigo ({self.oldest_cycle})")
+        if cycle < cpu.cycles or cpu.sub_cycle != 1:
+            k = bisect_right(self._checkpoints, cycle, key=lambda cp: cp[0]) - 1
+            cp_cycle, blob, log_index = self._checkpoints[k]
+            self._undo_ram(log_index)
+            load_snapshot(cpu, blob)
+            del self._checkpoints[k + 1:]
+        if cycle > cpu.cycles:
+            # Reexecuta sem paradas de halt/PC (mesma sequência da primeira vez)
+            self.run(cycle - cpu.cycles, stop_on_halt=False)
+
+    def step_back(self, cycles=1):
+        """Volta 'cycles' microinstruções"""
+        self.goto(max(self.oldest_cycle, self.cpu.cycles - cycles))
+
+    def reverse_continue(self, write_addr):
+        """
+        Volta até logo depois da última escrita em 'write_addr' (endereço ou coleção).
+        Retorna o ciclo encontrado, ou None (e para no ciclo mais antigo) se não houve escrita.
+        """
+        cpu = self.cpu
+        # Só valem escritas que terminaram ANTES do ciclo atual
+        end = cpu.cycles - 1
+        k = bisect_right(self._checkpoints, end, key=lambda cp: cp[0]) - 1
+        while k >= 0:
+            start = self._checkpoints[k][0]
+            self.goto(start)
+            # Reexecuta o trecho [start, end) procurando a última escrita vigiada
+            found = None
+            while cpu.cycles < end:
+                result = self.run(end - cpu.cycles, write_addr=write_addr, stop_on_halt=False)
+                if result.reason == "mem_write":
+                    found = cpu.cycles
+                elif result.reason != STOP_BUDGET:
+                    break
+            if found is not None:
+                self.goto(found)
+                return found
+            end = start
+            k -= 1
+        self.goto(self.oldest_cycle)
+        return None
+
+    def _undo_ram(self, log_index):
+        """Desfaz as escritas na RAM (da mais nova para a mais velha) até o índice do log"""
+        ram = self.cpu.ram
+        keep = log_index - self._log_base
+        for addr, old in reversed(self._log[keep:]):
+            if isinstance(old, int):
+                ram._data[addr] = old
+            else:
+                ram._view[addr:addr + len(old)] = memoryview(old)
+        del self._log[keep:]
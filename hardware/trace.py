@@ -0,0 +1,174 @@
+# hardware/trace.py
+import struct
+import sys
+from array import array
+from collections import deque
+
+# --- Níveis de Trace (cumulativos: cada nível inclui os anteriores) ---
+TRACE_OFF = 0           # Nada (caminho rápido do CPU.run)
+TRACE_INSTRUCTION = 1   # Uma linha por instrução decodificada (JAM JUMP)
+TRACE_MICRO = 2         # Uma linha por microinstrução executada
+TRACE_MEMORY = 3        # + Cada acesso rd/wr na cache (HIT/MISS)
+
+LEVEL_NAMES = {'off': TRACE_OFF, 'instruction': TRACE_INSTRUCTION,
+               'micro': TRACE_MICRO, 'memory': TRACE_MEMORY}
+
+# --- Tipos de Evento ---
+# Todo evento é (tipo, ciclo, x, y, z), com x/y/z inteiros de 16 bits:
+EV_INSTR = 0        # x=PC da instrução, y=IR, z=MPC destino
+EV_UINST = 1        # x=MPC, y=resultado da ULA, z=próximo MPC
+EV_MEM_READ = 2     # x=endereço, y=valor, z=1 se HIT / 0 se MISS
+EV_MEM_WRITE = 3    # x=endereço, y=valor, z=1 se HIT / 0 se MISS
+
+def format_event(kind, cycle, x, y, z):
+    """Texto legível de um evento (mesmo estilo das mensagens antigas)"""
+    if kind == EV_INSTR:
+        return f"[{cycle:>8}] [DECODE] PC={x:03X} IR={y:04X} -> Salto para MPC {z}"
+    if kind == EV_UINST:
+        return f"[{cycle:>8}] [UINST] MPC={x:<3} ULA={y:04X} -> Próximo MPC {z}"
+    op = "Read" if kind == EV_MEM_READ else "Write"
+    status = "Hit" if z else "Miss"
+    return f"[{cycle:>8}] [CACHE] {op} {status}! Endereço {x} Valor {y:04X}"
+
+# --- Sinks (Para onde os eventos vão) ---
+
+class StdoutSink:
+    """Imprime cada evento na tela (lento: use só para depurar)"""
+    def write(self, kind, cycle, x, y, z):
+        print(format_event(kind, cycle, x, y, z))
+
+    def close(self):
+        pass
+
+class RingBufferSink:
+    """Guarda só os últimos N eventos na memória (ótimo para post-mortem)"""
+    def __init__(self, capacity=4096):
+        self.events = deque(maxlen=capacity)
+        self.write = self._append # Evita uma chamada extra por evento
+
+    def _append(self, kind, cycle, x, y, z):
+        self.events.append((kind, cycle, x, y, z))
+
+    def dump(self):
+        """Retorna os eventos guardados como texto"""
+        return "\n".join(format_event(*ev) for ev in self.events)
+
+    def close(self):
+        pass
+
+class BinaryFileSink:
+    """
+    Grava eventos num arquivo binário compacto (15 bytes por evento).
+    Os registros são acumulados num buffer e gravados em blocos.
+    """
+    MAGIC = b'MIC1TRC1'
+    RECORD = struct.Struct('<BQHHH') # tipo, ciclo, x, y, z
+
+    def __init__(self, path, buffer_events=65536):
+        self._file = open(path, 'wb')
+        self._file.write(self.MAGIC)
+        self._buf = bytearray()
+        self._limit = buffer_events * self.RECORD.size
+        self._pack = self.RECORD.pack
+
+    def write(self, kind, cycle, x, y, z):
+        self._buf += self._pack(kind, cycle, x, y, z)
+        if len(self._buf) >= self._limit:
+            self.flush()
+
+    def flush(self):
+        self._file.write(self._buf)
+        self._buf.clear()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def read_binary_trace(path):
+    """Lê um arquivo gerado pelo BinaryFileSink (gera tuplas de evento)"""
+    with open(path, 'rb') as f:
+        if f.read(len(BinaryFileSink.MAGIC)) != BinaryFileSink.MAGIC:
+            raise ValueError(f"Arquivo de trace inválido: {path}")
+        data = f.read()
+    yield from BinaryFileSink.RECORD.iter_unpack(data)
+
+class Tracer:
+    """
+    Liga o CPU a um sink com um nível de detalhe.
+    Com cpu.tracer = None (padrão) o CPU.run() usa o laço sem nenhum trace.
+    """
+    def __init__(self, level=TRACE_INSTRUCTION, sink=None):
+        if isinstance(level, str):
+            level = LEVEL_NAMES[level]
+        self.level = level
+        self.sink = sink if sink is not None else StdoutSink()
+
+    def emit(self, kind, cycle, x, y, z):
+        self.sink.write(kind, cycle, x, y, z)
+
+    def close(self):
+        self.sink.close()
+
+# --- Trace só de acessos à memória (para análise de cache offline) ---
+
+class MemoryTraceWriter:
+    """
+    Grava cada acesso rd/wr que chega na L1 (endereço, leitura/escrita, ciclo) num
+    arquivo binário compacto: 4 bytes por acesso, gravados em blocos.
+    Ligue com cpu.memory_trace = MemoryTraceWriter(caminho) e feche no final (close).
+    Registro (uint32 little-endian):  delta do ciclo (19 bits) | escrita (1 bit) | endereço (12 bits)
+    Delta >= DELTA_ESCAPE: o registro leva DELTA_ESCAPE e o delta vai inteiro na palavra seguinte.
+    """
+    MAGIC = b'MIC1MEM1'
+    DELTA_ESCAPE = (1 << 19) - 1
+
+    def __init__(self, path, buffer_records=65536):
+        self._file = open(path, 'wb')
+        self._file.write(self.MAGIC)
+        self._buf = array('I')
+        self._limit = buffer_records
+        self._last = 0
+        self.accesses = 0
+
+    def record(self, cycle, addr, write):
+        delta = cycle - self._last
+        self._last = cycle
+        if delta < self.DELTA_ESCAPE:
+            self._buf.append(delta << 13 | write << 12 | addr)
+        else:
+            self._buf.append(self.DELTA_ESCAPE << 13 | write << 12 | addr)
+            self._buf.append(delta)
+        self.accesses += 1
+        if len(self._buf) >= self._limit:
+            self.flush()
+
+    def flush(self):
+        if sys.byteorder != 'little':
+            self._buf.byteswap()
+        self._buf.tofile(self._file)
+        self._buf = array('I')
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def read_memory_trace(path):
+    """Lê um arquivo do MemoryTraceWriter (gera tuplas (ciclo, endereço, escrita))"""
+    with open(path, 'rb') as f:
+        if f.read(len(MemoryTraceWriter.MAGIC)) != MemoryTraceWriter.MAGIC:
+            raise ValueError(f"Arquivo de trace de memória inválido: {path}")
+        words = array('I')
+        words.frombytes(f.read())
+    if sys.byteorder != 'little':
+        words.byteswap()
+    escape = MemoryTraceWriter.DELTA_ESCAPE
+    cycle = 0
+    items = iter(words)
+    for word in items:
+        delta = word >> 13
+        if delta == escape:
+            delta = next(items)
+        cycle += delta
+        yield cycle, word & 0x0FFF, (word >> 12) & 1
@@ -0,0 +1,191 @@
+# hardware/vector_cpu.py
+"""
+Motor "em lote": N máquinas MIC-1 rodando o MESMO microprograma em passo travado (lockstep).
+Registradores, MPC, flags e RAM de todas as instâncias ficam em arrays NumPy e cada
+microinstrução é executada de uma vez para todas as máquinas ainda ativas.
+
+Requer NumPy. Não modela a cache: como a cache é coerente com a RAM numa CPU só,
+os valores calculados são os mesmos do CPU normal (só as estatísticas de cache/tempo não existem).
+"""
+import numpy as np
+from config import MEMORY_SIZE
+from hardware.cpu import CPU, STOP_BUDGET, STOP_HALT, STOP_BAD_OPCODE, STOP_BAD_MPC
+from software.isa import OPCODES
+from software.microcode import CONTROL_STORE_SIZE, DECODED_STORE, OPCODE_MAP
+
+# Situação de cada instância
+RUNNING, HALTED, BAD_OPCODE, BAD_MPC = 0, 1, 2, 3
+STATUS_REASON = {RUNNING: STOP_BUDGET, HALTED: STOP_HALT,
+                 BAD_OPCODE: STOP_BAD_OPCODE, BAD_MPC: STOP_BAD_MPC}
+
+READ_ONLY_REGS = range(8, 13) # Constantes 0, +1, -1, AMASK, SMASK
+CONSTANTS = {8: 0, 9: 1, 10: 0xFFFF, 11: 0x0FFF, 12: 0x00FF}
+
+def _field_tables(decoded_store):
+    """Control store em 'struct of arrays': um array de 512 posições por campo"""
+    fields = {name: np.zeros(CONTROL_STORE_SIZE, dtype=np.int64)
+              for name in ('addr', 'a', 'b', 'c', 'enc', 'wr', 'rd', 'mar', 'mbr',
+                           'sh', 'alu', 'cond', 'amux')}
+    valid = np.zeros(CONTROL_STORE_SIZE, dtype=bool)
+    for mpc, u in enumerate(decoded_store):
+        if u is None:
+            continue
+        valid[mpc] = True
+        # Mesmas dobras do CPU: escrita em constante some; escrita no MAR vira o bit 'mar'
+        if u.enc and u.c in READ_ONLY_REGS:
+            u = u._replace(enc=0)
+        elif u.enc and u.c == 5:
+            u = u._replace(enc=0, mar=1)
+        for name in fields:
+            fields[name][mpc] = getattr(u, name)
+    return fields, valid
+
+def _dispatch_table(opcode_map):
+    """IR >> 8 -> MPC da rotina (-1 = opcode desconhecido), igual ao JAM JUMP do CPU"""
+    table = np.full(256, -1, dtype=np.int64)
+    for high in range(256):
+        if (high >> 4) == 0xF:
+            opcode = high << 8         # Estendidas: 8 bits superiores
+        else:
+            opcode = (high >> 4) << 12 # Normais: 4 bits superiores
+        table[high] = opcode_map.get(opcode, -1)
+    return table
+
+class VectorCPU:
+    def __init__(self, n, decoded_store=DECODED_STORE, opcode_map=OPCODE_MAP):
+        self.n = n
+        self.fields, self.valid = _field_tables(decoded_store)
+        self.dispatch = _dispatch_table(opcode_map)
+
+        self.regs = np.zeros((n, 16), dtype=np.int64)
+        for index, value in CONSTANTS.items():
+            self.regs[:, index] = value
+        self.ram = np.zeros((n, MEMORY_SIZE), dtype=np.uint16)
+        self.mpc = np.zeros(n, dtype=np.int64)
+        self.alu_result = np.zeros(n, dtype=np.int64) # Flags N/Z saem daqui
+        self.halting = np.zeros(n, dtype=bool)
+        self.status = np.full(n, RUNNING, dtype=np.int8)
+        self.cycles = np.zeros(n, dtype=np.int64)
+        self.instructions = np.zeros(n, dtype=np.int64)
+
+    # --- Carga / Leitura ---
+
+    def load_image(self, words, start=0):
+        """Mesmo programa em todas as instâncias"""
+        words = np.asarray([w & 0xFFFF for w in words], dtype=np.uint16)
+        self.ram[:, start:start + len(words)] = words
+
+    def write_column(self, addr, values):
+        """Um valor por instância no endereço 'addr' (ex: entradas diferentes)"""
+        self.ram[:, addr] = np.asarray(values, dtype=np.int64) & 0xFFFF
+
+    @property
+    def n_flag(self):
+        return (self.alu_result & 0x8000) != 0
+
+    @property
+    def z_flag(self):
+        return self.alu_result == 0
+
+    def reasons(self):
+        """Motivo de parada (STOP_*) de cada instância"""
+        return [STATUS_REASON[s] for s in self.status.tolist()]
+
+    def to_cpu(self, i):
+        """Copia a instância i para um CPU normal (cache fria) — útil para conferir/depurar"""
+        cpu = CPU()
+        cpu.regs.load(self.regs[i].tolist())
+        cpu.ram.load_image(self.ram[i].tolist())
+        cpu.MPC = int(self.mpc[i])
+        cpu.alu_result = int(self.alu_result[i])
+        cpu.alu.n_flag = bool(self.alu_result[i] & 0x8000)
+        cpu.alu.z_flag = self.alu_result[i] == 0
+        cpu.cycles = int(self.cycles[i])
+        cpu.instructions = int(self.instructions[i])
+        return cpu
+
+    # --- Execução ---
+
+    def run(self, max_cycles, stop_on_halt=True):
+        """
+        Avança todas as instâncias ativas até max_cycles microinstruções.
+        Instâncias que param (halt/erro) são mascaradas e não andam mais.
+        Retorna quantas instâncias ainda estão rodando.
+        """
+        f = self.fields
+        addr_t, a_t, b_t, c_t = f['addr'], f['a'], f['b'], f['c']
+        enc_t, wr_t, rd_t, mar_t, mbr_t = f['enc'], f['wr'], f['rd'], f['mar'], f['mbr']
+        sh_t, alu_t, cond_t, amux_t = f['sh'], f['alu'], f['cond'], f['amux']
+        valid, dispatch = self.valid, self.dispatch
+        regs, ram, mpc = self.regs, self.ram, self.mpc
+        op_jump = OPCODES['JUMP']
+
+        idx = np.flatnonzero(self.status == RUNNING)
+        for _ in range(max_cycles):
+            if idx.size == 0:
+                break
+            m = mpc[idx]
+
+            # Fronteira de instrução: quem estava terminando um "JUMP para si mesmo" para aqui
+            if stop_on_halt:
+                done = (m == 0) & self.halting[idx]
+                if done.any():
+                    self.status[idx[done]] = HALTED
+                    idx, m = idx[~done], m[~done]
+            bad = ~valid[m]
+            if bad.any():
+                self.status[idx[bad]] = BAD_MPC
+                idx, m = idx[~bad], m[~bad]
+            if idx.size == 0:
+                break
+
+            k = np.arange(idx.size)
+            r = regs[idx]
+
+            # Subciclos 2 e 3: latches + ULA + deslocador
+            la = np.where(amux_t[m] == 1, r[:, 6], r[k, a_t[m]])
+            lb = r[k, b_t[m]]
+            alu = alu_t[m]
+            res = np.select([alu == 0, alu == 1, alu == 2],
+                            [(la + lb) & 0xFFFF, la & lb, la], ~la & 0xFFFF)
+            sh = sh_t[m]
+            res = np.select([sh == 1, sh == 2],
+                            [(res >> 1) | (res & 0x8000), (res << 8) & 0xFFFF], res)
+
+            # Subciclo 4: write back (mesma ordem do CPU: MAR, MBR, C, rd, wr)
+            r[:, 5] = np.where(mar_t[m] == 1, res & 0x0FFF, r[:, 5])
+            r[:, 6] = np.where(mbr_t[m] == 1, res, r[:, 6])
+            e = np.flatnonzero(enc_t[m])
+            r[e, c_t[m][e]] = res[e]
+            rd = np.flatnonzero(rd_t[m])
+            if rd.size:
+                r[rd, 6] = ram[idx[rd], r[rd, 5]]
+            wr = np.flatnonzero(wr_t[m])
+            if wr.size:
+                ram[idx[wr], r[wr, 5]] = r[wr, 6]
+
+            # Próximo endereço (JAM)
+            addr = addr_t[m]
+            cond = cond_t[m]
+            jam = ((cond == 1) & ((res & 0x8000) != 0)) | ((cond == 2) & (res == 0))
+            nxt = np.where(jam, addr | 0x100, addr)
+            decode = cond == 3
+            ir = r[:, 2]
+            target = dispatch[ir >> 8]
+            nxt = np.where(decode, target, nxt)
+
+            bad_op = decode & (target < 0)
+            if stop_on_halt:
+                self_jump = decode & ((ir & 0xF000) == op_jump) & ((ir & 0x0FFF) == r[:, 1] - 1)
+                self.halting[idx[self_jump]] = True
+            self.instructions[idx] += (~decode) & (nxt == 0)
+
+            regs[idx] = r
+            mpc[idx] = np.where(bad_op, 0, nxt)
+            self.alu_result[idx] = res
+            self.cycles[idx] += 1
+            if bad_op.any():
+                self.status[idx[bad_op]] = BAD_OPCODE
+                idx = idx[~bad_op]
+
+        return int((self.status == RUNNING).sum())
@@ -23,23 +23,22 @@ def main():
     print("\nIniciando CPU e Carregando Memória...")
     cpu = CPU()
     
-    for addr, value in enumerate(program_bin):
-        cpu.ram.write(addr, value)
+    cpu.ram.load_image(program_bin)
         
     print("\nRodando Simulação (Aguarde)...")
-    
-    # Rodamos 200 ciclos para garantir que dê tempo de fazer todas as operações
-    for i in range(1000): 
-        cpu.step()
-        # Se quiser ver o log detalhado, descomente abaixo, mas vai ficar grande:
-        # pc = cpu.regs[1].read()
-        # print(f"   [Ciclo {i}] PC={pc} AC={cpu.regs[4].read():04X}")
+
+    # Roda até o programa cair no "fim: JUMP fim" (ou estourar o orçamento de ciclos)
+    result = cpu.run_until(max_cycles=100_000)
+    print(f"Parada: {result.reason} após {result.cycles} microciclos "
+          f"({result.instructions} instruções, PC={cpu.regs[1].read()})")
+    print(f"Tempo: {result.total_cycles} ciclos ({result.stall_cycles} de stall), CPI = {result.cpi:.2f}")
 
     # 4. MUDANÇA AQUI: Verificação do Resultado
     # No teste_complexo.asm:
     # Endereço 3 (res) deve ser -10 (0xFFF6)
     # Endereço 4 (status) deve ser 1 (Sucesso)
     
+    cpu.cache.flush() # Com write-back, a RAM só fica atualizada depois do flush
     val_res = cpu.ram.read(3)
     val_status = cpu.ram.read(4)
     
@@ -0,0 +1,49 @@
+# programs/bench/desvios.asm
+# Benchmark: desvios dependentes de dados. x += 40503 (mod 2^16) 5000 vezes;
+# conta quantas vezes x ficou negativo, zero ou positivo (JNEG / JZER / JPOS).
+# EXPECT neg=2499 zeros=0 pos=2501 cont=0
+
+JUMP inicio
+
+x:     .DATA 0
+passo: .DATA 40503
+cont:  .DATA 5000
+neg:   .DATA 0
+zeros: .DATA 0
+pos:   .DATA 0
+um:    .DATA 1
+
+inicio:
+laco:
+    LODD x
+    ADDD passo
+    STOD x
+    JNEG negativo
+    JZER zero
+    JPOS positivo
+
+negativo:
+    LODD neg
+    ADDD um
+    STOD neg
+    JUMP proximo
+
+zero:
+    LODD zeros
+    ADDD um
+    STOD zeros
+    JUMP proximo
+
+positivo:
+    LODD pos
+    ADDD um
+    STOD pos
+
+proximo:
+    LODD cont
+    SUBD um
+    STOD cont
+    JNZE laco
+
+fim:
+    JUMP fim
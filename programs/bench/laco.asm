@@ -0,0 +1,35 @@
+# programs/bench/laco.asm
+# Benchmark: laços aninhados (contadores na memória, poucos acessos diferentes)
+# externo = 50 voltas, interno = 200 voltas, total += 3 em cada volta interna
+# 50 * 200 * 3 = 30000
+# EXPECT total=30000 externo=0 interno=0
+
+JUMP inicio
+
+total:   .DATA 0
+externo: .DATA 50
+interno: .DATA 0
+voltas:  .DATA 200
+tres:    .DATA 3
+um:      .DATA 1
+
+inicio:
+fora:
+    LODD voltas
+    STOD interno
+dentro:
+    LODD total
+    ADDD tres
+    STOD total
+    LODD interno
+    SUBD um
+    STOD interno
+    JNZE dentro
+
+    LODD externo
+    SUBD um
+    STOD externo
+    JNZE fora
+
+fim:
+    JUMP fim
@@ -0,0 +1,42 @@
+# programs/bench/pilha.asm
+# Benchmark: pilha. Empilha n, n-1, ..., 1 (PUSH) e desempilha somando (POP), em 10 passadas.
+# A pilha começa no topo da memória (SP = 0 -> primeiro PUSH vai para 0xFFF).
+# Soma de 1..500 = 125250 = 59714 em 16 bits
+# EXPECT soma=59714 passadas=0
+
+JUMP inicio
+
+soma:     .DATA 0
+cont:     .DATA 0
+passadas: .DATA 10
+n:        .DATA 500
+um:       .DATA 1
+
+inicio:
+passada:
+    LOCO 0
+    STOD soma
+    LODD n
+empilha:
+    PUSH
+    SUBD um
+    JNZE empilha
+
+    LODD n
+    STOD cont
+desempilha:
+    POP
+    ADDD soma
+    STOD soma
+    LODD cont
+    SUBD um
+    STOD cont
+    JNZE desempilha
+
+    LODD passadas
+    SUBD um
+    STOD passadas
+    JNZE passada
+
+fim:
+    JUMP fim
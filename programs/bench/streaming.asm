@@ -0,0 +1,59 @@
+# programs/bench/streaming.asm
+# Benchmark: streaming de memória. Preenche vetor[i] = i (256 palavras, 4x a cache)
+# e depois soma o vetor inteiro, em 8 passadas.
+# Sem acesso indireto na ISA implementada: o endereço vetor+i é montado
+# dentro de uma instrução (código auto-modificável: STOD/LODD vetor+i).
+# Soma de 0..255 = 32640
+# EXPECT soma=32640 passadas=0
+
+JUMP inicio
+
+i:        .DATA 0
+soma:     .DATA 0
+passadas: .DATA 8
+n:        .DATA 256
+um:       .DATA 1
+op_stod:  .DATA 4096    # Opcode do STOD (0x1000); o do LODD é 0
+
+inicio:
+passada:
+    LOCO 0
+    STOD i
+    STOD soma
+
+enche:                  # vetor[i] = i
+    LOCO vetor
+    ADDD i
+    ADDD op_stod
+    STOD grava
+    LODD i
+grava: .DATA 0          # Vira "STOD vetor+i"
+    ADDD um
+    STOD i
+    SUBD n
+    JNEG enche
+
+    LOCO 0
+    STOD i
+soma_laco:              # soma += vetor[i]
+    LOCO vetor
+    ADDD i
+    STOD le
+le: .DATA 0             # Vira "LODD vetor+i"
+    ADDD soma
+    STOD soma
+    LODD i
+    ADDD um
+    STOD i
+    SUBD n
+    JNEG soma_laco
+
+    LODD passadas
+    SUBD um
+    STOD passadas
+    JNZE passada
+
+fim:
+    JUMP fim
+
+vetor: .DATA 0          # Início do vetor (as 255 palavras seguintes estão livres)
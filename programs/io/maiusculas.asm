@@ -0,0 +1,33 @@
+# programs/io/maiusculas.asm
+# Filtro de E/S: lê bytes da entrada (porta 0x800) até o fim (0xFFFF, negativo),
+# troca a-z por A-Z e escreve na saída (porta 0x802).
+#   python -m tools.stream programs/io/maiusculas.asm --input texto.txt --output saida.txt
+# Fica em programs/io/ (fora do tools.batch programs/): sem as portas, nunca chega ao fim.
+
+JUMP inicio
+
+c:     .DATA 0
+a_min: .DATA 97
+z_max: .DATA 123
+dif:   .DATA 32
+
+inicio:
+laco:
+    LODD 0x800
+    JNEG fim
+    STOD c
+    SUBD a_min
+    JNEG escreve
+    LODD c
+    SUBD z_max
+    JPOS escreve
+    LODD c
+    SUBD dif
+    STOD c
+escreve:
+    LODD c
+    STOD 0x802
+    JUMP laco
+
+fim:
+    JUMP fim
@@ -0,0 +1,53 @@
+# programs/multicore_soma.asm
+# Soma paralela de 1..N (SPMD, hardware/multicore.py): o núcleo i soma i+1, i+1+n,
+# i+1+2n, ... e depois acrescenta a sua parcial ao 'total' quando chega a vez dele
+# (passagem de vez em anel: sem instrução atômica, um núcleo escreve no 'total' por vez).
+#   python -m tools.multicore programs/multicore_soma.asm --cores 4
+#   python -m tools.multicore programs/multicore_soma.asm --cores 8 --epoch 10000
+# Convenções do multi-core: AC = número do núcleo no início; 0x700-0x73F é a memória
+# local de cada núcleo. O tools.multicore grava o número de núcleos em 'ncores'.
+# Com 1 núcleo (CPU comum) soma 1..200.
+# EXPECT total=20100 vez=1
+
+JUMP inicio
+
+ncores: .DATA 1     # Núcleos rodando (N = faixa * ncores)
+faixa:  .DATA 200   # Números somados por núcleo
+um:     .DATA 1
+total:  .DATA 0
+vez:    .DATA 0     # Núcleo que pode somar no total agora
+
+# Memória local: 0x700 = id, 0x701 = k, 0x702 = contador, 0x703 = parcial
+inicio:
+    STOD 0x700
+    ADDD um
+    STOD 0x701      # k = id + 1
+    LODD faixa
+    STOD 0x702
+    LOCO 0
+    STOD 0x703
+laco:
+    LODD 0x703
+    ADDD 0x701
+    STOD 0x703      # parcial += k
+    LODD 0x701
+    ADDD ncores
+    STOD 0x701      # k += ncores
+    LODD 0x702
+    SUBD um
+    STOD 0x702
+    JNZE laco
+
+espera:
+    LODD vez
+    SUBD 0x700
+    JNZE espera     # Ainda não é a vez deste núcleo
+    LODD total
+    ADDD 0x703
+    STOD total
+    LODD vez
+    ADDD um
+    STOD vez        # Passa a vez para o próximo
+
+fim:
+    JUMP fim
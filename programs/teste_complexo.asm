@@ -1,6 +1,7 @@
 # programs/teste_complexo.asm
 # Teste de Pilha, Subtração e Flags (JNEG)
 # Objetivo: 10 - 20 = -10 -> Deve ativar flag N e pular.
+# EXPECT res=-10 status=1
 
 JUMP inicio
 
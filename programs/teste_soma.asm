@@ -1,5 +1,6 @@
 # programs/teste_soma.asm
 # Programa Simples: Soma A + B e guarda em C
+# EXPECT var_c=40
 
 # --- Dados ---
 # Vamos pular as primeiras posições para o código
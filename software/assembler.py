@@ -1,22 +1,44 @@
 # software/assembler.py
 from software.isa import OPCODES
+from software.objfile import ObjectImage, source_hash
 
 class Assembler:
     def __init__(self):
         self.symbol_table = {} # Guarda { "inicio": 0, "loop": 5 }
         self.machine_code = [] # Lista final de números para a RAM
+        self.relocations = []  # Endereços das palavras cujo operando é um rótulo
+        self.line_map = []     # Linha do fonte (1, 2, ...) de cada palavra gerada
 
     def assemble(self, filepath):
         """Lê um arquivo .asm e retorna uma lista de inteiros (binário)"""
-        
+
         with open(filepath, 'r') as f:
             lines = f.readlines()
+        return self.assemble_lines(lines)
+
+    def assemble_object(self, filepath):
+        """Monta o arquivo e devolve um ObjectImage (código + símbolos + relocações + linhas)"""
+        with open(filepath, 'rb') as f:
+            return self.assemble_source(f.read())
+
+    def assemble_source(self, source):
+        """Monta o fonte (bytes) e devolve um ObjectImage"""
+        self.assemble_lines(source.decode('utf-8').splitlines())
+        return ObjectImage(self.machine_code, self.symbol_table, self.relocations,
+                           self.line_map, source_hash(source))
+
+    def assemble_lines(self, lines):
+        """Monta uma lista de linhas de código. Cada chamada começa do zero."""
+        self.symbol_table = {}
+        self.machine_code = []
+        self.relocations = []
+        self.line_map = []
 
         # --- PASS 1: Mapear Rótulos (Labels) ---
         address_counter = 0
-        clean_lines = [] # Guarda linhas limpas para o passo 2
+        clean_lines = [] # Guarda (nº da linha, linha limpa) para o passo 2
 
-        for line in lines:
+        for line_number, line in enumerate(lines, start=1):
             # 1. Limpeza: Remove comentários (#) e espaços extras
             code = line.split('#')[0].strip()
             if not code: continue # Linha vazia
@@ -33,14 +55,15 @@ class Assembler:
                 self.symbol_table[label_part.strip()] = address_counter
                 code = instr_part.strip()
 
-            clean_lines.append(code)
+            clean_lines.append((line_number, code))
             address_counter += 1 # Cada instrução ocupa 1 espaço (16 bits)
 
         # --- PASS 2: Tradução para Binário ---
-        for code in clean_lines:
+        for line_number, code in clean_lines:
             parts = code.split()
             mnemonic = parts[0].upper()
-            
+            self.line_map.append(line_number)
+
             # Caso especial: .DATA (Apenas guarda um número)
             if mnemonic == '.DATA':
                 value = int(parts[1])
@@ -56,10 +79,12 @@ class Assembler:
             # Verifica se tem operando (Ex: LODD 10 ou JUMP inicio)
             if len(parts) > 1:
                 operand_str = parts[1]
-                
+
                 # Se for um Rótulo conhecido, usa o endereço dele
                 if operand_str in self.symbol_table:
                     operand_val = self.symbol_table[operand_str]
+                    # Endereço depende de onde o programa for carregado
+                    self.relocations.append(len(self.machine_code))
                 else:
                     # Tenta converter número (suporta decimal e hex 0x...)
                     try:
@@ -73,4 +98,4 @@ class Assembler:
             final_instr = base_opcode | (operand_val & 0x0FFF)
             self.machine_code.append(final_instr)
 
-        return self.machine_code
\ No newline at end of file
+        return self.machine_code
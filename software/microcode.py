@@ -1,4 +1,5 @@
 # software/microcode.py
+from collections import namedtuple
 
 R_MASK = {
     'None': 0, 'PC': 1, 'IR': 2, 'SP': 3, 'AC': 4, 'MAR': 5, 'MBR': 6,
@@ -28,6 +29,30 @@ def decode_microinstruction(instr):
             'enc':(instr>>21)&1, 'wr':(instr>>22)&1, 'rd':(instr>>23)&1, 'mar':(instr>>24)&1,
             'mbr':(instr>>25)&1, 'sh':(instr>>26)&3, 'alu':(instr>>28)&3, 'cond':(instr>>30)&3, 'amux':(instr>>32)&1}
 
+# Microinstrução já decodificada (mesmos campos do dicionário acima).
+# Por ser uma tupla, pode ser desempacotada direto no laço do CPU.run().
+MicroInstruction = namedtuple('MicroInstruction',
+                              'addr a b c enc wr rd mar mbr sh alu cond amux')
+
+CONTROL_STORE_SIZE = 512 # 9 bits de endereço (MPC)
+
+def encode_microinstruction(u):
+    """Inverso do decode: MicroInstruction -> palavra de 33 bits (campos já numéricos)"""
+    return ((u.addr & 0x1FF) | (u.a & 0xF) << 9 | (u.b & 0xF) << 13 | (u.c & 0xF) << 17
+            | (u.enc & 1) << 21 | (u.wr & 1) << 22 | (u.rd & 1) << 23 | (u.mar & 1) << 24
+            | (u.mbr & 1) << 25 | (u.sh & 3) << 26 | (u.alu & 3) << 28 | (u.cond & 3) << 30
+            | (u.amux & 1) << 32)
+
+def decode_control_store(control_store):
+    """
+    Decodifica o control store inteiro UMA vez.
+    Retorna uma tabela de 512 posições indexada pelo MPC; endereços vazios ficam None.
+    """
+    table = [None] * CONTROL_STORE_SIZE
+    for addr, instr in control_store.items():
+        table[addr] = MicroInstruction(**decode_microinstruction(instr))
+    return table
+
 CONTROL_STORE = {}
 
 # --- FETCH CYCLE (Otimizado) ---
@@ -70,14 +95,14 @@ CONTROL_STORE[19] = create_uinst(addr_next=0, enc=1, c='AC', b='AC', a='A', alu=
 
 # JPOS (0100) - Jump if AC >= 0
 # Passo 1: Passa AC pela ULA para setar flags N e Z corretamente
-CONTROL_STORE[20] = create_uinst(addr_next=21, b='AC', alu=ALU_A, cond=COND_N)
+CONTROL_STORE[20] = create_uinst(addr_next=21, a='AC', alu=ALU_A, cond=COND_N)
 # Se N=1 (Negativo), JAM ativa bit 256 -> Vai para 20|0x100 = 277 (Não pula)
 # Se N=0 (Positivo), Vai para 21 (Pula)
 CONTROL_STORE[21] = create_uinst(addr_next=0, enc=1, c='PC', b='IR', a='AMASK', alu=ALU_AND) # Pula
 CONTROL_STORE[277] = create_uinst(addr_next=0) # Não pula, volta pro início
 
 # JZER (0101) - Jump if Zero
-CONTROL_STORE[23] = create_uinst(addr_next=24, b='AC', alu=ALU_A, cond=COND_Z)
+CONTROL_STORE[23] = create_uinst(addr_next=24, a='AC', alu=ALU_A, cond=COND_Z)
 # Se Z=1, vai para 24|0x100 = 280 (Pula)
 # Se Z=0, vai para 24 (Não pula)
 CONTROL_STORE[24] = create_uinst(addr_next=0) # Não pula
@@ -90,14 +115,14 @@ CONTROL_STORE[26] = create_uinst(addr_next=0, enc=1, c='PC', b='IR', a='AMASK',
 CONTROL_STORE[27] = create_uinst(addr_next=0, enc=1, c='AC', b='IR', a='AMASK', alu=ALU_AND)
 
 # JNEG (1100) - Jump if Negative
-CONTROL_STORE[28] = create_uinst(addr_next=29, b='AC', alu=ALU_A, cond=COND_N)
+CONTROL_STORE[28] = create_uinst(addr_next=29, a='AC', alu=ALU_A, cond=COND_N)
 # Se N=1, vai para 285 (Pula)
 # Se N=0, vai para 29 (Não pula)
 CONTROL_STORE[29] = create_uinst(addr_next=0)
 CONTROL_STORE[285] = create_uinst(addr_next=0, enc=1, c='PC', b='IR', a='AMASK', alu=ALU_AND)
 
 # JNZE (1101) - Jump if Not Zero
-CONTROL_STORE[30] = create_uinst(addr_next=31, b='AC', alu=ALU_A, cond=COND_Z)
+CONTROL_STORE[30] = create_uinst(addr_next=31, a='AC', alu=ALU_A, cond=COND_Z)
 # Se Z=1, vai para 287 (Não pula)
 # Se Z=0, vai para 31 (Pula)
 CONTROL_STORE[31] = create_uinst(addr_next=0, enc=1, c='PC', b='IR', a='AMASK', alu=ALU_AND)
@@ -125,4 +150,51 @@ OPCODE_MAP = {
     0xC000: 28, 0xD000: 30, # Mais Saltos
     0xF400: 35, # PUSH
     0xF600: 39  # POP
-}
\ No newline at end of file
+}
+
+# Tabela pré-decodificada (montada no import, usada pelo CPU)
+DECODED_STORE = decode_control_store(CONTROL_STORE)
+
+# --- Variante sem busca (para a unidade de prefetch, hardware/prefetch.py) ---
+# A IFU entrega a próxima instrução no MBR e ela mesma incrementa o PC: a busca inteira
+# vira uma microinstrução só no endereço 0, "IR := MBR; decodifica".
+FETCH_DECODE = create_uinst(addr_next=0, cond=COND_JUMP, enc=1, c='IR', b='MBR', alu=ALU_ADD)
+
+def make_fetch_free(control_store):
+    """
+    Versão sem busca de um microprograma: a sequência que começa no endereço 0 (MAR := PC; rd,
+    PC := PC + 1, IR := MBR; decodifica, em qualquer arrumação, ex: a do microcode_opt) vira
+    só FETCH_DECODE. Retorna (control store novo, microinstruções tiradas de cada busca).
+    """
+    chain = []
+    addr = 0
+    while True:
+        if addr in chain or addr not in control_store or len(chain) > 4:
+            raise ValueError(f"Busca do microprograma não reconhecida (MPC {addr})")
+        u = decode_microinstruction(control_store[addr])
+        chain.append(addr)
+        if u['wr'] or (u['enc'] and u['c'] not in (R_MASK['PC'], R_MASK['IR'])):
+            raise ValueError(f"Busca do microprograma faz mais do que buscar (MPC {addr})")
+        if u['cond'] == COND_JUMP:
+            break
+        if u['cond'] != COND_NO:
+            raise ValueError(f"Desvio condicional no meio da busca (MPC {addr})")
+        addr = u['addr']
+    if not (u['enc'] and u['c'] == R_MASK['IR']):
+        raise ValueError("A decodificação não carrega o IR")
+
+    store = dict(control_store)
+    store[0] = FETCH_DECODE
+    targets = set()
+    for addr, instr in store.items():
+        if addr not in chain[1:]:
+            u = decode_microinstruction(instr)
+            targets.add(u['addr'])
+            if u['cond'] in (COND_N, COND_Z):
+                targets.add(u['addr'] | 0x100)
+    for addr in chain[1:]:
+        if addr not in targets:
+            del store[addr]
+    return store, len(chain) - 1
+
+FETCH_FREE_CONTROL_STORE, FETCH_UINSTS_REMOVED = make_fetch_free(CONTROL_STORE)
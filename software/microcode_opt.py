@@ -0,0 +1,567 @@
+# software/microcode_opt.py
+"""
+Otimizador do microprograma (peephole) + verificação de equivalência simbólica.
+
+    from software.microcode_opt import optimize
+    result = optimize()                     # CONTROL_STORE / OPCODE_MAP padrão
+    cpu = CPU(result.control_store, result.opcode_map)
+    print(result.report())
+
+    python -m software.microcode_opt        # mostra o relatório
+
+O control store vira um grafo (cada microinstrução aponta para o(s) sucessor(es)),
+os passes reescrevem o grafo e no fim os endereços são redistribuídos (respeitando
+o par de desvio JAM: destino "tomado" = destino normal | 0x100) e o OPCODE_MAP refeito.
+
+Passes (na ordem, repetidos até não mudar nada):
+  - memory: tira 'rd'/'wr' repetidos (o MBR já é igual a M[MAR] e nenhum dos dois mudou);
+  - hoist:  microinstrução que só faz rd/wr é juntada na anterior (o acesso vem depois do MAR);
+  - copy:   "X := expr" seguido de "MAR/MBR := X" vira uma só (o resultado da ULA vai para os dois);
+  - noop:   microinstruções sem efeito nenhum são puladas (quem apontava para ela pula direto);
+  - dedupe: microinstruções idênticas (mesmos campos e sucessores) viram uma só.
+Na distribuição dos endereços, um destino que não cabe no par JAM é clonado; a exceção é a
+busca, que não pode ser clonada: um lado JAM que vai para ela passa por uma microinstrução
+"ponte" (BRIDGE) que só segue para o endereço 0. A busca também nunca é fundida com outra:
+o MPC voltar a 0 é o que marca o fim de uma instrução para o CPU (halt, paradas por PC,
+contagem de instruções, troca com o simulador funcional).
+
+A equivalência é PROVADA por execução simbólica: para cada opcode, a instrução inteira
+(busca + rotina + busca da próxima) é executada nos dois microprogramas com registradores e
+memória simbólicos; cada caminho (condições N/Z tomadas) tem que chegar ao mesmo PC/IR/SP/AC
+e à mesma sequência de escritas na memória.
+"""
+from collections import namedtuple
+from software.microcode import (CONTROL_STORE, OPCODE_MAP, CONTROL_STORE_SIZE, MicroInstruction,
+                                decode_microinstruction, encode_microinstruction)
+from software.isa import OPCODES
+
+ALU_ADD, ALU_AND, ALU_A, ALU_NOT = 0, 1, 2, 3
+R_NONE, R_PC, R_IR, R_SP, R_AC, R_MAR, R_MBR = 0, 1, 2, 3, 4, 5, 6
+READ_ONLY = range(8, 13)
+CONSTANT_VALUES = {8: 0, 9: 1, 10: 0xFFFF, 11: 0x0FFF, 12: 0x00FF}
+ARCH_REGS = ((R_PC, 'PC'), (R_IR, 'IR'), (R_SP, 'SP'), (R_AC, 'AC')) # O que a ISA enxerga
+
+OPCODE_NAMES = {value: name for name, value in OPCODES.items() if not name.startswith('.')}
+DEFAULT_PASSES = ('memory', 'hoist', 'copy', 'noop', 'dedupe')
+
+# Microinstrução sem efeito (só segue para 'addr'), usada como ponte até a busca
+BRIDGE = MicroInstruction(**decode_microinstruction(0))
+
+# --- Grafo do microprograma ---
+
+class _Node:
+    """Microinstrução + sucessores (ids de nós): next = normal/falso, taken = JAM verdadeiro"""
+    __slots__ = ('u', 'next', 'taken')
+
+    def __init__(self, u, next_id, taken_id):
+        self.u = u
+        self.next = next_id
+        self.taken = taken_id
+
+    def successors(self):
+        return [s for s in (self.next, self.taken) if s is not None]
+
+class _Graph:
+    def __init__(self, control_store, opcode_map):
+        self.nodes = {}
+        for addr, word in control_store.items():
+            u = MicroInstruction(**decode_microinstruction(word))
+            if u.cond == 3:
+                self.nodes[addr] = _Node(u, None, None)
+            elif u.cond == 0:
+                self.nodes[addr] = _Node(u, u.addr, None)
+            else:
+                self.nodes[addr] = _Node(u, u.addr, u.addr | 0x100)
+        self.roots = dict(opcode_map) # opcode -> id da rotina
+        self._next_id = CONTROL_STORE_SIZE
+        # 'None' (registrador 0) vale 0 enquanto ninguém escrever nele
+        self.zero_regs = {8} | ({R_NONE} if not any(n.u.enc and n.u.c == R_NONE
+                                                    for n in self.nodes.values()) else set())
+
+    def new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def is_root(self, node_id):
+        return node_id == 0 or node_id in self.roots.values()
+
+    def predecessors(self):
+        preds = {node_id: [] for node_id in self.nodes}
+        for node_id, node in self.nodes.items():
+            for succ in node.successors():
+                if succ in preds:
+                    preds[succ].append(node_id)
+        return preds
+
+    def redirect(self, old, new):
+        """Tudo que apontava para 'old' passa a apontar para 'new'"""
+        for node in self.nodes.values():
+            if node.next == old: node.next = new
+            if node.taken == old: node.taken = new
+        for opcode, node_id in self.roots.items():
+            if node_id == old:
+                self.roots[opcode] = new
+        del self.nodes[old]
+
+    def single_successor_pairs(self):
+        """(id1, id2) com id1 -> id2 incondicional e id2 só alcançável por id1"""
+        preds = self.predecessors()
+        for node_id, node in list(self.nodes.items()):
+            succ = node.next
+            if (node.u.cond == 0 and succ in self.nodes and succ != node_id
+                    and not self.is_root(succ) and preds[succ] == [node_id]):
+                yield node_id, succ
+
+# --- Passes ---
+
+def _writes(u, reg):
+    """A microinstrução muda o registrador 'reg' (MAR/MBR) antes do acesso à memória?"""
+    return (reg == R_MAR and u.mar) or (reg == R_MBR and u.mbr) or (u.enc and u.c == reg)
+
+def _pass_memory(graph):
+    """
+    Análise de fluxo ("must"): SYNC = "MBR == M[MAR]" vale na entrada de todos os caminhos.
+    rd ou wr com SYNC e sem mexer no MAR/MBR não muda nada -> removido.
+    """
+    preds = graph.predecessors()
+    sync_in = {node_id: not graph.is_root(node_id) for node_id in graph.nodes}
+    changed = True
+    while changed:
+        changed = False
+        for node_id, node in graph.nodes.items():
+            if graph.is_root(node_id):
+                continue
+            value = all(_sync_out(sync_in[p], graph.nodes[p].u) for p in preds[node_id]) if preds[node_id] else False
+            if value != sync_in[node_id]:
+                sync_in[node_id] = value
+                changed = True
+
+    count = 0
+    for node_id, node in graph.nodes.items():
+        u = node.u
+        if (u.rd or u.wr) and sync_in[node_id] and not (_writes(u, R_MAR) or _writes(u, R_MBR)):
+            node.u = u._replace(rd=0, wr=0)
+            count += 1
+    return count
+
+def _sync_out(sync, u):
+    if u.rd or u.wr:
+        return True
+    if _writes(u, R_MAR) or _writes(u, R_MBR):
+        return False
+    return sync
+
+def _is_pure_memory(u):
+    """Só faz rd/wr (a ULA trabalha à toa e as flags não são testadas)"""
+    return not (u.enc or u.mar or u.mbr) and u.cond == 0 and (u.rd or u.wr)
+
+def _pass_hoist(graph):
+    """rd/wr sozinho numa microinstrução vai para a anterior (que não acessa a memória)"""
+    count = 0
+    for first_id, second_id in list(graph.single_successor_pairs()):
+        if first_id not in graph.nodes or second_id not in graph.nodes:
+            continue
+        first, second = graph.nodes[first_id], graph.nodes[second_id]
+        if first.next != second_id or not _is_pure_memory(second.u) or first.u.rd or first.u.wr:
+            continue
+        first.u = first.u._replace(rd=second.u.rd, wr=second.u.wr)
+        first.next = second.next
+        del graph.nodes[second_id]
+        count += 1
+    return count
+
+def _copy_source(u, zero_regs):
+    """Se a ULA só copia um registrador (sem deslocar), devolve qual; senão None"""
+    if u.sh or u.amux:
+        return None
+    if u.alu == ALU_A:
+        return u.a
+    if u.alu == ALU_ADD:
+        if u.a in zero_regs: return u.b
+        if u.b in zero_regs: return u.a
+    return None
+
+def _pass_copy(graph):
+    """
+    'X := expr' seguido de 'MAR/MBR := X' -> 'X := expr; MAR/MBR := expr' numa só.
+    Se a segunda tem outros predecessores (ex: a busca no endereço 0), ela fica para
+    eles e a primeira recebe uma cópia dela (duplicação de cauda).
+    """
+    preds = graph.predecessors()
+    count = 0
+    for first_id in list(graph.nodes):
+        first = graph.nodes.get(first_id)
+        if first is None or first.u.cond != 0 or first.next not in graph.nodes or first.next == first_id:
+            continue
+        second_id = first.next
+        if second_id == 0:
+            continue # A busca fica intacta: MPC = 0 marca o início de cada instrução
+        second = graph.nodes[second_id]
+        u1, u2 = first.u, second.u
+        if not u1.enc or u1.c in READ_ONLY or u1.c in (R_NONE, R_MAR, R_MBR):
+            continue
+        if u2.enc or _copy_source(u2, graph.zero_regs) != u1.c:
+            continue
+        if u1.mar or u1.mbr or u1.rd or u1.wr:
+            continue
+        first.u = u1._replace(mar=u2.mar, mbr=u2.mbr, rd=u2.rd, wr=u2.wr, cond=u2.cond)
+        first.next, first.taken = second.next, second.taken
+        if preds[second_id] == [first_id] and not graph.is_root(second_id):
+            del graph.nodes[second_id]
+        count += 1
+    return count
+
+def _is_noop(u):
+    return not (u.enc or u.mar or u.mbr or u.rd or u.wr) and u.cond == 0
+
+def _pass_noop(graph):
+    count = 0
+    for node_id in list(graph.nodes):
+        node = graph.nodes[node_id]
+        if node_id != 0 and _is_noop(node.u) and node.next != node_id:
+            graph.redirect(node_id, node.next)
+            count += 1
+    return count
+
+def _pass_dedupe(graph):
+    count = 0
+    changed = True
+    while changed:
+        changed = False
+        seen = {}
+        for node_id in sorted(graph.nodes):
+            node = graph.nodes[node_id]
+            key = (node.u._replace(addr=0), node.next, node.taken)
+            if key in seen and node_id != 0:
+                graph.redirect(node_id, seen[key])
+                count += 1
+                changed = True
+                break
+            seen[key] = node_id
+    return count
+
+PASSES = {'memory': _pass_memory, 'hoist': _pass_hoist, 'copy': _pass_copy,
+          'noop': _pass_noop, 'dedupe': _pass_dedupe}
+
+# --- Distribuição dos endereços ---
+
+def _layout(graph):
+    """Dá um endereço a cada nó alcançável; devolve (control_store, opcode_map, clones)"""
+    addr_of = {}
+    used = [None] * CONTROL_STORE_SIZE
+    clones = 0
+
+    def place(node_id, addr):
+        addr_of[node_id] = addr
+        used[addr] = node_id
+
+    def alloc_pair():
+        # Endereço baixo com o "par" (k | 0x100) livre, para servir de destino JAM depois
+        for k in range(1, 0x100):
+            if used[k] is None and used[k | 0x100] is None:
+                return k
+        raise ValueError("Control store cheio")
+
+    origin = {} # clone -> nó original (clones do mesmo nó são intercambiáveis)
+
+    def same(a, b):
+        return origin.get(a, a) == origin.get(b, b)
+
+    def clone(node_id):
+        nonlocal clones
+        new_id = graph.new_id()
+        origin[new_id] = origin.get(node_id, node_id)
+        if node_id == 0:
+            # A busca não é copiada (MPC = 0 marca o fim da instrução): usa uma "ponte" para 0
+            graph.nodes[new_id] = _Node(BRIDGE, 0, None)
+        else:
+            original = graph.nodes[node_id]
+            graph.nodes[new_id] = _Node(original.u, original.next, original.taken)
+            clones += 1
+        return new_id
+
+    place(0, 0)
+    queue = [0] + [graph.roots[opcode] for opcode in sorted(graph.roots)]
+    while queue:
+        node_id = queue.pop(0)
+        if node_id not in addr_of:
+            place(node_id, alloc_pair())
+        node = graph.nodes[node_id]
+        if node.u.cond in (1, 2):
+            # Par JAM: destino falso em f (< 0x100), verdadeiro em f | 0x100
+            false_id, true_id = node.next, node.taken
+            f = addr_of.get(false_id)
+            if f is None:
+                t = addr_of.get(true_id)
+                if t is not None and t >= 0x100 and used[t & 0xFF] is None:
+                    place(false_id, t & 0xFF)
+                else:
+                    place(false_id, alloc_pair())
+            elif f >= 0x100 or (used[f | 0x100] is not None and not same(used[f | 0x100], true_id)):
+                # O destino falso já está num lugar sem o par certo: usa um clone dele
+                false_id = clone(false_id)
+                place(false_id, alloc_pair())
+            f = addr_of[false_id]
+            pair = used[f | 0x100]
+            if pair is not None:
+                true_id = pair # Já está lá (ele mesmo ou um clone equivalente)
+            else:
+                if true_id in addr_of:
+                    true_id = clone(true_id)
+                place(true_id, f | 0x100)
+            node.next, node.taken = false_id, true_id
+            queue += [false_id, true_id]
+        elif node.next is not None and node.next not in addr_of:
+            queue.append(node.next)
+
+    store = {}
+    for node_id, addr in addr_of.items():
+        node = graph.nodes[node_id]
+        target = addr_of[node.next] if node.next is not None else 0
+        store[addr] = encode_microinstruction(node.u._replace(addr=target))
+    opcode_map = {opcode: addr_of[node_id] for opcode, node_id in graph.roots.items()}
+    return store, opcode_map, clones
+
+# --- Execução Simbólica ---
+#
+# Expressões: int (constante de 16 bits) ou tuplas normalizadas:
+#   ('sym', nome)  ('add', termos...)  ('and', termos...)  ('not', x)  ('sra', x)  ('sll8', x)
+#   ('mem', escritas, endereço) = leitura da memória depois da sequência de escritas
+
+def _sym_add(x, y):
+    terms, const = [], 0
+    for t in (x, y):
+        if isinstance(t, int): const += t
+        elif t[0] == 'add':
+            for sub in t[1:]:
+                if isinstance(sub, int): const += sub
+                else: terms.append(sub)
+        else: terms.append(t)
+    const &= 0xFFFF
+    if not terms:
+        return const
+    if const:
+        terms.append(const)
+    if len(terms) == 1:
+        return terms[0]
+    return ('add',) + tuple(sorted(terms, key=repr))
+
+def _sym_and(x, y):
+    terms, const = set(), 0xFFFF
+    for t in (x, y):
+        if isinstance(t, int): const &= t
+        elif t[0] == 'and':
+            for sub in t[1:]:
+                if isinstance(sub, int): const &= sub
+                else: terms.add(sub)
+        else: terms.add(t)
+    if const == 0 or not terms:
+        return const
+    if const != 0xFFFF:
+        terms.add(const)
+    if len(terms) == 1:
+        return terms.pop()
+    return ('and',) + tuple(sorted(terms, key=repr))
+
+def _sym_not(x):
+    if isinstance(x, int):
+        return ~x & 0xFFFF
+    if x[0] == 'not':
+        return x[1]
+    return ('not', x)
+
+def _sym_shift(x, sh):
+    if sh == 1:
+        return ((x >> 1) | (x & 0x8000)) if isinstance(x, int) else ('sra', x)
+    if sh == 2:
+        return ((x << 8) & 0xFFFF) if isinstance(x, int) else ('sll8', x)
+    return x
+
+def _sym_read(writes, addr):
+    if writes and writes[-1][0] == addr:
+        return writes[-1][1] # Leitura logo depois de escrever no mesmo endereço
+    return ('mem', writes, addr)
+
+def _sym_write(writes, addr, value):
+    if writes and writes[-1] == (addr, value):
+        return writes # Escrever de novo o mesmo valor no mesmo lugar não muda nada
+    return writes + ((addr, value),)
+
+_Path = namedtuple('_Path', 'conditions state writes cycles mid_cycles')
+MAX_PATH_CYCLES = 200
+
+def _symbolic_paths(control_store, opcode_map, opcode):
+    """
+    Todos os caminhos de UMA instrução cujo opcode é 'opcode': busca, decodificação,
+    rotina e busca da próxima, até a segunda decodificação.
+    Retorna {condições: _Path}; condições = tupla ordenada de (átomo, bool).
+    """
+    decoded = {addr: MicroInstruction(**decode_microinstruction(w)) for addr, w in control_store.items()}
+    regs = [('sym', name) for name in ('None', 'PC', 'IR', 'SP', 'AC', 'MAR', 'MBR', 'TIR')]
+    regs += [CONSTANT_VALUES[i] for i in range(8, 13)] + [('sym', 'A'), ('sym', 'B'), ('sym', 'C')]
+    if not any(u.enc and u.c == R_NONE for u in decoded.values()):
+        regs[R_NONE] = 0
+
+    paths = {}
+    stack = [(0, regs, (), {}, 0, 0, None)] # mpc, regs, escritas, condições, ciclos, decodificações, ciclos na 1ª
+    while stack:
+        mpc, regs, writes, conds, cycles, decodes, mid = stack.pop()
+        while True:
+            if cycles > MAX_PATH_CYCLES:
+                raise ValueError(f"Opcode {opcode:04X}: caminho longo demais (laço no microcódigo?)")
+            u = decoded.get(mpc)
+            if u is None:
+                paths[_key(conds)] = _Path(_key(conds), ('bad_mpc', mpc), writes, cycles, mid)
+                break
+            cycles += 1
+            regs = list(regs)
+            la = regs[R_MBR] if u.amux else regs[u.a]
+            lb = regs[u.b]
+            if u.alu == ALU_ADD: res = _sym_add(la, lb)
+            elif u.alu == ALU_AND: res = _sym_and(la, lb)
+            elif u.alu == ALU_A: res = la
+            else: res = _sym_not(la)
+            res = _sym_shift(res, u.sh)
+            if u.mar: regs[R_MAR] = _sym_and(res, 0x0FFF)
+            if u.mbr: regs[R_MBR] = res
+            if u.enc and u.c not in READ_ONLY:
+                regs[u.c] = _sym_and(res, 0x0FFF) if u.c == R_MAR else res
+            if u.rd: regs[R_MBR] = _sym_read(writes, regs[R_MAR])
+            if u.wr: writes = _sym_write(writes, regs[R_MAR], regs[R_MBR])
+
+            if u.cond == 0:
+                mpc = u.addr
+                continue
+            if u.cond in (1, 2):
+                if isinstance(res, int):
+                    flag = bool(res & 0x8000) if u.cond == 1 else res == 0
+                    mpc = (u.addr | 0x100) if flag else u.addr
+                    continue
+                atom = ('N' if u.cond == 1 else 'Z', res)
+                if atom in conds:
+                    mpc = (u.addr | 0x100) if conds[atom] else u.addr
+                    continue
+                stack.append((u.addr | 0x100, regs, writes, {**conds, atom: True}, cycles, decodes, mid))
+                conds = {**conds, atom: False}
+                mpc = u.addr
+                continue
+
+            # Decodificação
+            if decodes == 1:
+                state = tuple(regs[i] for i, _ in ARCH_REGS)
+                paths[_key(conds)] = _Path(_key(conds), state, writes, cycles, mid)
+                break
+            decodes, mid = 1, cycles
+            conds = {**conds, ('op', regs[R_IR]): opcode}
+            target = opcode_map.get(opcode)
+            if target is None:
+                paths[_key(conds)] = _Path(_key(conds), ('bad_opcode',), writes, cycles, mid)
+                break
+            mpc = target
+    return paths
+
+def _key(conds):
+    return tuple(sorted(conds.items(), key=repr))
+
+def _instruction_cycles(paths):
+    """(mínimo, máximo) de microciclos da instrução (rotina + busca da próxima)"""
+    costs = [p.cycles - p.mid_cycles for p in paths.values() if p.mid_cycles is not None]
+    return (min(costs), max(costs)) if costs else (0, 0)
+
+Mismatch = namedtuple('Mismatch', 'opcode conditions field expected actual')
+
+def check_equivalence(original_store, original_map, new_store, new_map, opcodes=None):
+    """
+    Prova (execução simbólica) que os dois microprogramas fazem a mesma coisa em
+    cada opcode. Retorna a lista de diferenças (vazia = equivalentes).
+    """
+    mismatches = []
+    for opcode in sorted(opcodes or set(original_map) | set(new_map)):
+        before = _symbolic_paths(original_store, original_map, opcode)
+        after = _symbolic_paths(new_store, new_map, opcode)
+        for key in before.keys() | after.keys():
+            if key not in after or key not in before:
+                mismatches.append(Mismatch(opcode, key, 'caminho', key in before, key in after))
+                continue
+            p, q = before[key], after[key]
+            if p.state != q.state:
+                fields = [name for _, name in ARCH_REGS] if len(p.state) == len(q.state) == 4 else ['estado']
+                for i, name in enumerate(fields):
+                    if len(fields) == 1 or p.state[i] != q.state[i]:
+                        mismatches.append(Mismatch(opcode, key, name, p.state[i] if len(fields) > 1 else p.state,
+                                                   q.state[i] if len(fields) > 1 else q.state))
+            if p.writes != q.writes:
+                mismatches.append(Mismatch(opcode, key, 'memória', p.writes, q.writes))
+    return mismatches
+
+# --- API ---
+
+class OptimizationResult:
+    def __init__(self, control_store, opcode_map, pass_counts, clones, cycles_before, cycles_after,
+                 weights=None, size_before=None):
+        self.control_store = control_store
+        self.size_before = size_before     # Microinstruções do microprograma de entrada
+        self.opcode_map = opcode_map
+        self.pass_counts = pass_counts     # {passe: nº de reescritas}
+        self.clones = clones
+        self.cycles_before = cycles_before # {opcode: (mín, máx) microciclos por instrução}
+        self.cycles_after = cycles_after
+        self.weights = weights or {}
+
+    def estimated_cpi(self, before=False, weights=None):
+        """
+        Microciclos por instrução (média dos mín/máx de cada opcode), ponderada pelo perfil
+        (ex: Profiler.op_counts) se houver; senão todos os opcodes pesam igual.
+        """
+        table = self.cycles_before if before else self.cycles_after
+        weights = weights or self.weights or {opcode: 1 for opcode in table}
+        total = sum(weights.get(op, 0) for op in table)
+        if not total:
+            return 0.0
+        return sum(weights.get(op, 0) * (lo + hi) / 2 for op, (lo, hi) in table.items()) / total
+
+    def report(self):
+        lines = ["--- Passes ---"]
+        lines += [f"  {name:<8} {count:>3} reescritas" for name, count in self.pass_counts.items()]
+        lines.append(f"  clones   {self.clones:>3} (destinos JAM duplicados)")
+        lines.append(f"  tamanho  {self.size_before} -> {len(self.control_store)} microinstruções")
+        lines.append("--- Microciclos por instrução (rotina + busca), mín/máx ---")
+        for opcode in sorted(self.cycles_before):
+            lo0, hi0 = self.cycles_before[opcode]
+            lo1, hi1 = self.cycles_after[opcode]
+            name = OPCODE_NAMES.get(opcode, f"{opcode:04X}")
+            lines.append(f"  {name:<6} {lo0:>2}/{hi0:<2} -> {lo1:>2}/{hi1:<2}")
+        lines.append(f"CPI estimado: {self.estimated_cpi(before=True):.2f} -> {self.estimated_cpi():.2f}")
+        return "\n".join(lines)
+
+def optimize(control_store=CONTROL_STORE, opcode_map=OPCODE_MAP, passes=DEFAULT_PASSES,
+             weights=None, verify=True):
+    """
+    Otimiza o microprograma. 'weights' (ex: Profiler.op_counts) pondera o CPI do relatório.
+    Com verify=True levanta ValueError se a prova de equivalência falhar.
+    """
+    graph = _Graph(control_store, opcode_map)
+    counts = {name: 0 for name in passes}
+    changed = True
+    while changed:
+        changed = False
+        for name in passes:
+            n = PASSES[name](graph)
+            counts[name] += n
+            changed = changed or n > 0
+    store, new_map, clones = _layout(graph)
+
+    if verify:
+        mismatches = check_equivalence(control_store, opcode_map, store, new_map)
+        if mismatches:
+            raise ValueError(f"Microprograma otimizado NÃO é equivalente: {mismatches[:3]}")
+
+    before = {op: _instruction_cycles(_symbolic_paths(control_store, opcode_map, op)) for op in opcode_map}
+    after = {op: _instruction_cycles(_symbolic_paths(store, new_map, op)) for op in new_map}
+    for opcode in opcode_map:
+        if after[opcode][1] > before[opcode][1]:
+            raise ValueError(f"Otimização piorou o opcode {opcode:04X}: {before[opcode]} -> {after[opcode]}")
+    return OptimizationResult(store, new_map, counts, clones, before, after, weights, len(control_store))
+
+if __name__ == "__main__":
+    print(optimize().report())
@@ -0,0 +1,148 @@
+# software/objfile.py
+import hashlib
+import os
+import struct
+from array import array
+from config import MASK_16BIT, MASK_12BIT, OBJECT_CACHE_DIR
+
+# --- Formato do Objeto (.obj) ---
+#
+# [MAGIC][HEADER][palavras][relocações][linhas][símbolos]
+#   HEADER:     hash do fonte (32 bytes), nº de palavras, nº de relocações, nº de símbolos
+#   palavras:   código/dados (16 bits cada)
+#   relocações: índice das palavras cujo operando (12 bits) é endereço de rótulo
+#   linhas:     linha do fonte de cada palavra
+#   símbolos:   (tamanho do nome, nome utf-8, endereço)
+
+MAGIC = b'MIC1OBJ1'
+FORMAT_VERSION = 1 # Mude se o assembler passar a gerar código diferente (invalida o cache)
+HEADER = struct.Struct('<32sIII')
+SYMBOL = struct.Struct('<HH') # tamanho do nome, endereço
+
+def source_hash(source):
+    """SHA-256 do fonte (bytes) + versão do formato: chave do cache"""
+    return hashlib.sha256(bytes([FORMAT_VERSION]) + source).digest()
+
+def _words(values):
+    return array('H', [v & MASK_16BIT for v in values])
+
+class ObjectImage:
+    """Programa montado e relocável: código, tabela de símbolos e mapa de linhas"""
+    def __init__(self, words, symbols, relocations, line_map, digest=b'\0' * 32):
+        self.words = _words(words)
+        self.symbols = dict(symbols)
+        self.relocations = array('H', relocations)
+        self.line_map = array('H', line_map)
+        self.digest = digest
+
+    def __len__(self):
+        return len(self.words)
+
+    def relocated(self, base):
+        """Palavras prontas para carregar a partir do endereço 'base'"""
+        if base == 0:
+            return self.words
+        words = array('H', self.words)
+        for i in self.relocations:
+            word = words[i]
+            words[i] = (word & ~MASK_12BIT & MASK_16BIT) | ((word + base) & MASK_12BIT)
+        return words
+
+    def symbols_at(self, base):
+        """Tabela de símbolos com os endereços já relocados"""
+        return {name: addr + base for name, addr in self.symbols.items()}
+
+    def load_into(self, memory, base=0):
+        """Carrega o programa na MainMemory com uma única cópia em bloco"""
+        memory.load_image(self.relocated(base), base)
+
+    # --- Serialização ---
+
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        out += HEADER.pack(self.digest, len(self.words), len(self.relocations), len(self.symbols))
+        out += self.words.tobytes()
+        out += self.relocations.tobytes()
+        out += self.line_map.tobytes()
+        for name, addr in self.symbols.items():
+            encoded = name.encode('utf-8')
+            out += SYMBOL.pack(len(encoded), addr)
+            out += encoded
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Arquivo objeto inválido")
+        pos = len(MAGIC)
+        digest, n_words, n_relocs, n_symbols = HEADER.unpack_from(data, pos)
+        pos += HEADER.size
+
+        image = cls.__new__(cls)
+        image.digest = digest
+        image.words = array('H', data[pos:pos + 2 * n_words])
+        pos += 2 * n_words
+        image.relocations = array('H', data[pos:pos + 2 * n_relocs])
+        pos += 2 * n_relocs
+        image.line_map = array('H', data[pos:pos + 2 * n_words])
+        pos += 2 * n_words
+
+        image.symbols = {}
+        for _ in range(n_symbols):
+            size, addr = SYMBOL.unpack_from(data, pos)
+            pos += SYMBOL.size
+            image.symbols[data[pos:pos + size].decode('utf-8')] = addr
+            pos += size
+        return image
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+class ObjectCache:
+    """
+    Cache de programas montados, indexado pelo hash do fonte.
+    Fonte igual = objeto reaproveitado (da memória ou do disco), sem montar de novo.
+    """
+    def __init__(self, directory=OBJECT_CACHE_DIR):
+        self.directory = directory # None = só cache em memória
+        self._memory = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filepath):
+        """ObjectImage do arquivo .asm (monta só se o conteúdo mudou)"""
+        with open(filepath, 'rb') as f:
+            return self.get_source(f.read())
+
+    def get_source(self, source):
+        """ObjectImage do fonte (bytes), sem arquivo .asm (ex: fonte recebido pelo tools.service)"""
+        digest = source_hash(source)
+
+        image = self._memory.get(digest)
+        if image is None and self.directory is not None:
+            path = os.path.join(self.directory, digest.hex() + '.obj')
+            if os.path.exists(path):
+                image = ObjectImage.load(path)
+                self._memory[digest] = image
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        from software.assembler import Assembler # Import aqui: o assembler importa este módulo
+        image = Assembler().assemble_source(source)
+        self._memory[digest] = image
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            # Grava num temporário e renomeia: outro processo nunca lê um .obj pela metade
+            path = os.path.join(self.directory, digest.hex() + '.obj')
+            tmp = f"{path}.{os.getpid()}.tmp"
+            image.save(tmp)
+            os.replace(tmp, path)
+        return image
@@ -0,0 +1,251 @@
+# tools/batch.py
+"""
+Executor em lote (sem GUI) para muitos programas .asm.
+
+Uso:
+    python -m tools.batch programs/ [outro.asm | manifesto.json ...] -j 8 -o relatorio.jsonl
+
+Cada programa roda num processo do pool, com sua própria CPU; os programas montados
+ficam no cache de objetos (config.OBJECT_CACHE_DIR), indexados pelo hash do fonte.
+As verificações de memória vêm de:
+  - um manifesto JSON: [{"program": "x.asm", "expect": {"res": -10, "4": 1},
+                         "max_cycles": 100000, "timeout": 5.0}, ...]
+  - ou linhas de comentário no próprio .asm:  # EXPECT res=-10 status=1
+Os endereços podem ser números (decimal/0x) ou rótulos do programa.
+Um programa só passa se parar em HALT; no manifesto, "reasons": ["halt", "budget"]
+aceita outros motivos de parada (ex: um laço que deve rodar até o limite de ciclos).
+    python -m tools.batch --self-check      # confere o próprio executor
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import MASK_16BIT
+from hardware.cpu import CPU, STOP_BUDGET, STOP_HALT
+from software.objfile import ObjectCache
+
+DEFAULT_MAX_CYCLES = 1_000_000
+DEFAULT_TIMEOUT = 10.0  # Segundos de relógio por programa
+DEFAULT_REASONS = (STOP_HALT,)  # Motivos de parada aceitos quando o job não diz nada
+CHUNK_CYCLES = 50_000   # De quanto em quanto tempo o limite de tempo é checado
+
+# Um cache de objetos por processo do pool: o mesmo programa rodado com várias
+# configurações só é montado uma vez (e o .obj em disco serve para os outros processos)
+_object_cache = None
+
+def _get_object_cache():
+    global _object_cache
+    if _object_cache is None:
+        _object_cache = ObjectCache()
+    return _object_cache
+
+def parse_expect_comments(path):
+    """Lê as linhas '# EXPECT rotulo=valor ...' de um .asm"""
+    with open(path, 'r') as f:
+        return parse_expect_lines(f)
+
+def parse_expect_lines(lines):
+    """Mesmo que parse_expect_comments, direto das linhas do fonte"""
+    expect = {}
+    for line in lines:
+        text = line.strip()
+        if not text.startswith('#'):
+            continue
+        text = text[1:].strip()
+        if not text.upper().startswith('EXPECT'):
+            continue
+        for item in text[len('EXPECT'):].split():
+            key, value = item.split('=', 1)
+            expect[key] = int(value, 0)
+    return expect
+
+def collect_jobs(paths, max_cycles, timeout):
+    """Transforma diretórios, arquivos .asm e manifestos .json em uma lista de jobs"""
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.asm'):
+                    asm = os.path.join(path, name)
+                    jobs.append({'program': asm})
+        elif path.endswith('.json'):
+            with open(path, 'r') as f:
+                entries = json.load(f)
+            base = os.path.dirname(path)
+            for entry in entries:
+                job = dict(entry)
+                job['program'] = os.path.join(base, entry['program'])
+                job.setdefault('expect', {})
+                jobs.append(job)
+        else:
+            jobs.append({'program': path})
+
+    for job in jobs:
+        job.setdefault('max_cycles', max_cycles)
+        job.setdefault('timeout', timeout)
+        job.setdefault('reasons', list(DEFAULT_REASONS))
+    return jobs
+
+def resolve_address(key, symbol_table):
+    if key in symbol_table:
+        return symbol_table[key]
+    try:
+        return int(key, 0)
+    except ValueError:
+        raise ValueError(f"Rótulo ou endereço inválido em EXPECT: {key}")
+
+def run_job(job):
+    """Monta e executa UM programa (roda dentro do processo do pool)"""
+    result = {'program': job['program'], 'status': 'error'}
+    start = time.perf_counter()
+    try:
+        expect = job.get('expect')
+        if expect is None: # Sem manifesto: usa os comentários # EXPECT do fonte
+            expect = parse_expect_comments(job['program'])
+
+        image = _get_object_cache().get(job['program'])
+        result.update(run_image(CPU(), image, expect, job['max_cycles'], job['timeout'], start,
+                                job['reasons']))
+    except Exception as exc: # Erro de montagem, arquivo faltando etc.
+        result['error'] = f"{type(exc).__name__}: {exc}"
+    result['elapsed'] = round(time.perf_counter() - start, 6)
+    return result
+
+def run_image(cpu, image, expect, max_cycles, timeout, start=None, reasons=DEFAULT_REASONS):
+    """
+    Carrega o ObjectImage na CPU, roda e confere 'expect' ({rótulo/endereço: valor}).
+    Parar por um motivo fora de 'reasons' (limite de ciclos, tempo, opcode inválido...)
+    também é falha. Retorna o dicionário do relatório (status, reason, cycles, failures...)
+    """
+    if start is None:
+        start = time.perf_counter()
+    image.load_into(cpu.ram)
+
+    # Roda em pedaços para conseguir respeitar o limite de tempo
+    deadline = start + timeout
+    cycles = instructions = stalls = 0
+    while True:
+        run = cpu.run_until(min(CHUNK_CYCLES, max_cycles - cycles))
+        cycles += run.cycles
+        instructions += run.instructions
+        stalls += run.stall_cycles
+        reason = run.reason
+        if reason != STOP_BUDGET or cycles >= max_cycles:
+            break
+        if time.perf_counter() > deadline:
+            reason = "timeout"
+            break
+
+    cpu.cache.flush() # Write-back: garante que a RAM está atualizada
+    failures = []
+    for key, expected in expect.items():
+        addr = resolve_address(key, image.symbols)
+        actual = cpu.ram.read(addr)
+        if actual != expected & MASK_16BIT:
+            failures.append({'address': addr, 'name': key,
+                             'expected': expected & MASK_16BIT, 'actual': actual})
+
+    return {
+        'status': 'pass' if not failures and reason in reasons else 'fail',
+        'reason': reason,
+        'reasons': list(reasons),
+        'detail': run.detail,
+        'cycles': cycles,
+        'instructions': instructions,
+        'stall_cycles': stalls,
+        'cpi': (cycles + stalls) / instructions if instructions else 0.0,
+        'failures': failures,
+        'cache': [level.stats() for level in cpu.cache.levels()],
+    }
+
+def run_batch(jobs, workers=None):
+    """Executa os jobs no pool de processos; devolve os resultados na ordem dos jobs"""
+    if workers == 1:
+        return [run_job(job) for job in jobs]
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs, chunksize=chunksize))
+
+def write_report(results, path, elapsed):
+    summary = {
+        'total': len(results),
+        'passed': sum(r['status'] == 'pass' for r in results),
+        'failed': sum(r['status'] == 'fail' for r in results),
+        'errors': sum(r['status'] == 'error' for r in results),
+        'elapsed': round(elapsed, 6),
+    }
+    if path is None:
+        return summary
+
+    with open(path, 'w') as f:
+        if path.endswith('.jsonl'):
+            for r in results:
+                f.write(json.dumps(r) + "\n")
+            f.write(json.dumps({'summary': summary}) + "\n")
+        else:
+            json.dump({'summary': summary, 'results': results}, f, indent=2)
+    return summary
+
+# Casos do --self-check: (nome, fonte, expect, max_cycles, reasons, status esperado)
+_PARA = "JUMP inicio\nx: .DATA 0\ninicio:\n    LOCO 7\n    STOD x\nfim:\n    JUMP fim\n"
+_GIRA = "JUMP laco\nx: .DATA 0\nlaco:\n    LODD x\n    ADDD um\n    STOD x\n    JUMP laco\num: .DATA 1\n"
+SELF_CHECKS = [
+    ("halt + expect certo", _PARA, {'x': 7}, 10_000, DEFAULT_REASONS, 'pass'),
+    ("halt + expect errado", _PARA, {'x': 8}, 10_000, DEFAULT_REASONS, 'fail'),
+    ("limite de ciclos", _GIRA, {}, 10_000, DEFAULT_REASONS, 'fail'),
+    ("limite de ciclos aceito", _GIRA, {}, 10_000, (STOP_HALT, STOP_BUDGET), 'pass'),
+]
+
+def self_check():
+    """Roda os SELF_CHECKS e imprime cada um; retorna quantos deram status diferente"""
+    cache = ObjectCache()
+    wrong = 0
+    for name, source, expect, max_cycles, reasons, status in SELF_CHECKS:
+        image = cache.get_source(source.encode('utf-8'))
+        result = run_image(CPU(), image, expect, max_cycles, DEFAULT_TIMEOUT, reasons=reasons)
+        ok = result['status'] == status
+        wrong += not ok
+        print(f"{name:<25} {result['status']:<5} ({result['reason']})  {'ok' if ok else 'ERRADO'}")
+    return wrong
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa vários programas MAC-1 em paralelo")
+    parser.add_argument('paths', nargs='*', help="Diretórios, arquivos .asm ou manifestos .json")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Processos (padrão: nº de núcleos)")
+    parser.add_argument('--max-cycles', type=int, default=DEFAULT_MAX_CYCLES)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument('-o', '--output', default=None, help="Relatório .json ou .jsonl")
+    parser.add_argument('--self-check', action='store_true', help="Confere o próprio executor")
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        return 1 if self_check() else 0
+    if not args.paths:
+        parser.error("informe ao menos um diretório, .asm ou manifesto")
+
+    jobs = collect_jobs(args.paths, args.max_cycles, args.timeout)
+    start = time.perf_counter()
+    results = run_batch(jobs, args.jobs)
+    summary = write_report(results, args.output, time.perf_counter() - start)
+
+    for r in results:
+        line = f"[{r['status'].upper():5}] {r['program']}"
+        if 'error' in r:
+            line += f" -> {r['error']}"
+        else:
+            line += f" ({r['reason']}, {r['cycles']} ciclos)"
+            if r['reason'] not in r['reasons']:
+                line += f"\n        parou por '{r['reason']}', esperado: {', '.join(r['reasons'])}"
+            for fail in r['failures']:
+                line += (f"\n        {fail['name']} (End {fail['address']}): "
+                         f"{fail['actual']:04X} != esperado {fail['expected']:04X}")
+        print(line)
+    print(f"\n{summary['passed']}/{summary['total']} passaram em {summary['elapsed']:.2f}s")
+
+    return 0 if summary['passed'] == summary['total'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# tools/bench.py
+"""
+Benchmarks de desempenho do SIMULADOR (não do programa simulado).
+
+Uso:
+    python -m tools.bench                      # roda e compara com a linha de base
+    python -m tools.bench --save               # grava a linha de base atual
+    python -m tools.bench programs/bench/laco.asm --repeat 5 --tolerance 0.15
+
+Para cada kernel de programs/bench/ mede:
+  - CPU.run_until (laço rápido): microinstruções/s e instruções/s
+  - CPU.run_until com o microprograma compilado (hardware/microcompiler.py): instruções/s
+  - CPU.step (4 subciclos, usa o ALU e a cache "de verdade"): microinstruções/s
+  - taxa de acerto de cada nível de cache, ciclos e instruções (determinísticos)
+e confere os resultados (# EXPECT). Há também um micro benchmark da DirectMappingCache.
+
+Comparação com a linha de base (programs/bench/baseline.json):
+  - velocidade abaixo de (1 - tolerância) x base = REGRESSÃO (código de saída 1);
+  - ciclos/instruções/acertos diferentes = MUDOU (comportamento mudou: confira se era esperado).
+A velocidade depende da máquina: grave a linha de base na mesma máquina em que compara.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from config import MASK_16BIT, MEMORY_SIZE
+from hardware.cpu import CPU
+from hardware.memory import DirectMappingCache, MainMemory
+from hardware.microcompiler import CompiledMicrocode
+from software.assembler import Assembler
+from tools.batch import parse_expect_comments, resolve_address
+
+BENCH_DIR = os.path.join("programs", "bench")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_MAX_CYCLES = 5_000_000
+STEP_CYCLES = 20_000       # O step() é lento: mede só o começo de cada kernel
+CACHE_OPS = 200_000        # Acessos do micro benchmark da cache
+DEFAULT_TOLERANCE = 0.20
+
+# Métricas que só dependem do simulador estar correto (têm que bater exatamente)
+EXACT_METRICS = ('cycles', 'instructions', 'stall_cycles', 'hit_rates')
+# Métricas de velocidade (maior = melhor)
+SPEED_METRICS = ('uinst_per_sec', 'instr_per_sec', 'step_uinst_per_sec', 'compiled_instr_per_sec')
+
+def find_kernels(paths):
+    kernels = []
+    for path in paths or [BENCH_DIR]:
+        if os.path.isdir(path):
+            kernels += [os.path.join(path, name) for name in sorted(os.listdir(path))
+                        if name.endswith('.asm')]
+        else:
+            kernels.append(path)
+    return kernels
+
+def _best_time(fn, repeat):
+    """Executa fn() 'repeat' vezes e devolve (melhor tempo, último retorno)"""
+    best, value = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+def bench_kernel(path, repeat=3, max_cycles=DEFAULT_MAX_CYCLES):
+    """Mede um kernel .asm; devolve um dicionário de métricas"""
+    assembler = Assembler()
+    code = assembler.assemble(path)
+    symbols = dict(assembler.symbol_table)
+    expect = parse_expect_comments(path)
+
+    def run_fast():
+        cpu = CPU()
+        cpu.ram.load_image(code)
+        return cpu, cpu.run_until(max_cycles)
+
+    def run_compiled():
+        cpu = CPU()
+        cpu.compiled = CompiledMicrocode(cpu)
+        cpu.ram.load_image(code)
+        return cpu.run_until(max_cycles)
+
+    def run_step():
+        cpu = CPU()
+        cpu.ram.load_image(code)
+        for _ in range(STEP_CYCLES * 4):
+            cpu.step()
+        return cpu
+
+    elapsed, (cpu, result) = _best_time(run_fast, repeat)
+    compiled_elapsed, compiled = _best_time(run_compiled, repeat)
+    step_elapsed, _ = _best_time(run_step, repeat)
+
+    cpu.cache.flush()
+    failures = []
+    for key, expected in expect.items():
+        actual = cpu.ram.read(resolve_address(key, symbols))
+        if actual != expected & MASK_16BIT:
+            failures.append(f"{key}={actual} (esperado {expected & MASK_16BIT})")
+    if compiled[:3] != result[:3] or compiled.stall_cycles != result.stall_cycles:
+        failures.append(f"compilado diferente ({compiled.cycles} ciclos)")
+
+    return {
+        'reason': result.reason,
+        'cycles': result.cycles,
+        'instructions': result.instructions,
+        'stall_cycles': result.stall_cycles,
+        'hit_rates': {level.name: round(level.stats()['hit_rate'], 6) for level in cpu.cache.levels()},
+        'seconds': round(elapsed, 6),
+        'uinst_per_sec': round(result.cycles / elapsed),
+        'instr_per_sec': round(result.instructions / elapsed),
+        'step_uinst_per_sec': round(STEP_CYCLES / step_elapsed),
+        'compiled_instr_per_sec': round(compiled.instructions / compiled_elapsed),
+        'failures': failures,
+    }
+
+def bench_cache(repeat=3):
+    """Micro benchmark da DirectMappingCache: leituras/escritas em sequência (acessos/s)"""
+    def run():
+        cache = DirectMappingCache(MainMemory())
+        read, write = cache.read, cache.write
+        for addr in range(CACHE_OPS):
+            addr &= MEMORY_SIZE - 1
+            if addr & 3:
+                read(addr)
+            else:
+                write(addr, addr)
+        return cache
+    elapsed, cache = _best_time(run, repeat)
+    return {
+        'hit_rates': {cache.name: round(cache.stats()['hit_rate'], 6)},
+        'seconds': round(elapsed, 6),
+        'accesses_per_sec': round(CACHE_OPS / elapsed),
+    }
+
+def run_suite(kernels, repeat=3, max_cycles=DEFAULT_MAX_CYCLES):
+    results = {os.path.basename(path): bench_kernel(path, repeat, max_cycles) for path in kernels}
+    return {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform()},
+        'kernels': results,
+        'cache': bench_cache(repeat),
+    }
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Devolve (regressões, mudanças) em relação à linha de base (listas de textos)"""
+    regressions, changes = [], []
+
+    def check_speed(name, metric, now, before):
+        if before and now < before * (1 - tolerance):
+            regressions.append(f"{name}: {metric} {now:,} < {before:,} ({now / before - 1:+.0%})")
+
+    for name, now in current['kernels'].items():
+        before = baseline.get('kernels', {}).get(name)
+        if before is None:
+            changes.append(f"{name}: sem linha de base")
+            continue
+        for metric in EXACT_METRICS:
+            if now[metric] != before.get(metric):
+                changes.append(f"{name}: {metric} {before.get(metric)} -> {now[metric]}")
+        for metric in SPEED_METRICS:
+            check_speed(name, metric, now[metric], before.get(metric))
+
+    if 'cache' in baseline:
+        check_speed('cache', 'accesses_per_sec', current['cache']['accesses_per_sec'],
+                    baseline['cache'].get('accesses_per_sec'))
+    return regressions, changes
+
+def print_report(current, baseline):
+    print(f"{'kernel':<16} {'uinst/s':>12} {'instr/s':>10} {'compil. instr/s':>15} {'step uinst/s':>13} "
+          f"{'ciclos':>10} {'acertos':>16}  resultado")
+    for name, r in current['kernels'].items():
+        before = baseline.get('kernels', {}).get(name, {}) if baseline else {}
+        delta = ""
+        if before.get('uinst_per_sec'):
+            delta = f" ({r['uinst_per_sec'] / before['uinst_per_sec'] - 1:+.0%})"
+        hits = " ".join(f"{level}={rate:.1%}" for level, rate in r['hit_rates'].items())
+        status = "ok" if not r['failures'] else "FALHOU: " + ", ".join(r['failures'])
+        print(f"{name:<16} {r['uinst_per_sec']:>12,} {r['instr_per_sec']:>10,} "
+              f"{r.get('compiled_instr_per_sec', 0):>15,} "
+              f"{r['step_uinst_per_sec']:>13,} {r['cycles']:>10,} {hits:>16}  {status}{delta}")
+    cache = current['cache']
+    print(f"{'cache (micro)':<16} {cache['accesses_per_sec']:>12,} acessos/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de velocidade do simulador MIC-1")
+    parser.add_argument('paths', nargs='*', help=f"Kernels .asm ou diretórios (padrão: {BENCH_DIR})")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições (vale o melhor tempo)")
+    parser.add_argument('--max-cycles', type=int, default=DEFAULT_MAX_CYCLES)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Queda de velocidade aceitável (0.2 = 20%%)")
+    parser.add_argument('--save', action='store_true', help="Grava o resultado como nova linha de base")
+    parser.add_argument('-o', '--output', default=None, help="Grava o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    current = run_suite(find_kernels(args.paths), args.repeat, args.max_cycles)
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    print_report(current, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nLinha de base gravada em {args.baseline}")
+        return 0
+
+    failed = any(r['failures'] for r in current['kernels'].values())
+    if baseline is None:
+        print(f"\nSem linha de base ({args.baseline}); use --save para criar")
+        return 1 if failed else 0
+
+    regressions, changes = compare(current, baseline, args.tolerance)
+    for line in changes:
+        print(f"[MUDOU     ] {line}")
+    for line in regressions:
+        print(f"[REGRESSÃO ] {line}")
+    if not regressions and not changes:
+        print("\nSem regressões em relação à linha de base")
+    return 1 if failed or regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+# tools/cache_sweep.py
+"""
+Varredura de geometrias de cache: UMA simulação gravando o trace de memória e UMA
+análise offline que dá acertos/faltas de dezenas de caches de uma vez.
+
+Uso:
+    python -m tools.cache_sweep record programs/bench/pilha.asm pilha.mtr
+    python -m tools.cache_sweep analyze pilha.mtr                    # tabela por tamanho de bloco
+    python -m tools.cache_sweep analyze pilha.mtr --block-sizes 4,8 --max-ways 8 --json sweep.json
+    python -m tools.cache_sweep analyze pilha.mtr --check             # confere com a Cache de verdade
+
+Algoritmo (distância de pilha, Mattson et al.; "all-associativity", Hill & Smith):
+para cada tamanho de bloco e cada número de conjuntos S, uma pilha LRU por conjunto
+guarda os blocos do mais para o menos recente. A profundidade d em que o bloco é achado
+diz o resultado para TODAS as associatividades de uma vez: acerto se d < vias.
+Acessos seguidos ao mesmo bloco (ex: LODD faz rd duas vezes) são acertos em qualquer
+cache e nem entram nas pilhas.
+Política modelada: LRU. Com write-allocate o resultado é exato; sem write-allocate (o
+padrão do config.py) as escritas só consultam a pilha: exato para mapeamento direto; com
+vias > 1 o acerto de escrita não renova a ordem LRU na análise (--check mede a diferença).
+"""
+import argparse
+import json
+import sys
+import time
+
+from config import CACHE_SIZE, CACHE_WAYS, BLOCK_SIZE, CACHE_WRITE_ALLOCATE, MEMORY_SIZE
+from hardware.cpu import CPU
+from hardware.memory import Cache, MainMemory, POLICY_LRU
+from hardware.trace import MemoryTraceWriter, read_memory_trace
+from software.assembler import Assembler
+
+DEFAULT_BLOCK_SIZES = (1, 2, 4, 8, 16)
+DEFAULT_MAX_SETS = 256
+DEFAULT_MAX_WAYS = 16
+DEFAULT_MAX_CYCLES = 10_000_000
+
+def _powers_of_two(limit):
+    value = 1
+    while value <= limit:
+        yield value
+        value *= 2
+
+# --- Gravação ---
+
+def record(program, path, max_cycles=DEFAULT_MAX_CYCLES):
+    """Roda o programa gravando o trace de memória. Retorna (RunResult, acessos gravados)"""
+    cpu = CPU()
+    cpu.ram.load_image(Assembler().assemble(program))
+    cpu.memory_trace = writer = MemoryTraceWriter(path)
+    try:
+        result = cpu.run_until(max_cycles)
+    finally:
+        writer.close()
+    return result, writer.accesses
+
+def load_accesses(path):
+    """Endereços e flags de escrita do trace (duas listas; o ciclo não é usado pela análise)"""
+    addresses, writes = [], []
+    for _, addr, write in read_memory_trace(path):
+        addresses.append(addr)
+        writes.append(write)
+    return addresses, writes
+
+# --- Análise ---
+
+def _collapse(blocks, writes, write_allocate):
+    """
+    Tira os acessos que acertam em qualquer cache: o bloco já está no topo de todas as
+    pilhas (foi o último a atualizá-las; sem write-allocate só as leituras atualizam).
+    Retorna (referências restantes, leituras removidas, escritas removidas).
+    """
+    refs = []
+    repeat_reads = repeat_writes = 0
+    top = None
+    for block, write in zip(blocks, writes):
+        if block == top:
+            if write:
+                repeat_writes += 1
+            else:
+                repeat_reads += 1
+            continue
+        refs.append((block, write))
+        if write_allocate or not write:
+            top = block
+    return refs, repeat_reads, repeat_writes
+
+def _stack_distances(refs, sets, max_ways, write_allocate):
+    """Histogramas de profundidade (leituras, escritas) com uma pilha LRU por conjunto"""
+    mask = sets - 1
+    stacks = [[] for _ in range(sets)]
+    read_hist = [0] * max_ways
+    write_hist = [0] * max_ways
+    for block, write in refs:
+        stack = stacks[block & mask]
+        if block in stack:
+            depth = stack.index(block)
+            if write:
+                write_hist[depth] += 1
+                if not write_allocate:
+                    continue
+            else:
+                read_hist[depth] += 1
+            if depth:
+                del stack[depth]
+                stack.insert(0, block)
+        else:
+            if write and not write_allocate:
+                continue
+            stack.insert(0, block)
+            if len(stack) > max_ways:
+                stack.pop() # Mais fundo que max_ways: falta em todas as caches analisadas
+    return read_hist, write_hist
+
+def sweep(addresses, writes, block_sizes=DEFAULT_BLOCK_SIZES, max_sets=DEFAULT_MAX_SETS,
+          max_ways=DEFAULT_MAX_WAYS, write_allocate=CACHE_WRITE_ALLOCATE):
+    """
+    Acertos/faltas de todas as caches LRU com bloco em 'block_sizes', conjuntos e vias
+    potências de 2 (até max_sets/max_ways) que cabem na memória. Uma lista de dicionários.
+    """
+    total_writes = sum(writes)
+    total_reads = len(writes) - total_writes
+    results = []
+    for block_size in block_sizes:
+        shift = block_size.bit_length() - 1
+        if (1 << shift) != block_size:
+            raise ValueError(f"Tamanho de bloco precisa ser potência de 2 (recebido {block_size})")
+        refs, repeat_reads, repeat_writes = _collapse([a >> shift for a in addresses], writes,
+                                                      write_allocate)
+        for sets in _powers_of_two(max_sets):
+            if sets * block_size > MEMORY_SIZE:
+                break
+            read_hist, write_hist = _stack_distances(refs, sets, max_ways, write_allocate)
+            read_hits, write_hits = repeat_reads, repeat_writes
+            for ways in range(1, max_ways + 1):
+                read_hits += read_hist[ways - 1]
+                write_hits += write_hist[ways - 1]
+                if ways & (ways - 1) or sets * ways * block_size > MEMORY_SIZE:
+                    continue
+                accesses = total_reads + total_writes
+                results.append({
+                    'block_size': block_size, 'sets': sets, 'ways': ways,
+                    'lines': sets * ways, 'words': sets * ways * block_size,
+                    'read_hits': read_hits, 'read_misses': total_reads - read_hits,
+                    'write_hits': write_hits, 'write_misses': total_writes - write_hits,
+                    'hit_rate': (read_hits + write_hits) / accesses if accesses else 0.0,
+                })
+    return results
+
+def replay(addresses, writes, lines, ways, block_size, write_allocate=CACHE_WRITE_ALLOCATE):
+    """Passa o trace por uma Cache de verdade (a referência do --check)"""
+    cache = Cache(MainMemory(), lines=lines, ways=ways, block_size=block_size, policy=POLICY_LRU,
+                  write_allocate=write_allocate)
+    read, write = cache.read, cache.write
+    for addr, is_write in zip(addresses, writes):
+        if is_write:
+            write(addr, 0)
+        else:
+            read(addr)
+    return cache.stats()
+
+# --- Saída ---
+
+def format_table(results):
+    """Uma tabela por tamanho de bloco: linhas = capacidade (palavras), colunas = vias"""
+    out = []
+    for block_size in sorted({r['block_size'] for r in results}):
+        rows = [r for r in results if r['block_size'] == block_size]
+        ways_list = sorted({r['ways'] for r in rows})
+        by_key = {(r['words'], r['ways']): r for r in rows}
+        out.append(f"Bloco de {block_size} palavra(s) - taxa de acerto")
+        out.append(f"{'palavras':>9}" + "".join(f"{f'{w} via(s)':>11}" for w in ways_list))
+        for words in sorted({r['words'] for r in rows}):
+            cells = [by_key.get((words, w)) for w in ways_list]
+            out.append(f"{words:>9}" + "".join(f"{c['hit_rate']:>11.2%}" if c else f"{'-':>11}"
+                                               for c in cells))
+        out.append("")
+    return "\n".join(out)
+
+def check(addresses, writes, results, write_allocate):
+    """
+    Confere a análise com a Cache de verdade em algumas geometrias (inclui a do config.py).
+    Retorna quantas deram diferente onde a análise é exata (write-allocate ou 1 via).
+    """
+    by_key = {(r['block_size'], r['sets'], r['ways']): r for r in results}
+    picks = [(BLOCK_SIZE, CACHE_SIZE // CACHE_WAYS, CACHE_WAYS)]
+    picks += [key for key in sorted(by_key) if key[0] in (2, 8) and key[1] in (1, 8)]
+    mismatches = 0
+    for block_size, sets, ways in picks:
+        analysed = by_key.get((block_size, sets, ways))
+        if analysed is None:
+            continue
+        real = replay(addresses, writes, sets * ways, ways, block_size, write_allocate)
+        same = (real['read_hits'], real['write_hits']) == (analysed['read_hits'], analysed['write_hits'])
+        exact = write_allocate or ways == 1
+        mismatches += exact and not same
+        status = 'ok' if same else ('DIFERENTE' if exact else 'aprox.')
+        print(f"B={block_size:<2} S={sets:<4} W={ways:<2}  análise={analysed['hit_rate']:.4%}  "
+              f"Cache={real['hit_rate']:.4%}  {status}")
+    return mismatches
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trace de memória + análise de várias caches numa passada")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Roda o programa gravando o trace de memória")
+    rec.add_argument("program")
+    rec.add_argument("trace")
+    rec.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES)
+
+    ana = sub.add_parser("analyze", help="Taxas de acerto de várias geometrias a partir do trace")
+    ana.add_argument("trace")
+    ana.add_argument("--block-sizes", default=",".join(map(str, DEFAULT_BLOCK_SIZES)))
+    ana.add_argument("--max-sets", type=int, default=DEFAULT_MAX_SETS)
+    ana.add_argument("--max-ways", type=int, default=DEFAULT_MAX_WAYS)
+    policy = ana.add_mutually_exclusive_group()
+    policy.add_argument("--write-allocate", dest="write_allocate", action="store_true",
+                        default=CACHE_WRITE_ALLOCATE)
+    policy.add_argument("--no-write-allocate", dest="write_allocate", action="store_false")
+    ana.add_argument("--json", help="Grava os resultados (lista de dicionários) neste arquivo")
+    ana.add_argument("--check", action="store_true", help="Confere algumas geometrias com a Cache")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        start = time.perf_counter()
+        result, accesses = record(args.program, args.trace, args.max_cycles)
+        print(f"Parada: {result.reason}  ciclos={result.cycles:,}  acessos={accesses:,} "
+              f"({4 * accesses:,} bytes)  {time.perf_counter() - start:.2f}s")
+        return 0
+
+    addresses, writes = load_accesses(args.trace)
+    start = time.perf_counter()
+    results = sweep(addresses, writes, [int(b) for b in args.block_sizes.split(",")],
+                    args.max_sets, args.max_ways, args.write_allocate)
+    elapsed = time.perf_counter() - start
+    print(format_table(results))
+    print(f"{len(results)} geometrias, {len(addresses):,} acessos, {elapsed:.2f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    if args.check:
+        return 1 if check(addresses, writes, results, args.write_allocate) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+# tools/debug.py
+"""
+Depurador de linha de comando (sem GUI), em cima do cpu.breakpoints.
+
+Uso:
+    python -m tools.debug programs/teste_complexo.asm
+    (mic1) break loop            # breakpoint no rótulo (ou endereço: break 0x12)
+    (mic1) watch res w           # para quando escrever em 'res' (faixa: watch 0x100-0x1FF rw)
+    (mic1) continue
+    (mic1) regs / mem res 8 / stepi 3 / info / delete / quit
+
+Comandos também podem vir de um arquivo: python -m tools.debug prog.asm < comandos.txt
+"""
+import cmd
+import sys
+
+from config import MEMORY_SIZE
+from hardware.breakpoints import Breakpoints
+from hardware.cpu import CPU, STOP_BUDGET, STOP_BREAKPOINT
+from hardware.functional import run_instruction
+from hardware.profiler import OPCODE_NAMES
+from software.assembler import Assembler
+
+DEFAULT_BUDGET = 10_000_000 # Ciclos de um 'continue' sem argumento
+
+class DebugShell(cmd.Cmd):
+    prompt = "(mic1) "
+
+    def __init__(self, cpu, symbol_table, stdin=None):
+        super().__init__(stdin=stdin)
+        if stdin is not None:
+            self.use_rawinput = False
+        self.cpu = cpu
+        self.symbols = symbol_table
+        self.breakpoints = cpu.breakpoints = Breakpoints(symbol_table)
+
+    # --- Auxiliares ---
+
+    def _address(self, text):
+        if text in self.symbols:
+            return self.symbols[text]
+        try:
+            value = int(text, 0)
+        except ValueError:
+            raise ValueError(f"Rótulo ou endereço inválido: {text}") from None
+        if not 0 <= value < MEMORY_SIZE:
+            raise ValueError(f"Endereço fora da memória: {text}")
+        return value
+
+    def _where(self):
+        pc = self.cpu.regs.values[1]
+        label = self.breakpoints.label_of(pc)
+        return f"PC={pc:03X}{f' ({label})' if label else ''} MPC={self.cpu.MPC} ciclo={self.cpu.cycles}"
+
+    def onecmd(self, line):
+        try:
+            return super().onecmd(line)
+        except ValueError as exc:
+            print(f"Erro: {exc}")
+
+    def emptyline(self):
+        pass
+
+    # --- Breakpoints ---
+
+    def do_break(self, arg):
+        """break <rótulo|endereço>: para no início da instrução"""
+        if arg in self.symbols:
+            self.breakpoints.add_label(arg)
+        else:
+            self.breakpoints.add_pc(self._address(arg))
+
+    def do_mbreak(self, arg):
+        """mbreak <mpc>: para antes da microinstrução"""
+        self.breakpoints.add_mpc(int(arg, 0))
+
+    def do_obreak(self, arg):
+        """obreak <mnemônico|opcode>: para logo depois de decodificar a instrução"""
+        self.breakpoints.add_opcode(arg if not arg[:1].isdigit() else int(arg, 0))
+
+    def do_watch(self, arg):
+        """watch <endereço>[-<fim>] [r|w|rw]: para depois de ler/escrever a faixa"""
+        parts = arg.split()
+        mode = parts[1] if len(parts) > 1 else "rw"
+        start, _, end = parts[0].partition('-')
+        self.breakpoints.watch(self._address(start), self._address(end) if end else None,
+                               read='r' in mode, write='w' in mode)
+
+    def do_delete(self, arg):
+        """delete: remove todos os breakpoints e watchpoints"""
+        self.breakpoints.clear()
+
+    def do_info(self, arg):
+        """info: lista os breakpoints"""
+        bp = self.breakpoints
+        print("PCs:", " ".join(f"{pc:03X}" for pc in sorted(bp.pcs)) or "-")
+        print("MPCs:", " ".join(str(mpc) for mpc in sorted(bp.mpcs)) or "-")
+        print("Opcodes:", " ".join(OPCODE_NAMES.get(op, f"{op:04X}") for op in sorted(bp.opcodes)) or "-")
+        print(f"Leituras vigiadas: {len(bp.reads)}  Escritas vigiadas: {len(bp.writes)}")
+
+    # --- Execução ---
+
+    def do_continue(self, arg):
+        """continue [ciclos]: roda até um breakpoint, o fim do programa ou o orçamento"""
+        result = self.cpu.run_until(int(arg, 0) if arg else DEFAULT_BUDGET)
+        if result.reason == STOP_BREAKPOINT:
+            hit = result.detail
+            print(f"Parada ({hit.kind} {hit.value:#x}) em {self._where()}")
+        elif result.reason == STOP_BUDGET:
+            print(f"Orçamento de ciclos esgotado em {self._where()}")
+        else:
+            print(f"Parada: {result.reason} em {self._where()}")
+    do_c = do_continue
+
+    def do_stepi(self, arg):
+        """stepi [n]: executa n instruções inteiras"""
+        for _ in range(int(arg, 0) if arg else 1):
+            reason, _ = run_instruction(self.cpu)
+            if reason != STOP_BUDGET:
+                print(f"Parada: {reason}")
+                break
+        print(self._where())
+
+    def do_regs(self, arg):
+        """regs: mostra os registradores"""
+        print(self.cpu.regs)
+        print(self._where())
+
+    def do_mem(self, arg):
+        """mem <endereço> [n]: mostra n palavras (o que a CPU leria; não mexe na cache)"""
+        parts = arg.split()
+        start = self._address(parts[0])
+        count = int(parts[1], 0) if len(parts) > 1 else 8
+        peek = self.cpu.cache.peek
+        words = [peek(addr) for addr in range(start, min(start + count, MEMORY_SIZE))]
+        print(f"{start:03X}: " + " ".join(f"{w:04X}" for w in words))
+
+    def do_quit(self, arg):
+        """quit: sai"""
+        return True
+    do_EOF = do_quit
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__)
+        return 2
+    assembler = Assembler()
+    cpu = CPU()
+    cpu.ram.load_image(assembler.assemble(argv[0]))
+    stdin = None if sys.stdin.isatty() else sys.stdin
+    DebugShell(cpu, assembler.symbol_table, stdin).cmdloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
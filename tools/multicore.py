@@ -0,0 +1,93 @@
+# tools/multicore.py
+"""
+Roda um programa SPMD em vários núcleos MIC-1 (ver hardware/multicore.py).
+
+Uso:
+    python -m tools.multicore programs/multicore_soma.asm --cores 4              # L1 coerentes (MESI)
+    python -m tools.multicore programs/multicore_soma.asm --cores 4 --protocol MSI --quantum 1
+    python -m tools.multicore programs/multicore_soma.asm --cores 8 --epoch 10000  # 1 processo por núcleo
+    python -m tools.multicore programs/multicore_soma.asm --cores 8 --epoch 10000 --serial
+    ... --show total,vez --json stats.json
+
+Se o programa tiver o rótulo 'ncores', o número de núcleos é gravado lá antes de rodar.
+"""
+import argparse
+import json
+import sys
+import time
+
+from config import MULTICORE_QUANTUM, COHERENCE_PROTOCOL
+from hardware.coherence import PROTOCOL_MSI, PROTOCOL_MESI
+from hardware.multicore import MultiCore, EpochMultiCore
+from software.assembler import Assembler
+
+DEFAULT_MAX_CYCLES = 10_000_000
+
+def build(program, cores, epoch=None, processes=True, protocol=COHERENCE_PROTOCOL):
+    """Monta o programa e a máquina (MultiCore, ou EpochMultiCore se 'epoch'). Retorna (máquina, símbolos)"""
+    assembler = Assembler()
+    words = assembler.assemble(program)
+    if epoch is None:
+        machine = MultiCore(cores, protocol)
+    else:
+        machine = EpochMultiCore(cores, epoch, processes)
+    machine.load_image(words)
+    if 'ncores' in assembler.symbol_table:
+        machine.ram.write(assembler.symbol_table['ncores'], cores)
+    return machine, assembler.symbol_table
+
+def format_report(results, stats):
+    out = [f"{'núcleo':>6} {'parada':>10} {'ciclos':>10} {'instr.':>9} {'CPI':>6} {'L1':>7} "
+           f"{'invalid.':>9} {'descart.':>9}"]
+    for result, core in zip(results, stats['cores']):
+        l1 = core['cache'] if isinstance(core['cache'], dict) else core['cache'][0]
+        out.append(f"{core['core']:>6} {result.reason:>10} {result.cycles:>10,} {result.instructions:>9,} "
+                   f"{result.cpi:>6.2f} {l1['hit_rate']:>7.1%} {l1.get('invalidated', '-'):>9} "
+                   f"{core.get('discarded', '-'):>9}")
+    if stats['mode'] == 'coherent':
+        bus = stats['bus']
+        out.append(f"Barramento ({bus['protocol']}): {bus['transactions']:,} transações  "
+                   f"BusRd={bus['bus_rd']:,}  BusRdX={bus['bus_rdx']:,}  BusUpgr={bus['bus_upgr']:,}  "
+                   f"invalidações={bus['invalidations']:,}  intervenções={bus['interventions']:,}")
+    else:
+        out.append(f"Épocas: {stats['epochs']:,} de {stats['epoch']:,} microinstruções  "
+                   f"conflitos={stats['conflicts']:,}  "
+                   f"palavras sincronizadas={sum(c['updates'] for c in stats['cores']):,}")
+    return "\n".join(out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roda um programa MAC-1 em vários núcleos")
+    parser.add_argument("program")
+    parser.add_argument("--cores", type=int, default=4)
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES, help="Por núcleo")
+    parser.add_argument("--protocol", choices=(PROTOCOL_MSI, PROTOCOL_MESI), default=COHERENCE_PROTOCOL)
+    parser.add_argument("--quantum", type=int, default=MULTICORE_QUANTUM,
+                        help="Microinstruções por vez no rodízio (modo coerente)")
+    parser.add_argument("--epoch", type=int, default=None,
+                        help="Liga o modo em processos: sincroniza a memória a cada N microinstruções")
+    parser.add_argument("--serial", action="store_true", help="Modo de épocas sem processos (mesmo resultado)")
+    parser.add_argument("--show", default="", help="Rótulos a mostrar no fim (separados por vírgula)")
+    parser.add_argument("--json", help="Grava as estatísticas neste arquivo")
+    args = parser.parse_args(argv)
+
+    machine, symbols = build(args.program, args.cores, args.epoch, not args.serial, args.protocol)
+    start = time.perf_counter()
+    if args.epoch is None:
+        results = machine.run(args.max_cycles, args.quantum)
+        machine.flush()
+    else:
+        results = machine.run(args.max_cycles)
+    elapsed = time.perf_counter() - start
+
+    stats = machine.stats()
+    print(format_report(results, stats))
+    for name in filter(None, args.show.split(",")):
+        print(f"{name} = {machine.ram.read(symbols[name])}")
+    print(f"{args.cores} núcleos, {sum(r.cycles for r in results):,} microinstruções em {elapsed:.2f}s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(stats, f, indent=1)
+    return 0 if all(r.reason == "halt" for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
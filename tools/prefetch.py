@@ -0,0 +1,114 @@
+# tools/prefetch.py
+"""
+Compara a busca feita pelo microprograma com a busca antecipada (hardware/prefetch.py).
+
+Uso:
+    python -m tools.prefetch                                # kernels de programs/bench/
+    python -m tools.prefetch programs/bench/laco.asm --depth 1,2,4,8
+    python -m tools.prefetch --optimized --json prefetch.json
+
+Para cada programa roda a CPU normal (a linha de base) e a CPU com o microprograma sem
+busca + IFU de cada profundidade; confere que a RAM e os registradores (fora MAR/MBR)
+terminam iguais e mostra ciclos totais (microinstruções + stall), CPI, o ganho, os
+flushes (por opcode da instrução que desviou), os ciclos que a CPU esperou pela busca (no
+total e logo depois dos desvios: o custo dos flushes) e a latência que ficou escondida.
+Com --optimized as duas CPUs usam o microprograma do software/microcode_opt.
+"""
+import argparse
+import json
+import sys
+
+from config import PREFETCH_DEPTH
+from hardware.cpu import CPU
+from hardware.prefetch import InstructionFetchUnit
+from software.assembler import Assembler
+from software.microcode import CONTROL_STORE, OPCODE_MAP, make_fetch_free
+from tools.bench import find_kernels
+
+DEFAULT_MAX_CYCLES = 5_000_000
+# O MAR e o MBR da linha de base guardam o endereço/palavra da última busca: não entram
+ARCH_REGS = ('PC', 'IR', 'SP', 'AC', 'TIR', 'A', 'B', 'C')
+
+def _arch_state(cpu):
+    named = cpu.regs.named()
+    return cpu.ram.dump_image(), [named[name] for name in ARCH_REGS]
+
+def _run(code, control_store, opcode_map, depth, max_cycles):
+    cpu = CPU(control_store, opcode_map)
+    if depth:
+        cpu.prefetch = InstructionFetchUnit(cpu, depth)
+    cpu.ram.load_image(code)
+    result = cpu.run_until(max_cycles)
+    cpu.cache.flush()
+    return cpu, result
+
+def compare(path, depths=(PREFETCH_DEPTH,), optimized=False, max_cycles=DEFAULT_MAX_CYCLES):
+    """Linha de base + uma rodada por profundidade. Retorna um dicionário pronto para JSON"""
+    if optimized:
+        from software.microcode_opt import optimize
+        opt = optimize()
+        control_store, opcode_map = opt.control_store, opt.opcode_map
+    else:
+        control_store, opcode_map = CONTROL_STORE, OPCODE_MAP
+    free_store, removed = make_fetch_free(control_store)
+    code = Assembler().assemble(path)
+
+    base_cpu, base = _run(code, control_store, opcode_map, 0, max_cycles)
+    out = {'program': path, 'uinsts_removed': removed,
+           'baseline': {'reason': base.reason, 'cycles': base.cycles, 'stall_cycles': base.stall_cycles,
+                        'total_cycles': base.total_cycles, 'instructions': base.instructions,
+                        'cpi': base.cpi},
+           'prefetch': []}
+    for depth in depths:
+        cpu, result = _run(code, free_store, opcode_map, depth, max_cycles)
+        same = (_arch_state(cpu) == _arch_state(base_cpu) and result.reason == base.reason
+                and result.instructions == base.instructions)
+        row = {'reason': result.reason, 'cycles': result.cycles, 'stall_cycles': result.stall_cycles,
+               'total_cycles': result.total_cycles, 'instructions': result.instructions,
+               'cpi': result.cpi, 'same_result': same,
+               'saved': 1 - result.total_cycles / base.total_cycles if base.total_cycles else 0.0}
+        row.update(cpu.prefetch.stats())
+        out['prefetch'].append(row)
+    return out
+
+def format_report(report):
+    base = report['baseline']
+    out = [f"{report['program']}  (busca no microprograma: {report['uinsts_removed']} "
+           f"microinstruções a menos por instrução com a IFU)",
+           f"{'fila':>5} {'ciclos':>11} {'stall':>9} {'CPI':>6} {'ganho':>7} {'flushes':>8} "
+           f"{'à toa':>7} {'espera':>8} {'desvios':>8} {'escond.':>8}  resultado",
+           f"{'-':>5} {base['total_cycles']:>11,} {base['stall_cycles']:>9,} {base['cpi']:>6.2f}"]
+    for row in report['prefetch']:
+        out.append(f"{row['depth']:>5} {row['total_cycles']:>11,} {row['stall_cycles']:>9,} "
+                   f"{row['cpi']:>6.2f} {row['saved']:>7.1%} {row['flushes']:>8,} "
+                   f"{row['flushed_words']:>7,} {row['wait_cycles']:>8,} {row['flush_cycles']:>8,} "
+                   f"{row['hidden_cycles']:>8,}  "
+                   f"{'ok' if row['same_result'] else 'DIFERENTE'}")
+    by_opcode = report['prefetch'][-1]['flushes_by_opcode'] if report['prefetch'] else {}
+    if by_opcode:
+        out.append("Flushes por opcode: " + "  ".join(f"{name}={count:,}" for name, count in by_opcode.items()))
+    return "\n".join(out)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca no microprograma x busca antecipada (IFU)")
+    parser.add_argument("programs", nargs="*", help="Arquivos .asm ou diretórios (padrão: programs/bench)")
+    parser.add_argument("--depth", default=str(PREFETCH_DEPTH), help="Profundidades da fila (ex: 1,2,4,8)")
+    parser.add_argument("--optimized", action="store_true", help="Usa o microprograma otimizado")
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES)
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    args = parser.parse_args(argv)
+
+    depths = [int(d) for d in args.depth.split(",")]
+    reports = []
+    for path in find_kernels(args.programs):
+        report = compare(path, depths, args.optimized, args.max_cycles)
+        reports.append(report)
+        print(format_report(report))
+        print()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=1)
+    return 0 if all(row['same_result'] for r in reports for row in r['prefetch']) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,440 @@
+# tools/service.py
+"""
+Serviço local de simulação: um servidor asyncio que fica no ar e repassa os jobs para
+um pool de processos já aquecidos (imports feitos, microprogramas montados), em vez
+de cada ferramenta (editor, corretor automático) abrir um python novo por programa.
+
+Uso:
+    python -m tools.service serve                       # socket Unix (config.SERVICE_SOCKET)
+    python -m tools.service serve --port 8765 -j 4      # TCP em 127.0.0.1
+    python -m tools.service run programs/teste_soma.asm --expect var_c=40 --trace instruction
+    python -m tools.service assemble programs/teste_soma.asm
+    python -m tools.service stats
+
+Protocolo: JSON, uma mensagem por linha, nos dois sentidos. Pedidos:
+    {"op": "run", "id": 1, "source": "<texto .asm>", "max_cycles": 1000000, "timeout": 10,
+     "expect": {"res": -10, "4": 1}, "trace": "instruction", "trace_limit": 200,
+     "microcode": "default", "reasons": ["halt"]}
+    {"op": "assemble", "source": "..."}        {"op": "stats"}        {"op": "ping"}
+Sem "expect" valem os comentários '# EXPECT' do fonte; "trace" é um nível de
+hardware.trace.LEVEL_NAMES (os últimos 'trace_limit' eventos voltam em texto);
+"microcode" é "default" ou "optimized" (software.microcode_opt); "reasons" são os
+motivos de parada aceitos (padrão: só "halt", como no tools.batch).
+Resposta: {"id": 1, "ok": true, "cached": false, "result": {...}} (o mesmo relatório do
+tools.batch, mais "trace"), ou {"id": 1, "ok": false, "error": "..."}. Vários pedidos
+podem ser mandados na mesma conexão sem esperar: as respostas saem na ordem em que
+ficam prontas (use o "id").
+
+Os resultados ficam num cache LRU indexado por (hash do fonte, hash do microprograma,
+hash do config.py, opções do job); pedidos iguais em andamento esperam o mesmo job.
+Resultados com "timeout" ou erro de execução não entram no cache.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+from config import SERVICE_SOCKET, SERVICE_WORKERS, SERVICE_CACHE_ENTRIES
+from hardware.cpu import CPU
+from hardware.trace import Tracer, RingBufferSink, LEVEL_NAMES, TRACE_OFF, format_event
+from software.microcode import CONTROL_STORE, OPCODE_MAP
+from software.objfile import ObjectCache, source_hash
+from tools.batch import DEFAULT_MAX_CYCLES, DEFAULT_TIMEOUT, DEFAULT_REASONS, parse_expect_lines, run_image
+
+DEFAULT_TRACE_LIMIT = 1000
+MAX_MESSAGE = 16 * 1024 * 1024 # Maior linha aceita (o fonte vai dentro do JSON)
+MICROCODES = ('default', 'optimized')
+OPS = ('run', 'assemble', 'stats', 'ping')
+
+# --- Lado dos processos do pool ---
+
+_object_cache = None
+_microcode = {}
+
+def _get_microcode(name):
+    """(control_store, opcode_map) do microprograma pedido; o otimizado é feito uma vez por processo"""
+    if name not in _microcode:
+        if name == 'default':
+            _microcode[name] = (CONTROL_STORE, OPCODE_MAP)
+        elif name == 'optimized':
+            from software.microcode_opt import optimize
+            result = optimize()
+            _microcode[name] = (result.control_store, result.opcode_map)
+        else:
+            raise ValueError(f"Microprograma desconhecido: {name}")
+    return _microcode[name]
+
+WARM_UP_SOURCE = "JUMP inicio\nx: .DATA 1\ninicio: LODD x\nADDD x\nSTOD x\nfim: JUMP fim\n"
+
+def _warm_up():
+    """Inicializador dos processos: monta e roda um programa com os dois microprogramas"""
+    global _object_cache
+    _object_cache = ObjectCache()
+    for name in MICROCODES:
+        run_service_job({'op': 'run', 'source': WARM_UP_SOURCE, 'max_cycles': 1000,
+                         'timeout': DEFAULT_TIMEOUT, 'expect': {}, 'microcode': name})
+
+def _ready():
+    return os.getpid()
+
+def run_service_job(job):
+    """Executa um pedido 'run' ou 'assemble' já validado (roda dentro do processo do pool)"""
+    result = {'status': 'error'}
+    start = time.perf_counter()
+    try:
+        source = job['source']
+        image = _object_cache.get_source(source.encode('utf-8'))
+        if job['op'] == 'assemble':
+            result = {'status': 'ok', 'words': list(image.words), 'symbols': image.symbols,
+                      'lines': list(image.line_map)}
+        else:
+            expect = job.get('expect')
+            if expect is None:
+                expect = parse_expect_lines(source.splitlines())
+            cpu = CPU(*_get_microcode(job.get('microcode', 'default')))
+            level = LEVEL_NAMES[job.get('trace') or 'off']
+            sink = None
+            if level != TRACE_OFF:
+                sink = RingBufferSink(job.get('trace_limit', DEFAULT_TRACE_LIMIT))
+                cpu.tracer = Tracer(level, sink)
+            result = run_image(cpu, image, expect, job['max_cycles'], job['timeout'], start,
+                               job['reasons'])
+            if sink is not None:
+                result['trace'] = [format_event(*event) for event in sink.events]
+    except Exception as exc: # Erro de montagem, rótulo inexistente no expect etc.
+        result['error'] = f"{type(exc).__name__}: {exc}"
+    result['elapsed'] = round(time.perf_counter() - start, 6)
+    return result
+
+# --- Servidor ---
+
+def _digest(value):
+    return hashlib.sha256(repr(value).encode('utf-8')).hexdigest()
+
+def config_digest():
+    """Hash de todas as constantes do config.py (cache, latências, memória...)"""
+    return _digest(sorted((name, getattr(config, name)) for name in dir(config) if name.isupper()))
+
+def microcode_digest(control_store, opcode_map):
+    return _digest((sorted(control_store.items()), sorted(opcode_map.items())))
+
+def validate(message):
+    """Confere um pedido 'run'/'assemble' e devolve o job com os valores padrão preenchidos"""
+    source = message.get('source')
+    if not isinstance(source, str):
+        raise ValueError("'source' (texto do .asm) é obrigatório")
+    job = {'op': message['op'], 'source': source}
+    if job['op'] == 'assemble':
+        return job
+    job['max_cycles'] = int(message.get('max_cycles', DEFAULT_MAX_CYCLES))
+    job['timeout'] = float(message.get('timeout', DEFAULT_TIMEOUT))
+    if job['max_cycles'] < 1 or job['timeout'] <= 0:
+        raise ValueError("'max_cycles' e 'timeout' precisam ser positivos")
+    expect = message.get('expect')
+    if expect is not None:
+        if not isinstance(expect, dict):
+            raise ValueError("'expect' precisa ser um objeto {rótulo/endereço: valor}")
+        expect = {str(key): int(value) for key, value in expect.items()}
+    job['expect'] = expect
+    reasons = message.get('reasons', list(DEFAULT_REASONS))
+    if not isinstance(reasons, list) or not all(isinstance(reason, str) for reason in reasons):
+        raise ValueError("'reasons' precisa ser uma lista de motivos de parada (ex: [\"halt\", \"budget\"])")
+    job['reasons'] = sorted(set(reasons))
+    trace = message.get('trace') or 'off'
+    if trace not in LEVEL_NAMES:
+        raise ValueError(f"Nível de trace desconhecido: {trace} (use {', '.join(LEVEL_NAMES)})")
+    job['trace'] = trace
+    job['trace_limit'] = int(message.get('trace_limit', DEFAULT_TRACE_LIMIT))
+    job['microcode'] = message.get('microcode', 'default')
+    if job['microcode'] not in MICROCODES:
+        raise ValueError(f"Microprograma desconhecido: {job['microcode']} (use {', '.join(MICROCODES)})")
+    return job
+
+class SimulationService:
+    """Pool de processos aquecidos + cache de resultados; handle() atende uma mensagem"""
+    def __init__(self, workers=SERVICE_WORKERS, cache_entries=SERVICE_CACHE_ENTRIES):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_entries = cache_entries
+        self.results = OrderedDict() # Chave -> resultado (LRU)
+        self.inflight = {}           # Chave -> Future do job em andamento
+        self.pool = None
+        self._config = config_digest()
+        self._microcode = {'default': microcode_digest(CONTROL_STORE, OPCODE_MAP)}
+        self.started = time.time()
+        self.requests = self.jobs = self.hits = self.errors = self.restarts = 0
+
+    async def start(self):
+        """Sobe o pool e espera todos os processos estarem aquecidos"""
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_warm_up)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ready) for _ in range(self.workers)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def _microcode_digest(self, name):
+        if name not in self._microcode:
+            from software.microcode_opt import optimize
+            result = optimize()
+            self._microcode[name] = microcode_digest(result.control_store, result.opcode_map)
+        return self._microcode[name]
+
+    def cache_key(self, job):
+        options = {key: value for key, value in job.items() if key not in ('source', 'timeout', 'microcode')}
+        microcode = self._microcode_digest(job['microcode']) if job['op'] == 'run' else None
+        return (source_hash(job['source'].encode('utf-8')).hex(), microcode, self._config,
+                json.dumps(options, sort_keys=True))
+
+    def stats(self):
+        return {'workers': self.workers, 'uptime': round(time.time() - self.started, 3),
+                'requests': self.requests, 'jobs': self.jobs, 'cache_hits': self.hits,
+                'cached_results': len(self.results), 'in_flight': len(self.inflight),
+                'errors': self.errors, 'pool_restarts': self.restarts}
+
+    async def handle(self, message):
+        """Uma mensagem do protocolo (dicionário) -> resposta (dicionário)"""
+        self.requests += 1
+        response = {'id': message.get('id')} if isinstance(message, dict) else {'id': None}
+        try:
+            op = message.get('op') if isinstance(message, dict) else None
+            if op not in OPS:
+                raise ValueError(f"Operação desconhecida: {op} (use {', '.join(OPS)})")
+            if op == 'ping':
+                response.update(ok=True, result='pong')
+            elif op == 'stats':
+                response.update(ok=True, result=self.stats())
+            else:
+                cached, result = await self.submit(validate(message))
+                response.update(ok=True, cached=cached, result=result)
+        except Exception as exc:
+            self.errors += 1
+            response.update(ok=False, error=f"{type(exc).__name__}: {exc}")
+        return response
+
+    async def submit(self, job):
+        """Roda o job no pool (ou pega do cache). Retorna (veio do cache, resultado)"""
+        key = self.cache_key(job)
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+            self.hits += 1
+            return True, result
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return True, await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            result = await self._execute(job)
+            future.set_result(result)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception() # Já entregue a quem esperava: não vira aviso de "nunca lida"
+            raise
+        finally:
+            del self.inflight[key]
+        if result['status'] != 'error' and result.get('reason') != 'timeout':
+            self.results[key] = result
+            while len(self.results) > self.cache_entries:
+                self.results.popitem(last=False)
+        return False, result
+
+    async def _execute(self, job):
+        self.jobs += 1
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, run_service_job, job)
+        except BrokenProcessPool:
+            # Um processo morreu (ex: falta de memória): troca o pool inteiro (uma vez só,
+            # os outros jobs do pool quebrado chegam aqui também) e avisa este job
+            if self.pool is pool:
+                self.restarts += 1
+                self.pool = None
+                # Sem esperar o pool quebrado: um shutdown() com wait travaria o laço (e os
+                # outros clientes) até os processos restantes terminarem
+                pool.shutdown(wait=False, cancel_futures=True)
+                await self.start()
+            raise RuntimeError("Processo do pool morreu durante o job (pool reiniciado)")
+
+    async def _client(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            try:
+                message = json.loads(line)
+            except ValueError as exc:
+                self.requests += 1
+                self.errors += 1
+                response = {'id': None, 'ok': False, 'error': f"JSON inválido: {exc}"}
+            else:
+                response = await self.handle(message)
+            async with lock:
+                writer.write(json.dumps(response).encode('utf-8') + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError: # Linha maior que MAX_MESSAGE
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve(self, path=SERVICE_SOCKET, port=None, ready=None):
+        """Atende até SIGINT/SIGTERM. 'port' = TCP em 127.0.0.1 em vez do socket Unix 'path'"""
+        await self.start()
+        if port is not None:
+            server = await asyncio.start_server(self._client, '127.0.0.1', port, limit=MAX_MESSAGE)
+        else:
+            if os.path.exists(path):
+                probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    probe.connect(path)
+                except OSError:
+                    os.unlink(path) # Socket de um servidor anterior que não saiu direito
+                else:
+                    raise RuntimeError(f"Já há um serviço atendendo em {path}")
+                finally:
+                    probe.close()
+            server = await asyncio.start_unix_server(self._client, path, limit=MAX_MESSAGE)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            async with server:
+                if ready is not None:
+                    ready(server)
+                await stop.wait()
+        finally:
+            self.close()
+            if port is None and os.path.exists(path):
+                os.unlink(path)
+
+# --- Cliente ---
+
+class ServiceClient:
+    """Cliente síncrono (uma conexão, um pedido por vez)"""
+    def __init__(self, path=SERVICE_SOCKET, port=None, timeout=None):
+        if port is not None:
+            self.sock = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(path)
+        self.file = self.sock.makefile('rb')
+        self._next_id = 0
+
+    def request(self, message):
+        self._next_id += 1
+        message = dict(message, id=self._next_id)
+        self.sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("O serviço fechou a conexão")
+        return json.loads(line)
+
+    def run(self, source, **options):
+        return self.request(dict(options, op='run', source=source))
+
+    def assemble(self, source):
+        return self.request({'op': 'assemble', 'source': source})
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _parse_expect(items):
+    expect = {}
+    for item in items:
+        key, value = item.split('=', 1)
+        expect[key] = int(value, 0)
+    return expect
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço local de simulação MIC-1 (jobs por socket)")
+    parser.add_argument("--socket", default=SERVICE_SOCKET, help="Socket Unix do serviço")
+    parser.add_argument("--port", type=int, default=None, help="Usa TCP em 127.0.0.1 nesta porta")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    srv = sub.add_parser("serve", help="Sobe o serviço")
+    srv.add_argument("-j", "--jobs", type=int, default=SERVICE_WORKERS, help="Processos (padrão: nº de núcleos)")
+    srv.add_argument("--cache-entries", type=int, default=SERVICE_CACHE_ENTRIES)
+
+    run = sub.add_parser("run", help="Manda um programa para rodar")
+    run.add_argument("program")
+    run.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES)
+    run.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    run.add_argument("--expect", nargs="*", default=None, help="rotulo=valor (padrão: # EXPECT do fonte)")
+    run.add_argument("--trace", choices=tuple(LEVEL_NAMES), default="off")
+    run.add_argument("--trace-limit", type=int, default=DEFAULT_TRACE_LIMIT)
+    run.add_argument("--optimized", action="store_true", help="Usa o microprograma otimizado")
+    run.add_argument("--reasons", nargs="+", default=None, help="Motivos de parada aceitos (padrão: halt)")
+
+    asm = sub.add_parser("assemble", help="Manda um programa para montar")
+    asm.add_argument("program")
+
+    sub.add_parser("stats", help="Contadores do serviço")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        service = SimulationService(args.jobs, args.cache_entries)
+        where = f"127.0.0.1:{args.port}" if args.port is not None else args.socket
+        ready = lambda server: print(f"Serviço no ar em {where} ({service.workers} processos)", flush=True)
+        asyncio.run(service.serve(args.socket, args.port, ready))
+        return 0
+
+    with ServiceClient(args.socket, args.port) as client:
+        if args.command == "stats":
+            response = client.request({'op': 'stats'})
+        else:
+            with open(args.program, 'r') as f:
+                source = f.read()
+            if args.command == "assemble":
+                response = client.assemble(source)
+            else:
+                options = {'max_cycles': args.max_cycles, 'timeout': args.timeout,
+                           'trace': args.trace, 'trace_limit': args.trace_limit,
+                           'microcode': 'optimized' if args.optimized else 'default'}
+                if args.expect is not None:
+                    options['expect'] = _parse_expect(args.expect)
+                if args.reasons is not None:
+                    options['reasons'] = args.reasons
+                response = client.run(source, **options)
+    print(json.dumps(response, indent=1))
+    if not response['ok']:
+        return 1
+    return 0 if response['result'].get('status') in ('pass', 'ok', None) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# tools/stream.py
+"""
+Roda um programa que conversa com o mundo pelas portas de E/S mapeadas em memória.
+
+Uso:
+    python -m tools.stream programa.asm --input entrada.bin --output saida.bin
+    echo "ola" | python -m tools.stream programs/io/maiusculas.asm      # stdin -> stdout
+
+Portas (config.IO_BASE, padrão 0x800):
+    base+0  entrada: próximo byte (0xFFFF = fim)    base+1  entrada: 1 se há dado
+    base+2  saída:   escreve um byte                base+3  saída: contador / flush
+Com --word as portas de dado trabalham com palavras de 16 bits (little-endian).
+A entrada e a saída passam por buffers de config.IO_BUFFER_SIZE bytes: o programa pode
+processar arquivos de qualquer tamanho sem a RAM (4096 palavras) ser o limite.
+"""
+import argparse
+import sys
+import time
+
+from config import IO_BASE
+from hardware.cpu import CPU, STOP_BUDGET, STOP_HALT
+from hardware.memory import InputStream, OutputSink
+from software.assembler import Assembler
+
+DEFAULT_MAX_CYCLES = 100_000_000
+CHUNK_CYCLES = 1_000_000
+
+def run_stream(program, source, sink, word=False, max_cycles=DEFAULT_MAX_CYCLES, base=IO_BASE):
+    """
+    Monta e roda 'program' com a entrada 'source' e a saída 'sink' (ver InputStream/OutputSink).
+    Retorna (RunResult da última parte, CPU); a saída já foi descarregada.
+    """
+    cpu = CPU()
+    cpu.ram.load_image(Assembler().assemble(program))
+    cpu.map_device(InputStream(source, word=word), base)
+    cpu.map_device(OutputSink(sink, word=word), base + 2)
+    done = 0
+    try:
+        while True:
+            result = cpu.run_until(min(CHUNK_CYCLES, max_cycles - done))
+            done += result.cycles
+            if result.reason != STOP_BUDGET or done >= max_cycles:
+                return result, cpu
+    finally:
+        cpu.io.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roda um programa MAC-1 com E/S mapeada em memória")
+    parser.add_argument("program")
+    parser.add_argument("--input", help="Arquivo de entrada (padrão: stdin)")
+    parser.add_argument("--output", help="Arquivo de saída (padrão: stdout)")
+    parser.add_argument("--word", action="store_true", help="Portas de 16 bits em vez de bytes")
+    parser.add_argument("--max-cycles", type=int, default=DEFAULT_MAX_CYCLES)
+    parser.add_argument("--base", type=lambda text: int(text, 0), default=IO_BASE,
+                        help="Primeiro endereço das portas (padrão 0x%(default)X)")
+    args = parser.parse_args(argv)
+
+    source = args.input or sys.stdin.buffer
+    sink = args.output or sys.stdout.buffer
+    start = time.perf_counter()
+    result, cpu = run_stream(args.program, source, sink, args.word, args.max_cycles, args.base)
+    elapsed = time.perf_counter() - start
+    sys.stdout.flush()
+
+    stats = cpu.io.stats()
+    items = {d['type']: d['items'] for d in stats['devices']}
+    print(f"Parada: {result.reason}  ciclos={cpu.cycles:,}  instruções={cpu.instructions:,}  "
+          f"lidos={items.get('InputStream', 0):,}  escritos={items.get('OutputSink', 0):,}  "
+          f"({elapsed:.2f}s)", file=sys.stderr)
+    return 0 if result.reason == STOP_HALT else 1
+
+if __name__ == "__main__":
+    sys.exit(main())